@@ -3,20 +3,40 @@ import os
 import re
 import time
 import html
+import codecs
+import hashlib
 import traceback
 import sys
 import math
-from typing import Dict, List
+import threading
+import socket
+import struct
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Tuple
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache, partial
+from itertools import zip_longest
+from urllib.parse import parse_qsl, urlencode, urlparse
 
 import requests
-import cloudscraper
+from requests.adapters import HTTPAdapter
 
+# 무거운 선택 의존성(cloudscraper, http.server, sqlite3)은 쓰는 기능이 켜졌을 때 함수 안에서 import한다.
+# 시작할 때(특히 armv7) 쓰지 않는 모듈을 읽느라 첫 사이클이 늦어지지 않게 하기 위함.
 
-DATA_DIR = "/data"
+
+DATA_DIR = os.getenv("DATA_DIR", "/data")
 STATE_FILE = os.path.join(DATA_DIR, "state.json")
+JOURNAL_FILE = os.path.join(DATA_DIR, "state.journal")
+OUTBOX_FILE = os.path.join(DATA_DIR, "outbox.json")
+SCRAPER_FILE = os.path.join(DATA_DIR, "cloudscraper.json")
+SEEN_FILE = os.path.join(DATA_DIR, "seen.bin")
 CONFIG_PATH = os.getenv("CONFIG_PATH", "/data/options.json")
+# 알림 API 주소(벤치마크/개발 시 로컬 스텁 서버로 바꿀 수 있음)
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
+SUPERVISOR_API_BASE = os.getenv("SUPERVISOR_API_BASE", "http://supervisor/core/api")
 
 
 def log(*args):
@@ -64,28 +84,898 @@ def load_config() -> Dict:
         return json.load(f)
 
 
-def load_state() -> Dict:
-    if not os.path.exists(STATE_FILE):
-        return {"seen": {}, "mall_cache": {}, "fail_count": {}}
+# 지표: 이름 → (종류, 설명). /metrics(Prometheus 텍스트 형식)로 내보냄
+METRIC_DEFS = {
+    "hotdeal_cycles_total": ("counter", "Completed scrape cycles by result"),
+    "hotdeal_cycle_seconds": ("histogram", "Wall time of one scrape cycle"),
+    "hotdeal_stage_seconds": ("histogram", "Wall time of each cycle stage"),
+    "hotdeal_items": ("gauge", "Items on the first pages in the last cycle"),
+    "hotdeal_fetch_seconds": ("histogram", "Board list fetch latency"),
+    "hotdeal_fetch_total": ("counter", "Board list fetches by status"),
+    "hotdeal_fetch_bytes_total": ("counter", "Board list bytes downloaded"),
+    "hotdeal_board_cache_total": ("counter", "Board list cache results (not_modified/same_hash/not_due/miss)"),
+    "hotdeal_parse_seconds": ("histogram", "Board list parse time"),
+    "hotdeal_parse_matches_total": ("counter", "Items parsed from board lists"),
+    "hotdeal_list_outcome_total": ("counter", "Board list results (parsed/blocked/layout_changed/error)"),
+    "hotdeal_detail_seconds": ("histogram", "Detail page fetch + mall link extraction time"),
+    "hotdeal_detail_total": ("counter", "Detail page fetches by result (found/empty/error)"),
+    "hotdeal_mall_cache_total": ("counter", "mall_url cache lookups by result (hit/miss)"),
+    "hotdeal_alarms_total": ("counter", "Alarms raised by kind (main/dist)"),
+    "hotdeal_notify_seconds": ("histogram", "Notification request latency"),
+    "hotdeal_notify_total": ("counter", "Notification requests by channel and result"),
+    "hotdeal_webpush_subscribers": ("gauge", "Web Push subscriptions in webpush_subscriptions.json"),
+    "hotdeal_outbox_pending": ("gauge", "Notifications waiting in the outbox"),
+    "hotdeal_state_entries": ("gauge", "Entries per state bucket"),
+    "hotdeal_state_bytes": ("gauge", "Size of the state files on disk"),
+    "hotdeal_cluster_boards": ("gauge", "Boards leased by this node"),
+    "hotdeal_cluster_nodes": ("gauge", "Live nodes in the cluster"),
+    "hotdeal_cluster_claims_total": ("counter", "Alarm key claims by result (won/lost)"),
+    "hotdeal_backfill_pages_total": ("counter", "Extra list pages fetched to fill a gap after downtime"),
+    "hotdeal_backfill_backlog": ("gauge", "Backfilled alarms deferred to later cycles by backfill_max_alarms"),
+    "hotdeal_breaker_state": ("gauge", "Per-host circuit breaker state (0 closed, 1 half-open, 2 open)"),
+    "hotdeal_budget_skips_total": ("counter", "Requests/boards/alarms put off by the cycle budget or an open breaker"),
+    "hotdeal_dedupe_total": ("counter", "Alarms suppressed as cross-board duplicates by match (title/mall)"),
+    "hotdeal_dedupe_detail_skipped_total": ("counter", "Detail page fetches skipped for already known titles"),
+}
 
-    with open(STATE_FILE, "r", encoding="utf-8") as f:
-        st = json.load(f)
+METRICS_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
 
-    if not isinstance(st, dict):
-        return {"seen": {}, "mall_cache": {}, "fail_count": {}}
 
-    st.setdefault("seen", {})
-    st.setdefault("mall_cache", {})
-    st.setdefault("fail_count", {})
+class Metrics:
+    """
+    프로세스 전역 카운터/게이지/히스토그램(스레드 안전). 같은 이름도 라벨이 다르면 따로 센다.
+    값은 재시작하면 0부터(Prometheus counter 방식).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, Tuple], float] = {}
+        self._hists: Dict[Tuple[str, Tuple], List] = {}  # key -> [버킷별 개수, 합계, 개수]
+
+    @staticmethod
+    def _key(name: str, labels: Dict) -> Tuple[str, Tuple]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._values[self._key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            h = self._hists.get(key)
+            if h is None:
+                h = [[0] * len(METRICS_SECONDS_BUCKETS), 0.0, 0]
+                self._hists[key] = h
+            for i, le in enumerate(METRICS_SECONDS_BUCKETS):
+                if value <= le:
+                    h[0][i] += 1
+            h[1] += value
+            h[2] += 1
+
+    def total(self, name: str) -> float:
+        """라벨과 관계없이 합친 값(HA 센서용)"""
+        with self._lock:
+            return sum(v for (n, _), v in self._values.items() if n == name)
+
+    def render(self) -> str:
+        def fmt(labels: Tuple, extra: Tuple = ()) -> str:
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            esc = [(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs]
+            return "{" + ",".join(f'{k}="{v}"' for k, v in esc) + "}"
+
+        with self._lock:
+            values = dict(self._values)
+            hists = {k: (list(h[0]), h[1], h[2]) for k, h in self._hists.items()}
+
+        lines: List[str] = []
+        for name, (kind, help_text) in METRIC_DEFS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                for (n, labels), (buckets, total, count) in sorted(hists.items()):
+                    if n != name:
+                        continue
+                    for le, c in zip(METRICS_SECONDS_BUCKETS, buckets):
+                        lines.append(f"{name}_bucket{fmt(labels, (('le', repr(float(le))),))} {c}")
+                    lines.append(f"{name}_bucket{fmt(labels, (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{fmt(labels)} {total}")
+                    lines.append(f"{name}_count{fmt(labels)} {count}")
+            else:
+                for (n, labels), v in sorted(values.items()):
+                    if n == name:
+                        lines.append(f"{name}{fmt(labels)} {v}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+def _metrics_handler():
+    from http.server import BaseHTTPRequestHandler
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = METRICS.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return _MetricsHandler
+
+
+_METRICS_SERVER = None  # http.server.ThreadingHTTPServer
+
+
+def configure_metrics(cfg: Dict):
+    """metrics_enable이면 /metrics 서버를 띄움(포트가 바뀌면 다시 띄움, 끄면 내림)."""
+    global _METRICS_SERVER
+    enabled = bool(cfg.get("metrics_enable"))
+    try:
+        port = int(cfg.get("metrics_port", 9464) or 9464)
+    except Exception:
+        port = 9464
+
+    if _METRICS_SERVER is not None and (not enabled or _METRICS_SERVER.server_address[1] != port):
+        _METRICS_SERVER.shutdown()
+        _METRICS_SERVER.server_close()
+        _METRICS_SERVER = None
+        log("DEBUG: metrics endpoint stopped")
+    if not enabled or _METRICS_SERVER is not None:
+        return
+    from http.server import ThreadingHTTPServer
+
+    try:
+        server = ThreadingHTTPServer(("0.0.0.0", port), _metrics_handler())
+    except OSError as e:
+        log("WARN: metrics endpoint failed to start:", repr(e))
+        return
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    _METRICS_SERVER = server
+    log(f"DEBUG: metrics endpoint on :{port}/metrics")
+
+
+STATE_BUCKETS = ("seen", "mall_cache", "fail_count", "board_cache", "dedupe", "host_health", "backfill")
+
+
+def empty_state() -> Dict:
+    return {b: {} for b in STATE_BUCKETS}
+
+
+def _normalize_state(st) -> Dict:
+    if not isinstance(st, dict):
+        return empty_state()
+    for b in STATE_BUCKETS:
+        st.setdefault(b, {})
     return st
 
 
-def save_state(state: Dict):
-    os.makedirs(DATA_DIR, exist_ok=True)
-    tmp = STATE_FILE + ".tmp"
+def _read_state_file(path: str) -> Dict:
+    if not os.path.exists(path):
+        return empty_state()
+    with open(path, "r", encoding="utf-8") as f:
+        return _normalize_state(json.load(f))
+
+
+def _persisted_items(state: Dict):
+    # seen.bin에 따로 저장하는 해시 seen(HashedSeen)은 state.json/journal에서 뺀다
+    return ((k, v) for k, v in state.items() if not isinstance(v, HashedSeen))
+
+
+def _write_state_file(path: str, state: Dict, fsync: bool = False):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
     with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(state, f, ensure_ascii=False, indent=2)
-    os.replace(tmp, STATE_FILE)
+        json.dump(dict(_persisted_items(state)), f, ensure_ascii=False, indent=2)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class JsonStateStore:
+    """기존 방식: 저장할 때마다 state.json 전체를 다시 쓴다."""
+
+    name = "json"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Dict:
+        return _read_state_file(self.path)
+
+    def save(self, state: Dict):
+        _write_state_file(self.path, state)
+
+    def rewrite(self, state: Dict):
+        self.save(state)
+
+
+_MISSING = object()
+
+
+def _freeze(v):
+    # 값 비교용: 스칼라는 그대로, dict/list는 직렬화 문자열로
+    if v is None or isinstance(v, (str, int, float, bool)):
+        return v
+    return ("json", json.dumps(v, ensure_ascii=False, sort_keys=True))
+
+
+class DirtyDict(dict):
+    """
+    바뀐 키(추가/변경/삭제)를 순서대로 기록하는 dict. journal 저장소가 버킷을 이것으로 감싸서
+    저장할 때 state 전체가 아니라 바뀐 키만 비교한다. 값 안쪽(예: board_cache 항목의 필드)을 직접 고쳤으면
+    bucket[key] = value로 다시 넣어야 기록된다.
+    """
+
+    __slots__ = ("dirty",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dirty: Dict[str, None] = {}
+
+    def _touch(self, key):
+        # 마지막으로 바뀐 순서 유지(journal 재생 때 seen 순서가 같아지도록)
+        self.dirty.pop(key, None)
+        self.dirty[key] = None
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._touch(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._touch(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            self._touch(key)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._touch(key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        for key in self:
+            self._touch(key)
+        super().clear()
+
+    def take_dirty(self) -> List[str]:
+        keys, self.dirty = list(self.dirty), {}
+        return keys
+
+
+class JournalStateStore:
+    """
+    state.json(스냅샷) + state.journal(변경분 추가 기록) 방식.
+
+    - save(): 마지막 저장 이후 바뀐 항목만 한 줄씩(JSON) 모아서 journal 끝에 한 번에 append + fsync.
+      버킷은 DirtyDict로 감싸 두고 바뀐 키만 비교한다(저장 비용이 state 크기가 아니라 바뀐 양에 비례).
+      최상위 값을 새 dict로 바꿨으면(예: host_health) 그 버킷만 전체 비교
+    - load(): 스냅샷을 읽고 journal을 순서대로 재생. 마지막 줄이 깨져 있으면(쓰기 중 종료) 그 앞까지만 반영
+    - journal 줄 수가 compact_min 또는 항목 수의 2배를 넘으면 스냅샷을 새로 쓰고 journal을 비움
+    스냅샷 파일이 기존 state.json 그대로이므로 JSON 저장소에서 별도 변환 없이 이어서 사용 가능.
+
+    journal 한 줄 형식:
+      {"b": 버킷, "k": 키, "v": 값}   버킷[키] = 값 (기존 키면 맨 뒤로 이동)
+      {"b": 버킷, "k": 키, "x": 1}    버킷[키] 삭제
+      {"k": 키, "v": 값} / {"k": 키, "x": 1}   최상위 값 설정/삭제
+    """
+
+    name = "journal"
+
+    def __init__(self, path: str, journal_path: str, compact_min: int = 1000):
+        self.path = path
+        self.journal_path = journal_path
+        self.compact_min = compact_min
+        self._shadow: Dict = {}
+        self._journal_lines = 0
+
+    @staticmethod
+    def _track(state: Dict):
+        # 버킷을 DirtyDict로 감싼다(로드/compact 직후, 최상위 값이 새 dict로 바뀐 뒤)
+        for top, val in list(_persisted_items(state)):
+            if isinstance(val, dict) and not isinstance(val, DirtyDict):
+                state[top] = DirtyDict(val)
+            elif isinstance(val, DirtyDict):
+                val.take_dirty()
+
+    def _snapshot_shadow(self, state: Dict):
+        # shadow[최상위 키] = ("bucket", {키: 고정값}, 버킷 객체) / ("value", 고정값, None)
+        shadow = {}
+        for top, val in _persisted_items(state):
+            if isinstance(val, dict):
+                shadow[top] = ("bucket", {k: _freeze(v) for k, v in val.items()}, val)
+            else:
+                shadow[top] = ("value", _freeze(val), None)
+        self._shadow = shadow
+
+    def load(self) -> Dict:
+        migrated = os.path.exists(self.path) and not os.path.exists(self.journal_path)
+        state = _read_state_file(self.path)
+
+        lines = 0
+        torn = False
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        torn = True
+                        break
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        torn = True
+                        break
+                    self._apply(state, op)
+                    lines += 1
+
+        state = _normalize_state(state)
+        self._track(state)
+        self._snapshot_shadow(state)
+        self._journal_lines = lines
+
+        if torn:
+            log("WARN: state journal has a torn tail, compacting")
+            self.compact(state)
+        elif migrated:
+            log("DEBUG: state journal initialized from existing state.json")
+            self.compact(state)
+        return state
+
+    @staticmethod
+    def _apply(state: Dict, op: Dict):
+        k = op.get("k")
+        b = op.get("b")
+        if b is None:
+            if op.get("x"):
+                state.pop(k, None)
+            else:
+                state[k] = op.get("v")
+            return
+        bucket = state.get(b)
+        if not isinstance(bucket, dict):
+            bucket = state[b] = {}
+        bucket.pop(k, None)
+        if not op.get("x"):
+            bucket[k] = op.get("v")
+
+    def _diff(self, state: Dict) -> Tuple[List[Dict], Dict, List[Tuple[DirtyDict, List[str]]], List[Tuple]]:
+        """
+        (journal에 쓸 변경 목록, 새 shadow, 꺼낸 dirty 키 목록, shadow 버킷 변경분).
+        shadow를 만들 때와 같은 DirtyDict 버킷은 dirty 키만, 나머지(새 dict/값)는 전체를 비교한다.
+        """
+        ops: List[Dict] = []
+        shadow = self._shadow
+        new_shadow: Dict = {}
+        taken: List[Tuple[DirtyDict, List[str]]] = []
+        updates: List[Tuple] = []
+
+        for top, val in _persisted_items(state):
+            prev = shadow.get(top)
+            if isinstance(val, DirtyDict) and prev is not None and prev[2] is val:
+                keys = val.take_dirty()
+                taken.append((val, keys))
+                if not keys:
+                    new_shadow[top] = prev
+                    continue
+                # shadow 버킷은 쓰기가 끝난 뒤에만 고친다(updates)
+                frozen = prev[1]
+                for k in keys:
+                    if k in val:
+                        v = val[k]
+                        fv = _freeze(v)
+                        if frozen.get(k, _MISSING) != fv:
+                            ops.append({"b": top, "k": k, "v": v})
+                        updates.append((frozen, k, fv))
+                    elif k in frozen:
+                        ops.append({"b": top, "k": k, "x": 1})
+                        updates.append((frozen, k, _MISSING))
+                new_shadow[top] = prev
+            elif isinstance(val, dict):
+                prev_bucket = prev[1] if prev and prev[0] == "bucket" else None
+                if prev_bucket is None:
+                    if prev is not None:
+                        ops.append({"k": top, "x": 1})
+                    prev_bucket = {}
+                    if not val:
+                        ops.append({"k": top, "v": {}})
+                frozen = {}
+                for k, v in val.items():
+                    fv = _freeze(v)
+                    frozen[k] = fv
+                    if k not in prev_bucket or prev_bucket[k] != fv:
+                        ops.append({"b": top, "k": k, "v": v})
+                if len(prev_bucket) > len(frozen) or any(k not in frozen for k in prev_bucket):
+                    for k in prev_bucket:
+                        if k not in frozen:
+                            ops.append({"b": top, "k": k, "x": 1})
+                new_shadow[top] = ("bucket", frozen, val)
+            else:
+                fv = _freeze(val)
+                if prev is None or prev[0] != "value" or prev[1] != fv:
+                    ops.append({"k": top, "v": val})
+                new_shadow[top] = ("value", fv, None)
+
+        for top in shadow:
+            if top not in new_shadow:
+                ops.append({"k": top, "x": 1})
+        return ops, new_shadow, taken, updates
+
+    def save(self, state: Dict):
+        ops, new_shadow, taken, updates = self._diff(state)
+        if ops:
+            try:
+                os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+                data = "".join(json.dumps(op, ensure_ascii=False, separators=(",", ":")) + "\n" for op in ops)
+                with open(self.journal_path, "a", encoding="utf-8") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except BaseException:
+                # 못 쓴 변경은 다음 저장 때 다시
+                for bucket, keys in taken:
+                    for k in keys:
+                        bucket._touch(k)
+                raise
+            self._journal_lines += len(ops)
+        for frozen, k, fv in updates:
+            frozen.pop(k, None)
+            if fv is not _MISSING:
+                frozen[k] = fv
+        self._shadow = new_shadow
+        # 새 dict로 바뀐 버킷은 다음 저장부터 dirty 키만 보도록 감싼다
+        for top, val in list(_persisted_items(state)):
+            if isinstance(val, dict) and not isinstance(val, DirtyDict):
+                state[top] = DirtyDict(val)
+                self._shadow[top] = (self._shadow[top][0], self._shadow[top][1], state[top])
+        if not ops:
+            return
+
+        entries = sum(len(v) for v in state.values() if isinstance(v, dict))
+        if self._journal_lines > max(self.compact_min, 2 * entries):
+            self.compact(state)
+
+    def rewrite(self, state: Dict):
+        self.compact(state)
+
+    def compact(self, state: Dict):
+        # 스냅샷을 먼저 원자적으로 교체한 뒤 journal을 비움
+        # (그 사이에 죽어도 journal 재생 결과는 스냅샷과 같음)
+        _write_state_file(self.path, state, fsync=True)
+        with open(self.journal_path, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self._track(state)
+        self._snapshot_shadow(state)
+        self._journal_lines = 0
+
+
+# ---- seen 압축 저장(seen.bin) ----
+# seen 키(site:board:https://...)를 blake2b 64비트 해시로 바꿔 고정 크기 레코드로 저장한다.
+#   파일 = 헤더(16바이트: magic, 버전, base 레코드 수) + 레코드(16바이트: 해시 u64, 시각 f64) 반복
+#   - 앞쪽 base개: 압축(compact) 때 쓴 레코드. 키가 겹치지 않고 시각 순서 → 한 번에 dict로 읽음
+#   - 그 뒤: 저장할 때마다 바뀐 항목만 추가(append). 시각 > 0이면 설정(맨 뒤로), 0 이하면 삭제
+# 해시 충돌(100만 개일 때 약 3e-8 확률)은 새 글 하나를 본 것으로 잘못 볼 뿐이라 무시한다.
+
+SEEN_MAGIC = b"HDSEEN\0\0"
+SEEN_VERSION = 1
+_SEEN_HEADER = struct.Struct("<8sII")
+_SEEN_RECORD = struct.Struct("<Qd")
+
+
+def seen_hash(key) -> int:
+    """seen 키의 64비트 해시. 이미 해시(int)면 그대로."""
+    if isinstance(key, int):
+        return key
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class HashedSeen:
+    """
+    seen 버킷의 해시 버전. dict처럼 쓰되(in/get/pop/[]=/del/len/items) 키는 문자열이나 해시(int) 모두 받는다.
+    내부는 {해시: 시각} dict(삽입 순서 = 시각 순서)라 seen_mark/trim_seen 동작은 그대로.
+    items()/iter는 해시를 돌려준다. 바뀐 항목은 flush()에서 seen.bin 끝에 추가하고,
+    추가 레코드가 항목 수(최소 compact_min)를 넘으면 파일을 새로 쓴다.
+    """
+
+    def __init__(self, path: str, compact_min: int = 1000):
+        self.path = path
+        self.compact_min = compact_min
+        self._d: Dict[int, float] = {}
+        self._dirty: Dict[int, float] = {}   # 마지막 flush 이후 바뀐 해시 → 시각(0 = 삭제), 바뀐 순서
+        self._tail = -1                      # 파일에서 base 뒤에 붙은 레코드 수(-1: 파일을 새로 써야 함)
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+    def __contains__(self, key) -> bool:
+        return seen_hash(key) in self._d
+
+    def __iter__(self):
+        return iter(self._d)
+
+    def __getitem__(self, key) -> float:
+        return self._d[seen_hash(key)]
+
+    def get(self, key, default=None):
+        return self._d.get(seen_hash(key), default)
+
+    def items(self):
+        return self._d.items()
+
+    def values(self):
+        return self._d.values()
+
+    def __setitem__(self, key, ts):
+        h = seen_hash(key)
+        # 시각이 없는 예전 값(True 등)도 '본 것'(참)으로 남도록 최소 1.0
+        ts = _seen_ts(ts) or 1.0
+        self._d.pop(h, None)
+        self._d[h] = ts
+        self._dirty.pop(h, None)
+        self._dirty[h] = ts
+
+    def pop(self, key, default=None):
+        h = seen_hash(key)
+        if h not in self._d:
+            return default
+        self._dirty.pop(h, None)
+        self._dirty[h] = 0.0
+        return self._d.pop(h)
+
+    def __delitem__(self, key):
+        if self.pop(key) is None:
+            raise KeyError(key)
+
+    def merge(self, legacy: Dict):
+        """문자열 키 seen(dict)을 합치고 시각 순서로 다시 정렬. 다음 flush는 파일 전체를 새로 씀."""
+        merged = dict(self._d)
+        for k, v in legacy.items():
+            merged[seen_hash(k)] = _seen_ts(v) or 1.0
+        self._d = dict(sorted(merged.items(), key=lambda kv: kv[1]))
+        self._tail = -1
+
+    def load(self) -> "HashedSeen":
+        self._d = {}
+        self._dirty = {}
+        self._tail = 0
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._tail = -1   # 첫 flush에서 헤더와 함께 새로 씀
+            return self
+
+        hs = _SEEN_HEADER.size
+        rs = _SEEN_RECORD.size
+        magic, version, base = _SEEN_HEADER.unpack_from(data) if len(data) >= hs else (b"", 0, 0)
+        if magic != SEEN_MAGIC or version != SEEN_VERSION:
+            bad = self.path + ".bad"
+            os.replace(self.path, bad)
+            log("WARN: unknown seen file format, moved aside:", bad, f"(version={version})")
+            self._tail = -1
+            return self
+
+        n = (len(data) - hs) // rs
+        base = min(base, n)
+        body = memoryview(data)[hs : hs + n * rs]
+        if sys.byteorder == "little":
+            hashes, stamps = body.cast("Q"), body.cast("d")
+            self._d = dict(zip(hashes[0 : 2 * base : 2], stamps[1 : 2 * base : 2]))
+        else:
+            self._d = {h: ts for h, ts in _SEEN_RECORD.iter_unpack(body[: base * rs])}
+
+        d = self._d
+        for h, ts in _SEEN_RECORD.iter_unpack(body[base * rs :]):
+            d.pop(h, None)
+            if ts > 0:
+                d[h] = ts
+        self._tail = n - base
+
+        if hs + n * rs != len(data):
+            log("WARN: seen file has a torn tail, compacting")
+            self.compact()
+        return self
+
+    def flush(self):
+        if not self._dirty and self._tail >= 0:
+            return
+        if self._tail < 0 or self._tail + len(self._dirty) > max(self.compact_min, len(self._d)):
+            self.compact()
+            return
+        data = b"".join(map(_SEEN_RECORD.pack, self._dirty.keys(), self._dirty.values()))
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._tail += len(self._dirty)
+        self._dirty = {}
+
+    def compact(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_SEEN_HEADER.pack(SEEN_MAGIC, SEEN_VERSION, len(self._d)))
+            f.write(b"".join(map(_SEEN_RECORD.pack, self._d.keys(), self._d.values())))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._dirty = {}
+        self._tail = 0
+
+
+_STATE_STORE = None
+_SEEN_BACKEND = "json"
+
+
+def configure_state_store(cfg: Dict):
+    """state_backend(json/journal)와 seen_backend(json/binary) 설정에 맞는 저장소를 선택. 설정이 그대로면 기존 저장소 유지."""
+    global _STATE_STORE, _SEEN_BACKEND
+    seen_backend = (cfg.get("seen_backend") or "json").strip().lower()
+    if seen_backend not in ("json", "binary"):
+        log("WARN: unknown seen_backend, using json:", seen_backend)
+        seen_backend = "json"
+    if seen_backend == "json" and os.path.exists(SEEN_FILE):
+        # 해시에서 원래 키를 되살릴 수 없으므로 seen.bin이 있으면 json으로 바꾸지 않는다(본 글 기록을 잃지 않게)
+        log(f"WARN: seen_backend json ignored while {SEEN_FILE} exists (delete it to start json with empty seen); using binary")
+        seen_backend = "binary"
+    if seen_backend != _SEEN_BACKEND:
+        _SEEN_BACKEND = seen_backend
+        log("DEBUG: seen backend:", seen_backend)
+
+    backend = (cfg.get("state_backend") or "json").strip().lower()
+    if _STATE_STORE is not None and _STATE_STORE.name == backend:
+        return _STATE_STORE
+
+    if backend == "journal":
+        _STATE_STORE = JournalStateStore(STATE_FILE, JOURNAL_FILE)
+    else:
+        if backend != "json":
+            log("WARN: unknown state_backend, using json:", backend)
+        if os.path.exists(JOURNAL_FILE):
+            # journal → json 전환: 남은 변경분을 state.json에 합친 뒤 journal 제거
+            js = JournalStateStore(STATE_FILE, JOURNAL_FILE)
+            js.compact(js.load())
+            os.remove(JOURNAL_FILE)
+        _STATE_STORE = JsonStateStore(STATE_FILE)
+    log("DEBUG: state backend:", _STATE_STORE.name)
+    return _STATE_STORE
+
+
+def get_state_store():
+    global _STATE_STORE
+    if _STATE_STORE is None:
+        _STATE_STORE = JsonStateStore(STATE_FILE)
+    return _STATE_STORE
+
+
+def load_state() -> Dict:
+    store = get_state_store()
+    state = store.load()
+    rewrite = False
+    if _order_seen(state):
+        # 예전 형식(시각 순서가 아닌 seen)은 한 번만 정렬해서 그 순서로 다시 저장
+        log("DEBUG: seen reordered by timestamp (one-time migration):", len(state["seen"]))
+        rewrite = True
+
+    if _SEEN_BACKEND == "binary":
+        seen = HashedSeen(SEEN_FILE).load()
+        legacy = state["seen"]
+        if legacy:
+            # json → binary: 문자열 키를 해시로 옮겨 seen.bin을 쓰고 state.json에서는 뺀다
+            seen.merge(legacy)
+            seen.flush()
+            log("DEBUG: seen migrated to", SEEN_FILE, f"({len(legacy)} keys)")
+            rewrite = True
+        state["seen"] = seen
+
+    if rewrite:
+        store.rewrite(state)
+    return state
+
+
+def save_state(state: Dict):
+    get_state_store().save(state)
+    seen = state.get("seen")
+    if isinstance(seen, HashedSeen):
+        seen.flush()
+
+
+def record_state_metrics(state: Dict):
+    for b in STATE_BUCKETS:
+        METRICS.set("hotdeal_state_entries", len(state.get(b, {})), bucket=b)
+    size = 0
+    for path in (STATE_FILE, JOURNAL_FILE, SEEN_FILE):
+        try:
+            size += os.path.getsize(path)
+        except OSError:
+            pass
+    METRICS.set("hotdeal_state_bytes", size)
+
+
+# ---- 다중 인스턴스(클러스터) ----
+# 여러 애드온 인스턴스가 공유 디렉터리의 SQLite(cluster.db) 하나로 게시판을 나눠 맡는다.
+#   - leases: 게시판별 담당 노드와 만료 시각. 매 사이클 갱신하고, 만료된(죽은 노드의) 게시판은 다른 노드가 가져감
+#   - claims: 알림 키(site:board:url)별 전송 기록. 보내기 전에 먼저 차지한 노드만 보냄
+# 게시판 캐시/seen 등 나머지 state는 담당 노드가 로컬에서 그대로 관리한다.
+CLUSTER_CLAIM_TTL = 7 * 86400
+CLUSTER_NODE_FORGET = 10   # 이 배수(lease)만큼 heartbeat가 없으면 노드 목록에서 제거
+
+
+class ClusterCoordinator:
+    """
+    cluster.db 기반 게시판 분배 + 알림 중복 방지.
+
+    - assign(jobs): heartbeat를 남기고, 살아 있는 노드 수로 나눈 몫(올림)만큼 게시판을 맡는다.
+      내 lease는 연장, 주인 없는/만료된 lease는 가져오고, 몫보다 많으면 남는 것은 내놓는다(다음 사이클에 다른 노드가 가져감).
+      전체가 한 트랜잭션(BEGIN IMMEDIATE)이라 두 노드가 같은 게시판을 동시에 가져가지 않음.
+    - claim(key): 키를 'pending'으로 차지. 이미 있으면 실패(다른 노드가 보냈거나 보내는 중).
+      단, lease 시간보다 오래된 pending(보내다 죽은 노드)은 다시 차지할 수 있다.
+    - finish(key, done): 보냈거나 포기했으면 'done'으로 남기고, 실패(재시도 예정)면 지워서 다음 시도에 다시 차지하게 함.
+    """
+
+    def __init__(self, path: str, node_id: str, lease_sec: float, claim_ttl: float = CLUSTER_CLAIM_TTL):
+        self.path = path
+        self.node_id = node_id
+        self.lease_sec = lease_sec
+        self.claim_ttl = claim_ttl
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        import sqlite3
+
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA busy_timeout=30000")
+        self.db.execute("CREATE TABLE IF NOT EXISTS nodes (node TEXT PRIMARY KEY, heartbeat REAL NOT NULL)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS leases (board TEXT PRIMARY KEY, node TEXT NOT NULL, expires REAL NOT NULL)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS claims (key TEXT PRIMARY KEY, node TEXT NOT NULL, state TEXT NOT NULL, ts REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS claims_ts ON claims (ts)")
+
+    def close(self):
+        self.db.close()
+
+    def assign(self, jobs: List[Dict], now: float | None = None) -> List[Dict]:
+        now = time.time() if now is None else now
+        bids = [f"{job['site']}:{job['board']}" for job in jobs]
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(
+                "INSERT INTO nodes (node, heartbeat) VALUES (?, ?) ON CONFLICT(node) DO UPDATE SET heartbeat = excluded.heartbeat",
+                (self.node_id, now),
+            )
+            db.execute("DELETE FROM nodes WHERE heartbeat < ?", (now - CLUSTER_NODE_FORGET * self.lease_sec,))
+            alive = [r[0] for r in db.execute("SELECT node FROM nodes WHERE heartbeat >= ?", (now - self.lease_sec,))]
+            leases = {r[0]: (r[1], r[2]) for r in db.execute("SELECT board, node, expires FROM leases")}
+
+            # 몫: 살아 있는 노드 수로 나눈 올림. 노드 순서대로 나머지를 배분하면 총합이 게시판 수와 맞음
+            n_alive = max(1, len(alive))
+            rank = sorted(alive).index(self.node_id) if self.node_id in alive else 0
+            target = len(bids) // n_alive + (1 if rank < len(bids) % n_alive else 0)
+
+            mine = [b for b in bids if b in leases and leases[b][0] == self.node_id and leases[b][1] > now]
+            for b in mine[target:]:
+                db.execute("DELETE FROM leases WHERE board = ? AND node = ?", (b, self.node_id))
+            mine = mine[:target]
+            for b in bids:
+                if len(mine) >= target:
+                    break
+                if b not in mine and (b not in leases or leases[b][1] <= now):
+                    mine.append(b)
+            for b in mine:
+                db.execute(
+                    "INSERT INTO leases (board, node, expires) VALUES (?, ?, ?) "
+                    "ON CONFLICT(board) DO UPDATE SET node = excluded.node, expires = excluded.expires",
+                    (b, self.node_id, now + self.lease_sec),
+                )
+            # 설정에서 빠진 게시판의 내 lease는 정리
+            for b, (node, _) in leases.items():
+                if node == self.node_id and b not in bids:
+                    db.execute("DELETE FROM leases WHERE board = ? AND node = ?", (b, self.node_id))
+            db.execute("DELETE FROM claims WHERE state = 'done' AND ts < ?", (now - self.claim_ttl,))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+        owned = set(mine)
+        METRICS.set("hotdeal_cluster_boards", len(owned))
+        METRICS.set("hotdeal_cluster_nodes", n_alive)
+        return [job for job, b in zip(jobs, bids) if b in owned]
+
+    def claim(self, key: str, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        cur = self.db.execute(
+            "INSERT INTO claims (key, node, state, ts) VALUES (?, ?, 'pending', ?) "
+            "ON CONFLICT(key) DO UPDATE SET node = excluded.node, ts = excluded.ts "
+            "WHERE claims.state = 'pending' AND (claims.node = excluded.node OR claims.ts < ?)",
+            (key, self.node_id, now, now - self.lease_sec),
+        )
+        won = cur.rowcount == 1
+        METRICS.inc("hotdeal_cluster_claims_total", result="won" if won else "lost")
+        return won
+
+    def finish(self, key: str, done: bool):
+        if done:
+            self.db.execute(
+                "UPDATE claims SET state = 'done', ts = ? WHERE key = ? AND node = ?", (time.time(), key, self.node_id)
+            )
+        else:
+            self.db.execute("DELETE FROM claims WHERE key = ? AND node = ? AND state = 'pending'", (key, self.node_id))
+
+
+_CLUSTER: ClusterCoordinator | None = None
+
+
+def configure_cluster(cfg: Dict) -> ClusterCoordinator | None:
+    """cluster_enable이면 공유 디렉터리의 cluster.db에 연결(경로/노드/lease 설정이 그대로면 기존 연결 유지)."""
+    global _CLUSTER
+    if not cfg.get("cluster_enable"):
+        if _CLUSTER is not None:
+            _CLUSTER.close()
+            _CLUSTER = None
+        return None
+
+    path = os.path.join((cfg.get("cluster_dir") or "/share/hotdeal_alarm").strip(), "cluster.db")
+    node_id = (cfg.get("cluster_node_id") or "").strip() or socket.gethostname()
+    try:
+        lease = max(1.0, float(cfg.get("cluster_lease_sec", 300) or 300))
+    except Exception:
+        lease = 300.0
+    tick = get_cycle_interval(cfg)
+    if lease < 2 * tick:
+        log(f"WARN: cluster_lease_sec({lease:.0f}) is shorter than two cycles ({tick}s each); boards may move between live nodes")
+
+    c = _CLUSTER
+    if c is not None and (c.path, c.node_id, c.lease_sec) == (path, node_id, lease):
+        return c
+    if c is not None:
+        c.close()
+    _CLUSTER = ClusterCoordinator(path, node_id, lease)
+    log(f"DEBUG: cluster mode: node={node_id}, db={path}, lease={lease:.0f}s")
+    return _CLUSTER
+
+
+def get_cluster() -> ClusterCoordinator | None:
+    return _CLUSTER
+
+
+# keep-alive 연결 풀 크기: (호스트 수, 호스트당 연결 수)
+_HTTP_POOL_SIZES: Tuple[int, int] = (16, 8)
+
+
+def _mount_pools(s: requests.Session, pool_connections: int, pool_maxsize: int):
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=False)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
 
 
 def make_requests_session() -> requests.Session:
@@ -95,16 +985,29 @@ def make_requests_session() -> requests.Session:
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "ko-KR,ko;q=0.9,en;q=0.8",
-            "Connection": "close",
         }
     )
+    _mount_pools(s, *_HTTP_POOL_SIZES)
     return s
 
 
 # 전역 세션/스크레이퍼(매 사이클 생성 금지)
+# 게시판/상세 페이지 수집과 알림 전송이 같은 세션(호스트별 keep-alive 풀)을 공유
 _GLOBAL_SESS: requests.Session | None = None
 _GLOBAL_SCRAPER = None
 
+# cloudscraper 챌린지 통과 쿠키(cf_clearance 등)와 User-Agent는 /data/cloudscraper.json에 저장해
+# 재시작/스크레이퍼 재생성 후에도 만료 전까지 그대로 쓴다(챌린지는 만료되거나 거부됐을 때만 다시 풂).
+SCRAPER_BROWSER = {"browser": "chrome", "platform": "android", "desktop": False}
+# 만료 시각이 있는 Cloudflare 쿠키가 없을 때 저장한 쿠키를 재사용할 시간(초)
+SCRAPER_CLEARANCE_TTL = 6 * 3600
+# 챌린지를 풀고도 막혔을 때 다시 풀기 전까지 cloudscraper 요청을 쉬는 시간(초)
+SCRAPER_BLOCK_BACKOFF = 600
+_CHALLENGE_MARKERS = ("cf-browser-verification", "challenge-platform", "cf_chl_", "Just a moment...", "Attention Required! | Cloudflare")
+_SCRAPER_LOCK = threading.Lock()
+_SCRAPER_COOKIE_SIG: Tuple = ()
+_SCRAPER_BLOCKED_UNTIL = 0.0
+
 
 def get_global_sess() -> requests.Session:
     global _GLOBAL_SESS
@@ -113,21 +1016,179 @@ def get_global_sess() -> requests.Session:
     return _GLOBAL_SESS
 
 
+def configure_http_pools(cfg: Dict):
+    """http_pool_connections/http_pool_maxsize가 바뀌면 전역 세션의 풀을 새로 장착."""
+    global _HTTP_POOL_SIZES
+    _, max_per_host = get_fetch_limits(cfg)
+    try:
+        pool_connections = int(cfg.get("http_pool_connections", 16) or 16)
+    except Exception:
+        pool_connections = 16
+    try:
+        pool_maxsize = int(cfg.get("http_pool_maxsize", 8) or 8)
+    except Exception:
+        pool_maxsize = 8
+    # 호스트당 동시 요청 수보다 풀이 작으면 연결을 재사용하지 못하고 버리게 됨
+    sizes = (max(1, pool_connections), max(1, pool_maxsize, max_per_host))
+    if sizes == _HTTP_POOL_SIZES:
+        return
+    _HTTP_POOL_SIZES = sizes
+    if _GLOBAL_SESS is not None:
+        old = list(_GLOBAL_SESS.adapters.values())
+        _mount_pools(_GLOBAL_SESS, *sizes)
+        for a in old:
+            try:
+                a.close()
+            except Exception:
+                pass
+    log("DEBUG: http pool sizes (hosts, per host):", sizes)
+
+
+def recycle_host_pool(sess: requests.Session, url: str) -> bool:
+    """
+    url 호스트의 연결 풀만 닫는다(다른 호스트의 keep-alive 연결은 유지).
+    다음 요청 때 해당 호스트는 새 연결로 다시 붙는다.
+    """
+    host = urlparse(url).hostname
+    try:
+        pools = sess.get_adapter(url).poolmanager.pools
+        for key in pools.keys():
+            if getattr(key, "key_host", None) == host:
+                del pools[key]
+        return True
+    except Exception as e:
+        log("WARN: recycle_host_pool failed:", url, "err=", repr(e))
+        return False
+
+
+def _cookie_sig(sc) -> Tuple:
+    return tuple(sorted((c.domain, c.name, c.value) for c in sc.cookies))
+
+
+def _load_clearance() -> Dict | None:
+    """저장된 쿠키/UA. 없거나 만료됐으면 None."""
+    try:
+        with open(SCRAPER_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or not data.get("user_agent"):
+        return None
+    if float(data.get("expires") or 0) <= time.time():
+        return None
+    return data
+
+
+def _clear_clearance():
+    try:
+        os.remove(SCRAPER_FILE)
+    except OSError:
+        pass
+
+
+def _new_scraper():
+    """새 스크레이퍼. 저장된 쿠키/UA가 유효하면 그대로 붙여서 챌린지를 다시 풀지 않게 한다."""
+    global _SCRAPER_COOKIE_SIG
+    import cloudscraper  # cloudscraper를 쓰는 게시판(퀘이사존)을 처음 받을 때 한 번만 로드
+
+    sc = cloudscraper.create_scraper(browser=SCRAPER_BROWSER)
+    saved = _load_clearance()
+    if saved:
+        now = time.time()
+        sc.headers["User-Agent"] = saved["user_agent"]
+        for c in saved.get("cookies") or []:
+            expires = c.get("expires")
+            if expires and expires <= now:
+                continue
+            sc.cookies.set(
+                c["name"],
+                c["value"],
+                domain=c.get("domain", ""),
+                path=c.get("path", "/"),
+                expires=expires,
+                secure=bool(c.get("secure")),
+            )
+        log(f"DEBUG: cloudscraper clearance restored (expires in {int(saved['expires'] - now)}s)")
+    _SCRAPER_COOKIE_SIG = _cookie_sig(sc)
+    return sc
+
+
+def save_scraper_clearance(sc):
+    """쿠키가 바뀌었으면(챌린지를 새로 풀었으면) UA와 함께 저장."""
+    global _SCRAPER_COOKIE_SIG
+    with _SCRAPER_LOCK:
+        sig = _cookie_sig(sc)
+        if sig == _SCRAPER_COOKIE_SIG:
+            return
+        _SCRAPER_COOKIE_SIG = sig
+        now = time.time()
+        cookies = [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path, "expires": c.expires, "secure": c.secure}
+            for c in sc.cookies
+        ]
+        # 만료 시각은 cf_clearance 기준(__cf_bm 같은 30분짜리 쿠키는 복원할 때 그것만 빠짐)
+        cf_expires = [c["expires"] for c in cookies if c["expires"] and c["name"] == "cf_clearance"]
+        data = {
+            "user_agent": sc.headers.get("User-Agent", ""),
+            "cookies": cookies,
+            "saved_at": now,
+            "expires": min(cf_expires) if cf_expires else now + SCRAPER_CLEARANCE_TTL,
+        }
+        try:
+            os.makedirs(os.path.dirname(SCRAPER_FILE), exist_ok=True)
+            tmp = SCRAPER_FILE + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, SCRAPER_FILE)
+            log(f"DEBUG: cloudscraper clearance saved (expires in {int(data['expires'] - now)}s)")
+        except OSError as e:
+            log("WARN: cloudscraper clearance save failed:", repr(e))
+
+
+def looks_blocked(code: int | None, text: str) -> bool:
+    """Cloudflare 챌린지/차단 페이지로 보이는지"""
+    if code in (403, 429, 503):
+        return True
+    head = (text or "")[:65536]
+    return any(m in head for m in _CHALLENGE_MARKERS)
+
+
+def _after_scraper_response(sc, res):
+    """
+    챌린지를 풀고도 차단 페이지면 저장된 쿠키를 버리고 SCRAPER_BLOCK_BACKOFF 동안 쉰다
+    (다음 시도에서 한 번만 새로 풂). 정상 응답이면 바뀐 쿠키를 저장.
+    """
+    global _GLOBAL_SCRAPER, _SCRAPER_BLOCKED_UNTIL
+    text = ""
+    if res.status_code != 200:
+        try:
+            text = res.text
+        except Exception:
+            pass
+    if res.status_code != 200 and looks_blocked(res.status_code, text):
+        with _SCRAPER_LOCK:
+            _SCRAPER_BLOCKED_UNTIL = time.time() + SCRAPER_BLOCK_BACKOFF
+            _GLOBAL_SCRAPER = None
+        _clear_clearance()
+        log(f"WARN: cloudscraper blocked (http={res.status_code}), pausing {SCRAPER_BLOCK_BACKOFF}s before solving again")
+        return
+    save_scraper_clearance(sc)
+
+
 def get_global_scraper():
     global _GLOBAL_SCRAPER
-    if _GLOBAL_SCRAPER is None:
-        _GLOBAL_SCRAPER = cloudscraper.create_scraper(
-            browser={"browser": "chrome", "platform": "android", "desktop": False}
-        )
-    return _GLOBAL_SCRAPER
+    with _SCRAPER_LOCK:
+        if _GLOBAL_SCRAPER is None:
+            _GLOBAL_SCRAPER = _new_scraper()
+        return _GLOBAL_SCRAPER
 
 
 def recreate_global_scraper():
+    """연결만 새로(저장된 쿠키/UA는 유지)"""
     global _GLOBAL_SCRAPER
-    _GLOBAL_SCRAPER = cloudscraper.create_scraper(
-        browser={"browser": "chrome", "platform": "android", "desktop": False}
-    )
-    return _GLOBAL_SCRAPER
+    with _SCRAPER_LOCK:
+        _GLOBAL_SCRAPER = _new_scraper()
+        return _GLOBAL_SCRAPER
 
 
 def recreate_global_sess():
@@ -141,32 +1202,177 @@ def recreate_global_sess():
     return _GLOBAL_SESS
 
 
-def http_get_text(url: str, use_cloudscraper: bool = False) -> str:
+# ---- 호스트별 차단기(circuit breaker) + 사이클 시간 예산 ----
+# 연속 실패가 threshold번이면 open(요청 안 함) → 기다린 뒤 half-open(요청 하나만 시험) → 성공하면 closed, 실패하면 더 길게 open.
+# 상태는 state["host_health"]에 저장해서 재시작 후에도 이어간다.
+BREAKER_BASE_BACKOFF = 30
+# 요청 timeout 기본값과, 남은 사이클 예산에 맞춰 줄일 때의 하한(남은 예산이 이보다 적으면 요청하지 않음)
+HTTP_TIMEOUT = 20.0
+HTTP_TIMEOUT_MIN = 1.0
+BREAKER_STATE_VALUE = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class HostBreakers:
+    def __init__(self, threshold: int = 3, backoff_max: float = 1800):
+        self.threshold = threshold
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict] = {}
+        self._probing: set = set()
+        self.restored = False
+
+    def configure(self, threshold: int, backoff_max: float):
+        with self._lock:
+            self.threshold = max(1, int(threshold))
+            self.backoff_max = max(BREAKER_BASE_BACKOFF, float(backoff_max))
+
+    def restore(self, saved: Dict):
+        with self._lock:
+            self._hosts = {h: dict(v) for h, v in (saved or {}).items() if isinstance(v, dict)}
+            self.restored = True
+        opened = {h: int(v.get("open_until", 0) - time.time()) for h, v in self._hosts.items() if v.get("state") != "closed"}
+        if opened:
+            log("DEBUG: breaker state restored (retry in sec):", opened)
+
+    def snapshot(self) -> Dict:
+        # 정상(closed, 실패 0) 호스트는 저장하지 않음
+        with self._lock:
+            return {h: dict(v) for h, v in self._hosts.items() if v.get("state") != "closed" or v.get("fails")}
+
+    def blocked(self, host: str) -> bool:
+        """읽기 전용 확인: open이고 아직 기다리는 중이거나, half-open 시험 요청이 진행 중이면 True."""
+        with self._lock:
+            h = self._hosts.get(host)
+            if not h or h.get("state") == "closed":
+                return False
+            return host in self._probing or time.time() < float(h.get("open_until", 0))
+
+    def allow(self, host: str) -> bool:
+        """요청해도 되면 True. open 대기가 끝난 호스트는 half-open으로 바꾸고 이 요청 하나만 시험으로 허용."""
+        with self._lock:
+            h = self._hosts.get(host)
+            if not h or h.get("state") == "closed":
+                return True
+            if host in self._probing or time.time() < float(h.get("open_until", 0)):
+                return False
+            h["state"] = "half_open"
+            self._probing.add(host)
+        log("DEBUG: breaker half-open, probing:", host)
+        METRICS.set("hotdeal_breaker_state", BREAKER_STATE_VALUE["half_open"], host=host)
+        return True
+
+    def release(self, host: str):
+        """결과를 세지 않고 half-open 시험 요청만 끝냄(다음 요청이 다시 시험)."""
+        with self._lock:
+            self._probing.discard(host)
+
+    def record(self, host: str, ok: bool):
+        with self._lock:
+            self._probing.discard(host)
+            h = self._hosts.setdefault(host, {"state": "closed", "fails": 0, "trips": 0, "open_until": 0})
+            prev = h.get("state", "closed")
+            if ok:
+                if prev == "closed" and not h.get("fails"):
+                    return
+                h.update(state="closed", fails=0, trips=0, open_until=0)
+                msg = f"DEBUG: breaker closed: {host}" if prev != "closed" else None
+            else:
+                h["fails"] = int(h.get("fails", 0)) + 1
+                # 이미 open이면(열리기 전에 나간 요청의 실패) 대기 시간을 다시 늘리지 않음
+                if prev == "open" or (prev == "closed" and h["fails"] < self.threshold):
+                    return
+                h["trips"] = int(h.get("trips", 0)) + 1
+                wait = min(self.backoff_max, BREAKER_BASE_BACKOFF * 2 ** (h["trips"] - 1))
+                h.update(state="open", open_until=time.time() + wait)
+                msg = f"WARN: breaker open: {host} (fails={h['fails']}, retry in {wait:.0f}s)"
+            state = h["state"]
+        if msg:
+            log(msg)
+        METRICS.set("hotdeal_breaker_state", BREAKER_STATE_VALUE[state], host=host)
+
+
+BREAKERS = HostBreakers()
+
+# 이번 사이클 마감 시각(time.monotonic 기준, 0이면 제한 없음). run_cycle()이 시작할 때 정함
+_CYCLE_DEADLINE = 0.0
+
+
+def set_cycle_deadline(budget_sec: float):
+    global _CYCLE_DEADLINE
+    _CYCLE_DEADLINE = time.monotonic() + budget_sec if budget_sec and budget_sec > 0 else 0.0
+
+
+def cycle_time_left() -> float | None:
+    """이번 사이클 남은 예산(초). 제한이 없으면 None."""
+    if not _CYCLE_DEADLINE:
+        return None
+    return _CYCLE_DEADLINE - time.monotonic()
+
+
+def host_available(url: str) -> bool:
+    """예산이 남아 있고 그 호스트 차단기가 막혀 있지 않으면 True(요청하지 않고 확인만)."""
+    left = cycle_time_left()
+    if left is not None and left <= 0:
+        return False
+    return not BREAKERS.blocked(urlparse(url).netloc)
+
+
+def http_get(url: str, use_cloudscraper: bool = False, headers: Dict | None = None, stream: bool = False):
+    """
+    GET 요청(세션 오류 시 해당 호스트 풀만 버리고 1회 재시도). 실패하면 None.
+    호스트 차단기가 열려 있거나 사이클 예산을 다 썼으면 요청하지 않고 None.
+    timeout은 남은 예산을 넘지 않게 줄이고, 시간 초과는 다시 시도하지 않는다(같은 호스트가 또 느릴 가능성이 큼).
+    예산 때문에 줄인 timeout으로 실패한 요청은 호스트 차단기 실패로 세지 않는다(호스트가 아니라 예산 탓일 수 있음).
+    """
+    host = urlparse(url).netloc
+    left = cycle_time_left()
+    if left is not None and left < HTTP_TIMEOUT_MIN:
+        METRICS.inc("hotdeal_budget_skips_total", kind="request")
+        log("DEBUG: cycle budget used up, skip:", url)
+        return None
+    if use_cloudscraper and time.time() < _SCRAPER_BLOCKED_UNTIL:
+        log("DEBUG: cloudscraper paused after block, skip:", url)
+        return None
+    if not BREAKERS.allow(host):
+        METRICS.inc("hotdeal_budget_skips_total", kind="breaker")
+        log("DEBUG: breaker open, skip:", url)
+        return None
+
+    timeout = HTTP_TIMEOUT if left is None else min(HTTP_TIMEOUT, left)
+    res = _http_get_once(url, use_cloudscraper, headers, stream, timeout)
+    if res is None and timeout < HTTP_TIMEOUT:
+        BREAKERS.release(host)
+        return None
+    # 5xx/429나 응답 없음은 호스트 실패로 셈(403 등 차단은 cloudscraper 쪽 backoff가 따로 처리)
+    BREAKERS.record(host, res is not None and res.status_code < 500 and res.status_code != 429)
+    return res
+
+
+def _http_get_once(url: str, use_cloudscraper: bool, headers: Dict | None, stream: bool, timeout: float):
     try:
         if use_cloudscraper:
             sc = get_global_scraper()
-            res = sc.get(url, timeout=20)
-        else:
-            sess = get_global_sess()
-            res = sess.get(url, timeout=20)
-        
-        # 뽐뿌일 경우 인코딩을 강제로 euc-kr로 설정해주는 로직 추가
-        if "ppomppu.co.kr" in url:
-            res.encoding = 'euc-kr'
-        else:
-            res.encoding = res.apparent_encoding # 그 외엔 자동 추측
-            
-        return res.text
+            res = sc.get(url, timeout=timeout, headers=headers)
+            _after_scraper_response(sc, res)
+            return res
+        sess = get_global_sess()
+        return sess.get(url, timeout=timeout, headers=headers, stream=stream)
+
+    except requests.exceptions.Timeout as e:
+        log("WARN: http_get_text timeout:", url, "err=", repr(e))
+        return None
 
     except (requests.exceptions.SSLError, requests.exceptions.ConnectionError, OSError) as e:
         log("WARN: http_get_text session error:", url, "err=", repr(e))
         time.sleep(1)
         try:
-            sess = recreate_global_sess()
-            return sess.get(url, timeout=20).text
+            sess = get_global_scraper() if use_cloudscraper else get_global_sess()
+            if not recycle_host_pool(sess, url) and not use_cloudscraper:
+                sess = recreate_global_sess()
+            return sess.get(url, timeout=timeout, headers=headers, stream=stream and not use_cloudscraper)
         except Exception as e2:
             log("WARN: http_get_text retry failed:", url, "err=", repr(e2))
-            return ""
+            return None
 
     except Exception as e:
         log("WARN: http_get_text failed:", url, "err=", repr(e))
@@ -174,17 +1380,263 @@ def http_get_text(url: str, use_cloudscraper: bool = False) -> str:
             time.sleep(1)
             try:
                 sc = recreate_global_scraper()
-                return sc.get(url, timeout=20).text
+                res = sc.get(url, timeout=timeout, headers=headers)
+                _after_scraper_response(sc, res)
+                return res
             except Exception as e2:
                 log("WARN: http_get_text cloudscraper retry failed:", url, "err=", repr(e2))
-                return ""
+                return None
+        return None
+
+
+def decode_response(url: str, res) -> str:
+    # 뽐뿌일 경우 인코딩을 강제로 euc-kr로 설정해주는 로직 추가
+    if "ppomppu.co.kr" in url:
+        res.encoding = 'euc-kr'
+    else:
+        res.encoding = res.apparent_encoding # 그 외엔 자동 추측
+    return res.text
+
+
+def http_get_text(url: str, use_cloudscraper: bool = False, headers: Dict | None = None) -> str:
+    res = http_get(url, use_cloudscraper=use_cloudscraper, headers=headers)
+    if res is None:
+        return ""
+    try:
+        return decode_response(url, res)
+    except Exception as e:
+        log("WARN: http_get_text decode failed:", url, "err=", repr(e))
         return ""
 
 
-def trim_state_to_firstpage(state: Dict, keep_keys: List[str], keep_factor: float, keep_min: int):
+def _raw_bytes(res) -> int:
+    """소켓에서 실제로 읽은 바이트 수(압축 상태 기준)"""
+    try:
+        return int(res.raw.tell())
+    except Exception:
+        return len(res.content or b"")
+
+
+def _response_charset(url: str, res) -> str:
+    if "ppomppu.co.kr" in url:
+        return "euc-kr"
+    m = re.search(r"charset=([\w-]+)", res.headers.get("Content-Type", ""), re.IGNORECASE)
+    return m.group(1) if m else "utf-8"
+
+
+def _board_page_result(url: str, res) -> Dict:
+    try:
+        text = decode_response(url, res)
+    except Exception as e:
+        log("WARN: board page decode failed:", url, "err=", repr(e))
+        return {"status": "error", "text": ""}
+
+    return {
+        "status": "ok",
+        "code": res.status_code,
+        "text": text,
+        "hash": hashlib.sha1(res.content).hexdigest(),
+        "etag": res.headers.get("ETag", ""),
+        "last_modified": res.headers.get("Last-Modified", ""),
+        "bytes": _raw_bytes(res),
+    }
+
+
+def _stream_board_page(url: str, res, site: str, board: str, is_known: Callable[[Dict], bool], stop_after: int, cache: Dict) -> Dict:
+    """
+    목록 페이지를 조각 단위로 읽으면서 목록 파서를 이어서 적용한다(final=False: 확정된 매치만).
+    최신 글부터 나열되므로 이미 본 글이 stop_after개 연속으로 나오면 나머지는 읽지 않고 연결을 끊는다.
+    반환값은 _board_page_result()와 같고, items(파싱 결과)/partial/bytes_saved가 추가된다.
+    """
+    parser = board_parser(site, board)
+    decoder = codecs.getincrementaldecoder(_response_charset(url, res))(errors="replace")
+    digest = hashlib.sha1()
+
+    items: List[Dict] = []
+    buf = ""
+    scan_from = 0
+    skip_first = site == "ppomppu"
+    known_run = 0
+    stopped = False
+
+    def consume(final: bool) -> bool:
+        nonlocal scan_from, skip_first, known_run
+        for m in parser.finditer(buf, scan_from, final=final):
+            scan_from = m.end()
+            if skip_first:
+                skip_first = False
+                continue
+            it = board_item(site, board, m)
+            items.append(it)
+            known_run = known_run + 1 if is_known(it) else 0
+            if stop_after > 0 and known_run >= stop_after:
+                return True
+        return False
+
+    try:
+        for chunk in res.iter_content(chunk_size=16384):
+            digest.update(chunk)
+            buf += decoder.decode(chunk)
+            if consume(False):
+                stopped = True
+                break
+        if not stopped:
+            buf += decoder.decode(b"", final=True)
+            consume(True)
+    except Exception as e:
+        log("WARN: board page stream failed:", url, "err=", repr(e))
+        res.close()
+        return {"status": "error", "text": ""}
+
+    read = _raw_bytes(res)
+    res.close()
+
+    result = {
+        "status": "ok",
+        "code": res.status_code,
+        "text": "",
+        "items": items,
+        "partial": stopped,
+        "etag": res.headers.get("ETag", ""),
+        "last_modified": res.headers.get("Last-Modified", ""),
+        "bytes": read,
+        "bytes_saved": 0,
+    }
+    if stopped:
+        # 중간에 끊었으므로 본문 해시는 비교용으로 쓰지 않음
+        result["hash"] = ""
+        try:
+            total = int(res.headers.get("Content-Length") or 0)
+        except ValueError:
+            total = 0
+        total = total or int(cache.get("full_bytes") or 0)
+        result["bytes_saved"] = max(0, total - read)
+    else:
+        result["hash"] = digest.hexdigest()
+    return result
+
+
+def fetch_board_page(
+    url: str,
+    use_cloudscraper: bool,
+    cache: Dict,
+    site: str = "",
+    board: str = "",
+    is_known: Callable[[Dict], bool] | None = None,
+    stop_after: int = 0,
+) -> Dict:
+    """
+    게시판 목록 페이지를 조건부 GET으로 받아온다.
+    cache: state["board_cache"][게시판]의 사본(etag/last_modified/hash/items)
+    is_known이 주어지면(스트리밍 모드, cloudscraper 제외) _stream_board_page()로 읽는다.
+    반환 status:
+      - "not_modified": 304 응답
+      - "ok": 본문 수신(hash는 원본 바이트 기준)
+      - "error": 요청 실패
+    """
+    headers = {}
+    # 이전 목록(items)이 있어야 304/동일 본문일 때 재사용할 수 있음
+    if isinstance(cache.get("items"), list):
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+
+    stream = is_known is not None and not use_cloudscraper and board_parser(site, board) is not None
+    res = http_get(url, use_cloudscraper=use_cloudscraper, headers=headers or None, stream=stream)
+    if res is None:
+        return {"status": "error", "text": ""}
+
+    if res.status_code == 304 and headers:
+        res.close()
+        return {"status": "not_modified", "text": ""}
+
+    if stream and res.status_code == 200:
+        return _stream_board_page(url, res, site, board, is_known, stop_after, cache)
+
+    return _board_page_result(url, res)
+
+
+# seen은 '처음 본(알림 보낸) 시각' 순서(오래된 것 → 최근)로 유지되는 dict.
+# 표시할 때 pop 후 다시 넣어 항상 맨 뒤에 붙이므로, 정리는 앞에서부터 지우기만 하면 됨(정렬 불필요).
+# 저장소(json/journal)도 이 순서 그대로 쓰고 읽는다.
+
+
+def _seen_ts(v) -> float:
+    # 예전 데이터의 True 등 시각이 아닌 값은 가장 오래된 것(0)으로 취급
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        return 0.0
+    return float(v)
+
+
+def seen_mark(state: Dict, key: str, ts: float | None = None):
+    """key를 지금(ts) 본 것으로 표시하고 seen 맨 뒤(최근)로 옮긴다."""
+    seen = state["seen"]
+    seen.pop(key, None)
+    seen[key] = time.time() if ts is None else ts
+
+
+def _order_seen(state: Dict) -> bool:
+    """seen이 시각 순서가 아니면(예전 형식) 한 번 정렬. 정렬했으면 True. 이미 순서대로면 O(n) 확인만."""
+    seen = state.get("seen")
+    if not isinstance(seen, dict) or not seen:
+        return False
+    prev = -1.0
+    for v in seen.values():
+        ts = _seen_ts(v)
+        if ts < prev:
+            break
+        prev = ts
+    else:
+        return False
+    state["seen"] = dict(sorted(seen.items(), key=lambda kv: _seen_ts(kv[1])))
+    return True
+
+
+def trim_seen(state: Dict, limit: int, ttl_sec: float = 0, keep: set | None = None, now: float | None = None) -> int:
+    """
+    seen 앞(오래된 쪽)부터 지운다. 지운 개수 반환.
+    - 개수가 limit를 넘는 만큼
+    - ttl_sec > 0이면 그보다 오래된 것
+    keep(현재 첫 페이지 키)에 있는 항목은 지우지 않고 지금 시각으로 다시 표시(맨 뒤로)해서
+    첫 페이지에 오래 남아 있는 글이 다시 알림되지 않게 한다.
+    """
+    seen = state.get("seen")
+    if not isinstance(seen, (dict, HashedSeen)) or not seen:
+        return 0
+    if keep and isinstance(seen, HashedSeen):
+        keep = {seen_hash(k) for k in keep}
+    now = time.time() if now is None else now
+    cutoff = now - ttl_sec if ttl_sec and ttl_sec > 0 else None
+
+    # 다시 표시하는 keep 항목은 개수를 줄이지 않으므로 excess는 실제로 지운 개수로만 셈(정리 후 limit 이하)
+    excess = len(seen) - max(0, int(limit))
+    victims: List[str] = []
+    refresh: List[str] = []
+    for k, v in seen.items():
+        over = excess > 0
+        if not over and (cutoff is None or _seen_ts(v) >= cutoff):
+            break
+        if keep and k in keep:
+            refresh.append(k)
+        else:
+            victims.append(k)
+            if over:
+                excess -= 1
+
+    for k in victims:
+        del seen[k]
+    for k in refresh:
+        seen_mark(state, k, now)
+    return len(victims)
+
+
+def trim_state_to_firstpage(
+    state: Dict, keep_keys: List[str], keep_factor: float, keep_min: int, ttl_sec: float = 0
+):
     """
-    seen: LRU처럼 최근 N개만 유지 (N = max(keep_min, ceil(len(keep_keys) * keep_factor)))
-          값은 True 또는 timestamp(float) 둘 다 허용.
+    seen: 최근 N개만 유지 (N = max(keep_min, ceil(len(keep_keys) * keep_factor))), ttl_sec > 0이면 그보다 오래된 것도 정리.
+          시각 순서로 유지되므로 앞에서부터 지우기만 함(지우는 개수에 비례, 정렬 없음).
     mall_cache/fail_count: 기존처럼 keep_keys 기반으로만 정리(용량 관리 목적).
     """
     # N 계산은 기존 설정(keep_factor/keep_min/len(keep_keys))을 그대로 활용
@@ -201,28 +1653,13 @@ def trim_state_to_firstpage(state: Dict, keep_keys: List[str], keep_factor: floa
     base = len(keep_keys) if keep_keys else 0
     limit = max(km, int(math.ceil(base * max(1.0, factor))))
 
-    # 1) seen: timestamp 기반 LRU trim
-    seen = state.get("seen")
-    if isinstance(seen, dict) and seen:
-        # 값이 True인 과거 데이터도 섞여 있을 수 있으니 timestamp로 정규화
-        # - 숫자면 그대로 사용
-        # - True/기타면 0으로 취급(가장 오래된 것으로 간주되어 먼저 정리됨)
-        items = []
-        for k, v in seen.items():
-            ts = v if isinstance(v, (int, float)) else 0
-            items.append((k, ts))
-
-        # 최신 순으로 limit개 유지
-        items.sort(key=lambda x: x[1], reverse=True)
-        keep_seen = set(k for k, _ in items[:limit])
-
-        for k in list(seen.keys()):
-            if k not in keep_seen:
-                del seen[k]
+    keep = set(keep_keys) if keep_keys else set()
+
+    # 1) seen: 오래된 쪽(앞)부터 정리
+    trim_seen(state, limit, ttl_sec=ttl_sec, keep=keep)
 
     # 2) mall_cache/fail_count: 기존 정책 유지(현재 페이지 기반)
     # keep_keys가 없으면 과감히 비움(메모리 보호)
-    keep = set(keep_keys) if keep_keys else set()
 
     for bucket in ("mall_cache", "fail_count"):
         d = state.get(bucket)
@@ -234,175 +1671,1004 @@ def trim_state_to_firstpage(state: Dict, keep_keys: List[str], keep_factor: floa
 
 
 
-def scrape_board_items(cfg: Dict) -> List[Dict]:
-    out: List[Dict] = []
-
-    def safe_get_text(url: str) -> str:
-        return http_get_text(url, use_cloudscraper=False) or ""
+def get_board_jobs(cfg: Dict) -> List[Dict]:
+    """
+    활성화된 게시판 목록을 고정된 순서(사이트 → 게시판)로 반환.
+    결과 순서가 곧 scrape_board_items()의 출력 순서이므로 순서를 바꾸지 말 것.
+    """
+    jobs: List[Dict] = []
+
+    def add(site: str, board: str, url: str, cloud: bool = False):
+        if cfg.get(f"use_site_{site}") and cfg.get(f"use_board_{site}_{board}"):
+            jobs.append({"site": site, "board": board, "url": url, "cloud": cloud})
+
+    for board in ["ppomppu", "ppomppu4", "ppomppu8", "money"]:
+        add("ppomppu", board, f"https://www.ppomppu.co.kr/zboard/zboard.php?id={board}")
+    add("clien", "allsell", "https://www.clien.net/service/group/allsell")
+    add("clien", "jirum", "https://www.clien.net/service/board/jirum")
+    for board in ["1020", "600004"]:
+        add("ruriweb", board, f"https://bbs.ruliweb.com/market/board/{board}")
+    add("coolenjoy", "jirum", "https://coolenjoy.net/bbs/jirum")
+    add("quasarzone", "qb_saleinfo", "https://quasarzone.com/bbs/qb_saleinfo", cloud=True)
+    return jobs
+
+
+def board_page_url(job: Dict, page: int) -> str:
+    """게시판 목록 page번째(1부터) 페이지 주소. 클리앙은 po=0부터, 나머지는 page=N."""
+    url = job["url"]
+    if page <= 1:
+        return url
+    if job["site"] == "clien":
+        return f"{url}?po={page - 1}"
+    return f"{url}{'&' if '?' in url else '?'}page={page}"
+
+
+# 호스트별 동시 요청 제한(프로세스 전역, 게시판/상세 페이지 수집이 함께 공유)
+_HOST_SEMAPHORES: Dict[str, threading.BoundedSemaphore] = {}
+_HOST_SEMAPHORES_LOCK = threading.Lock()
+
+
+def _host_semaphore(url: str, limit: int) -> threading.BoundedSemaphore:
+    host = urlparse(url).netloc.lower()
+    key = f"{host}/{limit}"
+    with _HOST_SEMAPHORES_LOCK:
+        sem = _HOST_SEMAPHORES.get(key)
+        if sem is None:
+            sem = threading.BoundedSemaphore(limit)
+            _HOST_SEMAPHORES[key] = sem
+        return sem
+
+
+def fetch_many(jobs: List[Tuple[str, Callable[[], Any]]], max_workers: int, max_per_host: int) -> List[Any]:
+    """
+    (url, fn) 목록을 스레드 풀에서 동시에 실행하고 결과를 jobs 순서 그대로 반환.
+    - max_workers: 전체 동시 실행 수
+    - max_per_host: 같은 호스트로 동시에 나가는 요청 수
+    fn에서 예외가 나면 해당 결과는 None.
+    """
+    if not jobs:
+        return []
 
-    def safe_cloud_get_text(url: str) -> str:
-        return http_get_text(url, use_cloudscraper=True) or ""
+    per_host = max(1, int(max_per_host))
 
-    # ppomppu (최상단 1개 스킵)
-    if cfg.get("use_site_ppomppu"):
-        boards = ["ppomppu", "ppomppu4", "ppomppu8", "money"]
-        ppomppu_regex = r'title[\"\'] href=\"(?P<url>view\.php.+?)\"\s*>.+>(?P<title>.+)</span></a>'
-        for board in boards:
-            if not cfg.get(f"use_board_ppomppu_{board}"):
-                continue
+    def run(url: str, fn: Callable[[], Any]):
+        with _host_semaphore(url, per_host):
+            try:
+                return fn()
+            except Exception as e:
+                log("WARN: fetch job failed:", url, "err=", repr(e))
+                return None
+
+    workers = max(1, min(int(max_workers), len(jobs)))
+    if workers == 1:
+        return [run(url, fn) for url, fn in jobs]
+
+    # 호스트별로 돌아가며(round-robin) 넣는다. jobs 순서 그대로 넣으면 한 호스트 작업이 풀을 다 차지하고
+    # 그 호스트 semaphore에서 기다리는 동안 다른 호스트 작업이 큐에서 놀게 됨(head-of-line blocking)
+    by_host: Dict[str, List[int]] = {}
+    for i, (url, _) in enumerate(jobs):
+        by_host.setdefault(urlparse(url).netloc, []).append(i)
+    order = [i for group in zip_longest(*by_host.values()) for i in group if i is not None]
+
+    futures: List[Any] = [None] * len(jobs)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as ex:
+        for i in order:
+            futures[i] = ex.submit(run, *jobs[i])
+        return [f.result() for f in futures]
+
+
+def get_fetch_limits(cfg: Dict) -> Tuple[int, int]:
+    try:
+        max_workers = int(cfg.get("fetch_max_workers", 4) or 4)
+    except Exception:
+        max_workers = 4
+    try:
+        max_per_host = int(cfg.get("fetch_max_per_host", 2) or 2)
+    except Exception:
+        max_per_host = 2
+    return max(1, max_workers), max(1, max_per_host)
 
-            url = f"https://www.ppomppu.co.kr/zboard/zboard.php?id={board}"
-            text = safe_get_text(url)
-            if not text:
-                continue
 
-            skip_first = True
-            for m in re.finditer(ppomppu_regex, text, re.MULTILINE):
-                if skip_first:
-                    skip_first = False
-                    continue
-                out.append({"site": "ppomppu", "board": board, "title": m.group("title"), "url": m.group("url")})
+def _stable_end(buf: str, min_chars: int = 4096, min_lines: int = 8) -> int:
+    """
+    스트리밍 중인 버퍼에서 '뒤에 올 내용과 상관없이 매치가 확정되는' 위치.
+    끝에서 min_chars 글자 + min_lines 줄 앞까지만 확정으로 본다(목록 정규식은 몇 줄 안에서 끝남).
+    """
+    end = len(buf) - min_chars
+    for _ in range(min_lines):
+        if end <= 0:
+            return 0
+        end = buf.rfind("\n", 0, end)
+    return max(0, end)
 
-    # clien
-    if cfg.get("use_site_clien"):
-        for board in ["allsell", "jirum"]:
-            if not cfg.get(f"use_board_clien_{board}"):
-                continue
-            if board == "allsell":
-                regex = r'class=\"list_subject\" href=\"(?P<url>.+?)\" .+\s+.+\s+.+?data-role=\"list-title-text\"\stitle=\"(?P<title>.+?)\"'
-                url = f"https://www.clien.net/service/group/{board}"
-            else:
-                regex = r'href=\"(?P<url>/service/board/jirum/\d+)[^\"]*\"[^>]*>[^<]*<span[^>]*class=\"subject_fixed\"[^>]*>(?P<title>[^<]+)</span>'
-                url = f"https://www.clien.net/service/board/{board}"
 
-            text = safe_get_text(url)
-            if not text:
-                continue
-            for m in re.finditer(regex, text, re.MULTILINE):
-                out.append({"site": "clien", "board": board, "title": m.group("title"), "url": m.group("url")})
+def _window_end(text: str, start: int, lines: int, max_chars: int) -> Tuple[int, bool]:
+    """
+    start가 있는 줄 + 그 뒤로 내용이 있는(공백만 있는 줄 제외) 줄 lines개의 끝 위치.
+    (끝 위치, 완결 여부) — 텍스트가 먼저 끝나면 완결 아님. max_chars를 넘으면 거기서 자름.
+    """
+    limit = start + max_chars
+    eol = text.find("\n", start)
+    count = 0
+    while True:
+        if eol == -1:
+            return min(len(text), limit), len(text) >= limit
+        if eol >= limit:
+            return limit, True
+        if count >= lines:
+            return eol, True
+        ls = eol + 1
+        eol = text.find("\n", ls)
+        line = text[ls:] if eol == -1 else text[ls:eol]
+        if line and not line.isspace():
+            count += 1
 
-    # ruriweb
-    if cfg.get("use_site_ruriweb"):
-        for board in ["1020", "600004"]:
-            if not cfg.get(f"use_board_ruriweb_{board}"):
-                continue
-            url = f"https://bbs.ruliweb.com/market/board/{board}"
-            text = safe_get_text(url)
-            if not text:
-                continue
-            regex = r'href=\"(?P<url>/market/board/\d+/read/\d+)[^\"]*\"[^>]*>(?P<title>[^<]+)</a>'
-            for m in re.finditer(regex, text, re.MULTILINE):
-                out.append({"site": "ruriweb", "board": board, "title": m.group("title"), "url": m.group("url")})
-
-    # coolenjoy
-    if cfg.get("use_site_coolenjoy"):
-        boards = ["jirum"]
-        for board in boards:
-            if not cfg.get(f"use_board_coolenjoy_{board}"):
-                continue
-            regex = r'<td class=\"td_subject\">\s+<a href=\"(?P<url>.+)\">\s+(?:<font color=.+?>)?(?P<title>.+?)(?:</font>)?\s+<span class=\"sound_only\"'
-            url = f"https://coolenjoy.net/bbs/{board}"
-            text = safe_get_text(url)
-            if not text:
+
+class _ListMatch:
+    """re.Match 대신 쓰는 최소 결과(group/end만 지원)"""
+
+    __slots__ = ("_groups", "_end")
+
+    def __init__(self, url: str, title: str, end: int):
+        self._groups = {"url": url, "title": title}
+        self._end = end
+
+    def group(self, name: str) -> str:
+        return self._groups[name]
+
+    def end(self) -> int:
+        return self._end
+
+
+class RegexListParser:
+    """이미 선형으로 동작하는 목록 정규식(부정 문자 클래스만 사용)은 그대로 쓴다."""
+
+    def __init__(self, pattern: str):
+        self.pattern = re.compile(pattern, re.MULTILINE)
+
+    def finditer(self, text: str, pos: int = 0, final: bool = True):
+        # 스트리밍 중(final=False)에는 뒤 내용에 따라 바뀔 수 없는 매치만 돌려줌
+        limit = len(text) if final else _stable_end(text)
+        for m in self.pattern.finditer(text, pos):
+            if m.end() > limit:
+                return
+            yield m
+
+
+class WindowedListParser:
+    """
+    백트래킹이 많은 목록 정규식용.
+    앵커(정규식 앞부분)로 후보 위치만 찾고, 원래 정규식은 앵커가 있는 줄부터
+    내용 있는 줄 lines개까지(최대 max_chars 글자)로 잘라낸 구간에서만 시도한다.
+    lines는 정규식 안에서 줄바꿈을 넘을 수 있는 \\s 구간 수 이상이어야 원래 결과와 같다
+    ('.'은 줄바꿈을 넘지 못하므로 매치는 그 안에서 끝남).
+    페이지 크기와 관계없이 앵커 하나당 비용이 구간 크기로 제한되므로 전체는 선형.
+    required(정규식 끝부분의 고정 문자열)가 구간에 없으면 정규식을 돌리지 않는다.
+    """
+
+    def __init__(self, anchor: str, pattern: str, lines: int, required: str = "", max_chars: int = 16384):
+        self.anchor = re.compile(anchor)
+        self.pattern = re.compile(pattern, re.MULTILINE)
+        self.lines = lines
+        self.required = required
+        self.max_chars = max_chars
+
+    def finditer(self, text: str, pos: int = 0, final: bool = True):
+        while True:
+            a = self.anchor.search(text, pos)
+            if not a:
+                return
+            start = a.start()
+            end, complete = _window_end(text, start, self.lines, self.max_chars)
+            if not complete and not final:
+                # 구간이 아직 다 도착하지 않음(스트리밍)
+                return
+            if self.required and text.find(self.required, a.end(), end) == -1:
+                m = None
+            else:
+                m = self.pattern.match(text, start, end)
+            if m:
+                yield m
+                pos = m.end()
+            else:
+                pos = start + 1
+
+
+class PpomppuListParser:
+    """
+    뽐뿌 목록: title["'] href="(?P<url>view\\.php.+?)"\\s*>.+>(?P<title>.+)</span></a>
+    와 같은 결과를 정규식 백트래킹 없이 계산한다.
+    - url: 같은 줄에서 view.php 뒤 첫 번째(안 되면 다음) '"' 까지, 그 뒤 공백* 다음이 '>'
+    - 그 줄에서 마지막 '</span></a>' 앞, 그보다 두 글자 이상 앞선 마지막 '>' 다음부터가 title
+    뒤쪽 후보일수록 조건이 더 어려워지므로 한 후보가 실패하면 그 줄의 마지막 '"'만 더 보고,
+    앵커가 실패하면 같은 줄의 다음 앵커도 실패하므로 다음 줄로 넘어간다(줄 길이에 선형).
+    """
+
+    _anchor = re.compile(r'title[\"\'] href=\"view\.php')
+
+    def finditer(self, text: str, pos: int = 0, final: bool = True):
+        n = len(text)
+        while True:
+            a = self._anchor.search(text, pos)
+            if not a:
+                return
+            u0 = a.end() - len("view.php")
+            eol = text.find("\n", u0)
+            if eol == -1:
+                if not final:
+                    return
+                eol = n
+
+            found = None
+            k = text.find('"', u0 + len("view.php") + 1, eol)
+            while k != -1:
+                j = k + 1
+                while j < n and text[j].isspace():
+                    j += 1
+                if j >= n and not final:
+                    return
+                if j < n and text[j] == ">":
+                    q = j + 1
+                    le = text.find("\n", q)
+                    if le == -1:
+                        if not final:
+                            return
+                        le = n
+                    e = text.rfind("</span></a>", q, le)
+                    if e != -1:
+                        g = text.rfind(">", q + 1, e - 1)
+                        if g != -1:
+                            found = _ListMatch(text[u0:k], text[g + 1:e], e + len("</span></a>"))
+                            break
+                    if q <= eol:
+                        # 같은 줄 안의 더 뒤 후보도 실패함. 공백이 줄을 넘을 수 있는 마지막 '"'만 남음
+                        last = text.rfind('"', k + 1, eol)
+                        k = last if last > k else -1
+                        continue
+                k = text.find('"', k + 1, eol)
+
+            if found is not None:
+                yield found
+                pos = found.end()
+            else:
+                pos = max(a.start() + 1, eol)
+
+
+# 게시판 목록 파서: (사이트, 게시판) → 없으면 (사이트, None)
+_BOARD_PARSERS = {
+    ("ppomppu", None): PpomppuListParser(),
+    ("clien", "allsell"): WindowedListParser(
+        r'class=\"list_subject\" href=\"',
+        r'class=\"list_subject\" href=\"(?P<url>.+?)\" .+\s+.+\s+.+?data-role=\"list-title-text\"\stitle=\"(?P<title>.+?)\"',
+        lines=3,
+        required='data-role="list-title-text"',
+    ),
+    ("clien", None): RegexListParser(
+        r'href=\"(?P<url>/service/board/jirum/\d+)[^\"]*\"[^>]*>[^<]*<span[^>]*class=\"subject_fixed\"[^>]*>(?P<title>[^<]+)</span>'
+    ),
+    ("ruriweb", None): RegexListParser(
+        r'href=\"(?P<url>/market/board/\d+/read/\d+)[^\"]*\"[^>]*>(?P<title>[^<]+)</a>'
+    ),
+    ("coolenjoy", None): WindowedListParser(
+        r'<td class=\"td_subject\">',
+        r'<td class=\"td_subject\">\s+<a href=\"(?P<url>.+)\">\s+(?:<font color=.+?>)?(?P<title>.+?)(?:</font>)?\s+<span class=\"sound_only\"',
+        lines=3,
+        required='<span class="sound_only"',
+    ),
+    ("quasarzone", None): WindowedListParser(
+        r'<p class=\"tit\">',
+        r'<p class=\"tit\">\s+<a href=\"(?P<url>.+)\"\s+class=.+>\s+.+\s+(?:<span class=\"ellipsis-with-reply-cnt\">)?(?P<title>.+?)(?:</span>)',
+        lines=4,
+        required="</span>",
+    ),
+}
+
+
+def board_parser(site: str, board: str):
+    return _BOARD_PARSERS.get((site, board)) or _BOARD_PARSERS.get((site, None))
+
+
+def board_item(site: str, board: str, m) -> Dict:
+    u = m.group("url")
+    # 쿨엔조이/퀘이사존은 목록 단계에서 절대 주소로 저장
+    if site in ("coolenjoy", "quasarzone") and u.startswith("/"):
+        u = get_url_prefix(site) + u
+    return {"site": site, "board": board, "title": m.group("title"), "url": u}
+
+
+def parse_board_items(site: str, board: str, text: str) -> List[Dict]:
+    out: List[Dict] = []
+    if not text:
+        return out
+
+    parser = board_parser(site, board)
+    if parser is None:
+        return out
+
+    # ppomppu (최상단 1개 스킵)
+    skip_first = site == "ppomppu"
+    t0 = time.perf_counter()
+    try:
+        for m in parser.finditer(text):
+            if skip_first:
+                skip_first = False
                 continue
-            for m in re.finditer(regex, text, re.MULTILINE):
-                u = m.group("url")
-                out.append(
-                    {
-                        "site": "coolenjoy",
-                        "board": board,
-                        "title": m.group("title"),
-                        "url": "https://coolenjoy.net" + u if u.startswith("/") else u,
-                    }
-                )
+            out.append(board_item(site, board, m))
+    except Exception as e:
+        log(f"WARN: {site} regex error:", repr(e))
+    METRICS.observe("hotdeal_parse_seconds", time.perf_counter() - t0, site=site, board=board)
+    METRICS.inc("hotdeal_parse_matches_total", len(out), site=site, board=board)
 
-    # quasarzone
-    if cfg.get("use_site_quasarzone"):
-        board = "qb_saleinfo"
-        if cfg.get("use_board_quasarzone_qb_saleinfo"):
-            url = f"https://quasarzone.com/bbs/{board}"
-            quasar_regex = r'<p class=\"tit\">\s+<a href=\"(?P<url>.+)\"\s+class=.+>\s+.+\s+(?:<span class=\"ellipsis-with-reply-cnt\">)?(?P<title>.+?)(?:</span>)'
+    if site == "quasarzone":
+        log("DEBUG: quasarzone regex matches:", len(out))
 
-            text = safe_cloud_get_text(url)
-            log("DEBUG: quasarzone list html length (cloudscraper):", len(text))
+    return out
 
-            matches = []
-            if text:
-                try:
-                    matches = list(re.finditer(quasar_regex, text, re.MULTILINE))
-                except Exception as e:
-                    log("WARN: quasarzone regex error:", repr(e))
-                    matches = []
-
-            log("DEBUG: quasarzone regex matches (cloudscraper):", len(matches))
-
-            for m in matches:
-                u = m.group("url")
-                out.append(
-                    {
-                        "site": "quasarzone",
-                        "board": board,
-                        "title": m.group("title"),
-                        "url": "https://quasarzone.com" + u if u.startswith("/") else u,
-                    }
-                )
 
-            if (not text) or (len(matches) == 0):
-                log("DEBUG: quasarzone fallback to http_get_text(use_cloudscraper=True)")
-                text2 = http_get_text(url, use_cloudscraper=True)
-                log("DEBUG: quasarzone list html length (fallback):", len(text2))
+# 적응형 폴링: 한 번 확인할 때 새 글이 이 정도 쌓이도록 게시판별 주기를 맞춤
+POLL_TARGET_NEW_PER_POLL = 0.5
+# 게시행 속도(글/초) 지수이동평균 가중치
+POLL_RATE_ALPHA = 0.3
 
-                matches2 = []
-                if text2:
-                    try:
-                        matches2 = list(re.finditer(quasar_regex, text2, re.MULTILINE))
-                    except Exception as e:
-                        log("WARN: quasarzone regex error (fallback):", repr(e))
-                        matches2 = []
-
-                log("DEBUG: quasarzone regex matches (fallback):", len(matches2))
-
-                for m in matches2:
-                    u = m.group("url")
-                    out.append(
-                        {
-                            "site": "quasarzone",
-                            "board": board,
-                            "title": m.group("title"),
-                            "url": "https://quasarzone.com" + u if u.startswith("/") else u,
-                        }
-                    )
+
+def get_poll_bounds(cfg: Dict) -> Tuple[int, int]:
+    try:
+        poll_min = int(cfg.get("poll_min_sec", 60) or 60)
+    except Exception:
+        poll_min = 60
+    try:
+        poll_max = int(cfg.get("poll_max_sec", 900) or 900)
+    except Exception:
+        poll_max = 900
+    poll_min = max(30, poll_min)
+    return poll_min, max(poll_min, poll_max)
+
+
+def get_cycle_interval(cfg: Dict) -> int:
+    """메인 루프 주기(초). 적응형 폴링이면 poll_min_sec마다 깨어나 만기된 게시판만 확인."""
+    if cfg.get("adaptive_poll_enable"):
+        return get_poll_bounds(cfg)[0]
+    interval = int(cfg.get("interval_min", 1))
+    return max(60, interval * 60)
+
+
+def update_board_schedule(cfg: Dict, cache: Dict, new_count: int, now: float):
+    """
+    새 글 수로 게시판별 게시 속도(rate, 글/초)를 학습하고 다음 확인 시각(next_due)을 정한다.
+    주기 = POLL_TARGET_NEW_PER_POLL / rate 를 [poll_min_sec, poll_max_sec]로 제한.
+    """
+    poll_min, poll_max = get_poll_bounds(cfg)
+
+    last = cache.get("last_poll")
+    rate = cache.get("rate")
+    if isinstance(last, (int, float)) and now > last:
+        observed = new_count / max(1.0, now - last)
+        if isinstance(rate, (int, float)):
+            rate = POLL_RATE_ALPHA * observed + (1 - POLL_RATE_ALPHA) * rate
+        else:
+            rate = observed
+
+    if isinstance(rate, (int, float)) and rate > 0:
+        interval = POLL_TARGET_NEW_PER_POLL / rate
+    elif isinstance(rate, (int, float)):
+        interval = poll_max
+    else:
+        # 아직 학습 전
+        interval = poll_min
+    interval = min(poll_max, max(poll_min, interval))
+
+    cache["last_poll"] = now
+    if isinstance(rate, (int, float)):
+        cache["rate"] = rate
+    cache["next_due"] = now + interval
+
+
+def scrape_board_items(
+    cfg: Dict, state: Dict | None = None, stats: Dict | None = None, jobs: List[Dict] | None = None
+) -> List[Dict]:
+    """
+    활성화된 게시판 첫 페이지를 동시에 받아온 뒤, get_board_jobs() 순서대로 파싱해서 합친다.
+    (수집만 병렬이고 결과 순서는 순차 실행 때와 동일)
+
+    state가 주어지면 state["board_cache"]에 게시판별 ETag/Last-Modified/본문 해시/목록을 저장하고,
+    304 또는 본문이 이전과 같으면 파싱을 건너뛰고 이전 목록을 unchanged=True로 돌려준다.
+    adaptive_poll_enable이면 아직 확인 시각(next_due)이 안 된 게시판도 이전 목록으로 대신한다.
+    stream_fetch_enable이면 목록을 스트리밍으로 읽다가 이미 본 글이 연속으로 나오면 중간에 끊는다.
+    차단기가 열린 호스트나 사이클 예산을 다 쓴 뒤의 게시판도 이전 목록으로 대신한다(deferred).
+    stats가 주어지면 boards/skipped(변경 없음)/not_due(확인 시각 전)/deferred 개수와 bytes_saved를 채운다.
+    jobs가 주어지면(CyclePlan.jobs) get_board_jobs(cfg) 대신 사용한다.
+    backfill_enable이면 첫 페이지에 아는 글(이전 첫 페이지 또는 seen)이 하나도 없는 게시판(중단/지연으로 생긴 공백)은
+    2페이지부터 backfill_max_pages장을 동시에 받아서, 아는 글이 나오는 곳까지의 글을 backfill=True로 뒤에 붙인다.
+    """
+    out: List[Dict] = []
+
+    jobs = list(jobs) if jobs is not None else get_board_jobs(cfg)
+    cluster = get_cluster()
+    if cluster is not None:
+        # 클러스터 모드: 이 노드가 lease를 가진 게시판만
+        jobs = cluster.assign(jobs)
+        log("DEBUG: cluster boards:", [f"{job['site']}:{job['board']}" for job in jobs])
+    max_workers, max_per_host = get_fetch_limits(cfg)
+    now = time.time()
+
+    board_cache: Dict = {}
+    if state is not None:
+        board_cache = state.setdefault("board_cache", {})
+        # 비활성화된 게시판 캐시는 정리
+        active = {f"{job['site']}:{job['board']}" for job in jobs}
+        for bid in list(board_cache.keys()):
+            if bid not in active:
+                del board_cache[bid]
+
+    adaptive = state is not None and bool(cfg.get("adaptive_poll_enable"))
+    # 알림 대상 판단 설정(키워드 등)이 캐시를 만들 때와 다르면 이전 목록도 unchanged로 넘기지 않고 다시 판단하게 함
+    alarm_sig = alarm_config_sig(cfg)
+
+    pages: List[Dict | None] = [None] * len(jobs)
+    due: List[int] = []
+    for i, job in enumerate(jobs):
+        cache = board_cache.get(f"{job['site']}:{job['board']}") or {}
+        next_due = cache.get("next_due")
+        if (
+            adaptive
+            and isinstance(cache.get("items"), list)
+            and isinstance(next_due, (int, float))
+            and next_due > now + 1
+        ):
+            pages[i] = {"status": "not_due", "text": ""}
+        elif isinstance(cache.get("items"), list) and not host_available(job["url"]):
+            # 차단기가 열린 호스트/예산 소진: 이전 목록으로 대신하고 다음 사이클에 다시 확인
+            pages[i] = {"status": "deferred", "text": ""}
+        else:
+            due.append(i)
+
+    # 스트리밍: 이전 목록이 있는 게시판만(중간에 끊으면 나머지는 이전 목록으로 채움)
+    stream = state is not None and bool(cfg.get("stream_fetch_enable"))
+    try:
+        stop_after = int(cfg.get("stream_stop_after_seen", 3) or 3)
+    except Exception:
+        stop_after = 3
+    seen = state.get("seen", {}) if state is not None else {}
+    backfill_pages = 0
+    if state is not None and cfg.get("backfill_enable"):
+        try:
+            backfill_pages = max(0, int(cfg.get("backfill_max_pages", 3) or 0))
+        except Exception:
+            backfill_pages = 3
+    gaps: List[Tuple[Dict, frozenset]] = []  # (job, 아는 글 주소)
+
+    def make_is_known(site: str, board: str, cache: Dict):
+        if not (stream and isinstance(cache.get("items"), list) and cache["items"]):
+            return None
+        prefix = get_url_prefix(site)
+
+        def key_of(it: Dict) -> str:
+            u = it["url"]
+            return f"{site}:{board}:{u if u.startswith('http') else prefix + u}"
+
+        known = frozenset(key_of(it) for it in cache["items"])
+        # fetch_many 동안 메인 스레드는 기다리기만 하므로 seen을 읽기만 하는 건 안전
+        return lambda it: key_of(it) in known or bool(seen.get(key_of(it)))
+
+    def timed_fetch(url: str, cloud: bool, cache: Dict, site: str, board: str, is_known) -> Dict:
+        t0 = time.monotonic()
+        page = fetch_board_page(url, cloud, cache, site=site, board=board, is_known=is_known, stop_after=stop_after)
+        METRICS.observe("hotdeal_fetch_seconds", time.monotonic() - t0, site=site, board=board)
+        METRICS.inc("hotdeal_fetch_total", site=site, board=board, status=page.get("status", "error"))
+        METRICS.inc("hotdeal_fetch_bytes_total", page.get("bytes", 0), site=site, board=board)
+        return page
+
+    # 워커 스레드에는 캐시 사본만 넘기고, state 갱신은 여기(메인 스레드)에서만 한다.
+    calls = []
+    for i in due:
+        site, board = jobs[i]["site"], jobs[i]["board"]
+        cache = dict(board_cache.get(f"{site}:{board}") or {})
+        calls.append(
+            (
+                jobs[i]["url"],
+                partial(
+                    timed_fetch,
+                    jobs[i]["url"],
+                    jobs[i]["cloud"],
+                    cache,
+                    site,
+                    board,
+                    make_is_known(site, board, cache),
+                ),
+            )
+        )
+    fetched = fetch_many(calls, max_workers=max_workers, max_per_host=max_per_host)
+    for i, page in zip(due, fetched):
+        pages[i] = page or {"status": "error", "text": ""}
+
+    skipped = 0
+    not_due = 0
+    deferred = 0
+    bytes_saved = 0
+    for job, page in zip(jobs, pages):
+        site = job["site"]
+        board = job["board"]
+        bid = f"{site}:{board}"
+        cache = board_cache.get(bid) or {}
+        fresh = cache.get("alarm_sig") == alarm_sig
+        if not fresh and cache.get("items"):
+            cache["alarm_sig"] = alarm_sig
+            board_cache[bid] = cache
+
+        if page["status"] in ("not_due", "deferred"):
+            if page["status"] == "deferred":
+                deferred += 1
+                METRICS.inc("hotdeal_budget_skips_total", kind="board")
+            else:
+                not_due += 1
+            METRICS.inc("hotdeal_board_cache_total", result=page["status"])
+            for it in cache["items"]:
+                out.append({"site": site, "board": board, "title": it["title"], "url": it["url"], "unchanged": fresh})
+            continue
+
+        unchanged = page["status"] == "not_modified" or (
+            page["status"] == "ok" and page.get("hash") and page["hash"] == cache.get("hash")
+        )
+        if unchanged and isinstance(cache.get("items"), list):
+            skipped += 1
+            METRICS.inc("hotdeal_board_cache_total", result="not_modified" if page["status"] == "not_modified" else "same_hash")
+            for it in cache["items"]:
+                out.append({"site": site, "board": board, "title": it["title"], "url": it["url"], "unchanged": fresh})
+            if adaptive:
+                update_board_schedule(cfg, cache, 0, now)
+                board_cache[bid] = cache
+            continue
+
+        METRICS.inc("hotdeal_board_cache_total", result="miss")
+        text = page["text"]
+        if site == "quasarzone":
+            log("DEBUG: quasarzone list html length (cloudscraper):", len(text))
+
+        if "items" in page:
+            # 스트리밍으로 이미 파싱됨
+            items = page["items"]
+            METRICS.inc("hotdeal_parse_matches_total", len(items), site=site, board=board)
+            if page.get("partial"):
+                # 끊은 뒤쪽은 이전 목록으로 채워 첫 페이지 크기를 유지(trim 기준이 줄지 않도록)
+                got = {it["url"] for it in items}
+                size = max(len(items), len(cache.get("items") or []))
+                for it in cache.get("items") or []:
+                    if len(items) >= size:
+                        break
+                    if it["url"] not in got:
+                        items.append({"site": site, "board": board, "title": it["title"], "url": it["url"], "unchanged": fresh})
+                bytes_saved += page.get("bytes_saved", 0)
+                log(f"DEBUG: stream stop {bid}: read={page.get('bytes', 0)}B, saved~{page.get('bytes_saved', 0)}B")
+        else:
+            items = parse_board_items(site, board, text)
+
+        # 결과: parsed(글 있음) / blocked(차단·챌린지 페이지) / error(그 밖의 4xx·5xx) / layout_changed(정상 응답인데 글이 없음)
+        # 같은 주소를 다시 받아 보지 않는다(막혔거나 구조가 바뀌었으면 다시 받아도 같음)
+        if items:
+            outcome = "parsed"
+        elif page["status"] != "ok":
+            outcome = "error"
+        elif looks_blocked(page.get("code"), text):
+            outcome = "blocked"
+        elif (page.get("code") or 0) >= 400:
+            outcome = "error"
+        else:
+            outcome = "layout_changed"
+        METRICS.inc("hotdeal_list_outcome_total", site=site, board=board, outcome=outcome)
+        if outcome in ("blocked", "layout_changed"):
+            log(f"WARN: {bid}: no items ({outcome}, http={page.get('code')}, {len(text)} chars)")
+
+        if backfill_pages and outcome == "parsed" and cache.get("items"):
+            # 이전 첫 페이지 글도, 이미 본 글도 하나도 없으면 그 사이 글이 2페이지 이후로 밀려난 것
+            prefix = get_url_prefix(site)
+            known = frozenset(it["url"] for it in cache["items"])
+            if not any(
+                it["url"] in known or seen.get(f"{site}:{board}:{it['url'] if it['url'].startswith('http') else prefix + it['url']}")
+                for it in items
+            ):
+                gaps.append((job, known))
+
+        if state is not None and outcome == "parsed" and page.get("code") == 200:
+            prev_urls = {it["url"] for it in cache.get("items") or []}
+            new_cache = {
+                "etag": page.get("etag", ""),
+                "last_modified": page.get("last_modified", ""),
+                "hash": page.get("hash", ""),
+                "alarm_sig": alarm_sig,
+                "items": [{"title": it["title"], "url": it["url"]} for it in items],
+            }
+            if not page.get("partial") and page.get("bytes"):
+                new_cache["full_bytes"] = page["bytes"]
+            for k in ("last_poll", "rate", "next_due", "full_bytes"):
+                if k in cache and k not in new_cache:
+                    new_cache[k] = cache[k]
+            if adaptive:
+                new_count = sum(1 for it in items if it["url"] not in prev_urls) if prev_urls else 0
+                update_board_schedule(cfg, new_cache, new_count, now)
+            board_cache[bid] = new_cache
+        elif adaptive and cache:
+            # 실패한 게시판은 학습 없이 가장 짧은 주기로 다시 시도
+            cache["next_due"] = now + get_poll_bounds(cfg)[0]
+            board_cache[bid] = cache
+
+        out.extend(items)
+
+    backfilled = 0
+    if gaps:
+        calls = []
+        for job, _ in gaps:
+            for n in range(2, backfill_pages + 2):
+                url = board_page_url(job, n)
+                calls.append((url, partial(timed_fetch, url, job["cloud"], {}, job["site"], job["board"], None)))
+        fetched = fetch_many(calls, max_workers=max_workers, max_per_host=max_per_host)
+        METRICS.inc("hotdeal_backfill_pages_total", len(calls))
+        for g, (job, known) in enumerate(gaps):
+            site, board = job["site"], job["board"]
+            prefix = get_url_prefix(site)
+            got = {it["url"] for it in out if it["site"] == site and it["board"] == board}
+            added = 0
+            for page in fetched[g * backfill_pages:(g + 1) * backfill_pages]:
+                if not page or page["status"] != "ok":
+                    break
+                hit = False
+                for it in parse_board_items(site, board, page["text"]):
+                    url = it["url"]
+                    if url in known or seen.get(f"{site}:{board}:{url if url.startswith('http') else prefix + url}"):
+                        hit = True
+                        break
+                    if url not in got:
+                        got.add(url)
+                        it["backfill"] = True
+                        out.append(it)
+                        added += 1
+                if hit:
+                    break
+            backfilled += added
+            log(f"DEBUG: backfill {site}:{board}: gap on page 1, {added} older items from pages 2-{backfill_pages + 1}")
+
+    if adaptive and due:
+        log(
+            "DEBUG: poll schedule (next in sec):",
+            {
+                bid: int(c["next_due"] - now)
+                for bid, c in board_cache.items()
+                if isinstance(c.get("next_due"), (int, float))
+            },
+        )
+
+    if stats is not None:
+        stats["boards"] = len(jobs)
+        stats["skipped"] = skipped
+        stats["not_due"] = not_due
+        stats["bytes_saved"] = bytes_saved
+        stats["backfilled"] = backfilled
+        stats["deferred"] = deferred
 
     return out
 
 
+class MallLinkParser:
+    """
+    상세 페이지 구매 링크 추출. 원래 정규식을 '앵커 + (DOTALL .*? 구간) + 뒷부분'으로 나눠서
+    앵커는 한 번, 뒷부분은 앵커 뒤에서 한 번만 찾는다(같은 결과, 선형 시간).
+    - scan=True : 사이에 .*?/.+?(DOTALL)가 있음 → 첫 앵커 뒤 gap 글자 이후에서 뒷부분을 search
+                  (첫 앵커에서 못 찾으면 뒤쪽 앵커에서도 찾을 수 없음)
+    - scan=False: 앵커 바로 뒤에서 match, 실패하면 다음 앵커
+    """
+
+    def __init__(self, anchor: str, tail: str, scan: bool, gap: int = 0):
+        self.anchor = re.compile(anchor)
+        self.tail = re.compile(tail)
+        self.scan = scan
+        self.gap = gap
+
+    def search(self, text: str) -> str:
+        pos = 0
+        while True:
+            a = self.anchor.search(text, pos)
+            if not a:
+                return ""
+            if self.scan:
+                m = self.tail.search(text, a.end() + self.gap)
+                return m.group("mall_url") if m else ""
+            m = self.tail.match(text, a.end())
+            if m:
+                return m.group("mall_url")
+            pos = a.start() + 1
+
+
+_MALL_PARSERS = {
+    # 클래스 이름에 'topTitle-link'가 포함된 li 안의 href를 찾는 방식
+    "ppomppu": MallLinkParser(
+        r'class=\"[^\"]*topTitle-link[^\"]*\"', r'href=\"(?P<mall_url>https?://[^\"]+)\"', scan=True
+    ),
+    "clien": MallLinkParser(r"구매링크", r">(?P<mall_url>[^<]+)<", scan=True, gap=1),
+    "ruriweb": MallLinkParser(r"원본출처", r"(?P<mall_url>https?://[^\s\"<]+)", scan=True, gap=1),
+    "coolenjoy": MallLinkParser(r'alt=\"관련링크\">', r"\s+(?P<mall_url>[^<]+)<", scan=False),
+    "quasarzone": MallLinkParser(
+        r"<th>\s*링크",
+        r"</th>\s*<td>\s*<a[^>]*>(?P<mall_url>https?://[^<\s]+)</a>",
+        scan=True,
+        gap=1,
+    ),
+}
+
+
 def scrape_mall_url(site: str, url: str) -> str:
-    regex = None
-    if site == "ppomppu":
-         # 클래스 이름에 'topTitle-link'가 포함된 li 안의 href를 찾는 방식
-        regex = r'class=\"[^\"]*topTitle-link[^\"]*\".*?href=\"(?P<mall_url>https?://[^\"]+)\"'
-    elif site == "clien":
-        regex = r'구매링크.+?>(?P<mall_url>[^<]+)<'
-    elif site == "ruriweb":
-        regex = r'원본출처.+?(?P<mall_url>https?://[^\s\"<]+)'
-    elif site == "coolenjoy":
-        regex = r'alt=\"관련링크\">\s+(?P<mall_url>[^<]+)<'
-    elif site == "quasarzone":
-        regex = r'<th>\s*링크.+?</th>\s*<td>\s*<a[^>]*>(?P<mall_url>https?://[^<\s]+)</a>'
-
-    if not regex:
+    parser = _MALL_PARSERS.get(site)
+    if parser is None:
         return ""
 
     full = url if url.startswith("http") else (get_url_prefix(site) + url)
+    t0 = time.monotonic()
     text = http_get_text(full, use_cloudscraper=(site == "quasarzone"))
-    if not text:
+    mall_url = parser.search(text) if text else ""
+    METRICS.observe("hotdeal_detail_seconds", time.monotonic() - t0, site=site)
+    METRICS.inc("hotdeal_detail_total", site=site, result="found" if mall_url else ("empty" if text else "error"))
+    if not mall_url:
         return ""
 
-    m = re.search(regex, text, re.MULTILINE | re.DOTALL)
-    if not m:
+    return html.unescape(mall_url).strip()
+
+
+# ---- 게시판 간 중복 딜 ----
+# 같은 딜이 여러 게시판에 올라오면 (정규화한 구매 링크) 또는 (제목 3-gram Jaccard 유사도 ≥ 기준)으로 먼저 알린 글을 찾아 알림을 생략한다.
+# state["dedupe"]: 알림 보낸 키 → [시각, 정규화 제목, 정규화 구매 링크] (시각 순, 기간/개수 넘으면 앞에서부터 삭제)
+DEDUPE_MAX_ENTRIES = 5000
+# 제목 MinHash LSH: 16구간 x 3값. 유사도 s인 두 제목이 후보가 될 확률 1-(1-s^3)^16
+# (s=0.6 → 98%, 0.7 → 99.9%, 0.3 → 35%, 0.1 → 2%). 후보는 Jaccard를 직접 계산해서 확인
+MINHASH_BANDS = 16
+MINHASH_ROWS = 3
+_MINHASH_STRUCT = struct.Struct(f"<{MINHASH_BANDS * MINHASH_ROWS}I")
+_TRACKING_PARAMS = frozenset(
+    (
+        "fbclid", "gclid", "igshid", "ref", "ref_", "referrer", "src", "spm", "scm", "pvid", "clickid",
+        "trackingid", "tracking_id", "affiliate", "af", "napm", "sourcetype", "subid", "lptag", "ctag",
+    )
+)
+_TITLE_PREFIX_RE = re.compile(r"^\s*(?:\[[^\]]*\]\s*)+")
+_TITLE_DROP_RE = re.compile(r"[^0-9a-z가-힣]+")
+
+
+def normalize_mall_url(url: str) -> str:
+    """
+    비교용 구매 링크: 스킴/www./m. 무시, 추적 파라미터(utm_* 등)와 #이하 제거, 나머지 파라미터는 정렬.
+    경로("/" 제외)도 파라미터도 없으면 ""(비교 안 함).
+    """
+    if not url:
+        return ""
+    try:
+        p = urlparse(url.strip())
+    except ValueError:
+        return ""
+    host = (p.hostname or "").lower()
+    for pre in ("www.", "m."):
+        if host.startswith(pre):
+            host = host[len(pre):]
+    if not host:
+        return ""
+    query = sorted(
+        (k, v) for k, v in parse_qsl(p.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    path = p.path.rstrip("/")
+    if not path and not query:
+        # 쇼핑몰 첫 화면 주소만으로는 같은 딜인지 알 수 없음
         return ""
+    return f"{host}{path}" + (f"?{urlencode(query)}" if query else "")
 
-    return html.unescape(m.group("mall_url")).strip()
+
+def normalize_title(title: str) -> str:
+    """
+    비교용 제목: 맨 앞의 [쇼핑몰] 같은 대괄호 머리말을 떼고 공백/기호를 지워 소문자로(중간의 [..] 안 글자는 남김).
+    남는 글자가 너무 적으면 ""(비교 안 함).
+    """
+    t = _TITLE_DROP_RE.sub("", _TITLE_PREFIX_RE.sub("", (title or "").lower()))
+    return t if len(t) >= 4 else ""
+
+
+@lru_cache(maxsize=DEDUPE_MAX_ENTRIES * 2)
+def title_sketch(t: str) -> Tuple[frozenset, Tuple[Tuple[int, ...], ...]]:
+    """
+    정규화 제목 → (글자 3-gram 집합, MinHash 구간 값들).
+    3-gram마다 shake_128로 MINHASH_BANDS * MINHASH_ROWS개의 32비트 값을 만들고 자리별 최솟값을 MINHASH_ROWS개씩 묶는다.
+    state에는 정규화 제목만 저장하고, 같은 제목은 다시 계산하지 않는다(state를 다시 읽어 색인을 새로 만들 때도 비용 없음).
+    """
+    grams = frozenset(t[i:i + 3] for i in range(len(t) - 2))
+    rows = [_MINHASH_STRUCT.unpack(hashlib.shake_128(g.encode("utf-8")).digest(_MINHASH_STRUCT.size)) for g in grams]
+    sig = [min(col) for col in zip(*rows)]
+    r = MINHASH_ROWS
+    return grams, tuple(tuple(sig[i * r:(i + 1) * r]) for i in range(MINHASH_BANDS))
+
+
+class DedupeIndex:
+    """
+    state["dedupe"] 위의 조회용 색인. 글마다 후보만 비교한다.
+    add()/trim()이 버킷과 색인을 함께 고치므로 사이클 사이에 계속 쓴다(get_dedupe_index()).
+    - 구매 링크: 정규화 링크 → 가장 최근 키
+    - 제목: MinHash 구간별 dict(LSH). 구간 하나라도 같은 항목만 후보로 보고,
+      후보는 3-gram 집합의 Jaccard 유사도를 직접 계산해서 threshold 이상이면 같은 딜로 본다.
+    """
+
+    def __init__(self, bucket: Dict, window_sec: float, threshold: float, now: float | None = None):
+        self.bucket = bucket
+        self.configure(window_sec, threshold)
+        self._by_mall: Dict[str, str] = {}
+        self._by_band: List[Dict[Tuple[int, ...], List[Tuple[frozenset, str]]]] = [{} for _ in range(MINHASH_BANDS)]
+        self.trim(now)
+        for key, entry in bucket.items():
+            self._index(key, entry)
+
+    def configure(self, window_sec: float, threshold: float):
+        self.window_sec = window_sec
+        self.threshold = min(1.0, max(0.0, float(threshold)))
+
+    def trim(self, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        cutoff = now - self.window_sec
+        excess = len(self.bucket) - DEDUPE_MAX_ENTRIES
+        victims = []
+        for k, v in self.bucket.items():
+            if excess > 0:
+                excess -= 1
+            elif isinstance(v, list) and v and isinstance(v[0], (int, float)) and v[0] >= cutoff:
+                break
+            victims.append(k)
+        for k in victims:
+            self._unindex(k, self.bucket.pop(k))
+        return len(victims)
+
+    def _index(self, key: str, entry):
+        if not isinstance(entry, list) or len(entry) < 3:
+            return
+        _, t, mall = entry[:3]
+        if mall:
+            self._by_mall[mall] = key
+        # 예전 형식(SimHash 정수)은 제목 비교에서 빠짐(구매 링크 비교만)
+        if isinstance(t, str) and t:
+            grams, bands = title_sketch(t)
+            for i, v in enumerate(bands):
+                self._by_band[i].setdefault(v, []).append((grams, key))
+
+    def _unindex(self, key: str, entry):
+        if not isinstance(entry, list) or len(entry) < 3:
+            return
+        _, t, mall = entry[:3]
+        if mall and self._by_mall.get(mall) == key:
+            del self._by_mall[mall]
+        if isinstance(t, str) and t:
+            for i, v in enumerate(title_sketch(t)[1]):
+                cands = self._by_band[i].get(v)
+                if cands is None:
+                    continue
+                cands[:] = [c for c in cands if c[1] != key]
+                if not cands:
+                    del self._by_band[i][v]
+
+    def find_title(self, t: str, key: str) -> str | None:
+        if not t:
+            return None
+        grams, bands = title_sketch(t)
+        checked = set()
+        for i, v in enumerate(bands):
+            for other, okey in self._by_band[i].get(v, ()):
+                if okey == key or okey in checked:
+                    continue
+                checked.add(okey)
+                inter = len(grams & other)
+                if inter >= self.threshold * (len(grams) + len(other) - inter):
+                    return okey
+        return None
+
+    def find_mall(self, mall: str, key: str) -> str | None:
+        okey = self._by_mall.get(mall) if mall else None
+        return okey if okey != key else None
+
+    def add(self, key: str, t: str, mall: str, ts: float | None = None):
+        entry = [time.time() if ts is None else ts, t, mall]
+        old = self.bucket.pop(key, None)
+        if old is not None:
+            self._unindex(key, old)
+        self.bucket[key] = entry
+        self._index(key, entry)
+
+
+_DEDUPE_INDEX: DedupeIndex | None = None
+
+
+def get_dedupe_index(bucket: Dict, window_sec: float, threshold: float) -> DedupeIndex:
+    """
+    state["dedupe"] 색인을 사이클 사이에 재사용한다(기간 지난 항목만 정리).
+    state를 파일에서 다시 읽으면 버킷 객체가 바뀌므로 그때만 새로 만든다.
+    """
+    global _DEDUPE_INDEX
+    idx = _DEDUPE_INDEX
+    if idx is None or idx.bucket is not bucket:
+        idx = _DEDUPE_INDEX = DedupeIndex(bucket, window_sec, threshold)
+    else:
+        idx.configure(window_sec, threshold)
+        idx.trim()
+    return idx
+
+
+def prefetch_mall_urls(
+    cfg: Dict,
+    state: Dict,
+    items: List[Dict],
+    plan: "CyclePlan | None" = None,
+    dedupe: DedupeIndex | None = None,
+    in_flight: "set | None" = None,
+) -> int:
+    """
+    이번 사이클에 알림 대상이 될 글(미확인 + should_send)의 mall_url을 알림 루프 전에 한꺼번에 채운다.
+    - 이미 mall_cache에 있는 키는 건너뜀
+    - 같은 상세 페이지 URL은 한 번만 요청
+    - 요청은 fetch_many()로 병렬(호스트별 제한 공유)
+    알림 판단 결과는 it["send"]에 남겨 알림 루프가 다시 계산하지 않게 한다(이미 있으면 그대로 씀).
+    in_flight(아직 Outbox 대기열에 있는 다이제스트 글 키)는 알림 루프에서 건너뛰므로 받지 않는다.
+    dedupe가 있으면 이미 알린 글(또는 이번 사이클 앞 글)과 제목이 거의 같은 글은 상세 페이지를 받지 않는다.
+    반환: 실제로 요청한 상세 페이지 수
+    """
+    # 이번 사이클 후보끼리도 제목이 겹치면 앞 글만 받음(알림 루프에서 앞 글이 실제로 나갔는지 다시 확인)
+    batch = DedupeIndex({}, float("inf"), dedupe.threshold) if dedupe is not None else None
+    if plan is None:
+        plan = CyclePlan(cfg)
+    targets: Dict[str, Tuple[str, str, List[str]]] = {}  # full_url -> (site, raw_url, keys)
+
+    for it in items:
+        site = it["site"]
+        raw_url = it["url"]
+        if "key" in it:
+            full_url, key = it["full_url"], it["key"]
+        else:
+            full_url, key = plan.item_key(site, it["board"], raw_url)
+
+        if it.get("unchanged") and key not in state["fail_count"]:
+            continue
+        if state["seen"].get(key) or key in state["mall_cache"] or (in_flight and key in in_flight):
+            continue
+
+        if it.get("send") is None:
+            it["send"] = plan.should_send((it["title"] or "").strip())
+        send_main, send_dist, _ = it["send"]
+        if not (send_main or send_dist):
+            continue
+
+        if dedupe is not None:
+            t = it["title_norm"] = normalize_title(it["title"])
+            if dedupe.find_title(t, key) or batch.find_title(t, key):
+                METRICS.inc("hotdeal_dedupe_detail_skipped_total")
+                continue
+            batch.add(key, t, "")
+
+        if not host_available(full_url):
+            continue
+
+        if full_url in targets:
+            targets[full_url][2].append(key)
+        else:
+            targets[full_url] = (site, raw_url, [key])
+
+    if not targets:
+        return 0
+
+    max_workers, max_per_host = get_fetch_limits(cfg)
+    urls = list(targets.keys())
+    results = fetch_many(
+        [(u, partial(scrape_mall_url, targets[u][0], targets[u][1])) for u in urls],
+        max_workers=max_workers,
+        max_per_host=max_per_host,
+    )
+
+    for u, mall_url in zip(urls, results):
+        if not mall_url and not host_available(u):
+            # 예산 소진/차단으로 못 받은 것은 저장하지 않음(다음 사이클에 다시)
+            continue
+        for key in targets[u][2]:
+            # 실패해도 빈 값으로 저장(게시물당 한 번만 시도)
+            state["mall_cache"][key] = mall_url or ""
+
+    return len(urls)
 
 
 def format_message(template: str, title: str, site: str, board: str, url: str, mall_url: str) -> str:
@@ -416,199 +2682,1371 @@ def format_message(template: str, title: str, site: str, board: str, url: str, m
     )
 
 
-def send_telegram(cfg: Dict, msg: str) -> bool:
+def _telegram_request(cfg: Dict, msg: str):
     if not cfg.get("telegram_enable"):
-        return False
+        return None
     token = cfg.get("telegram_bot_token")
     chat_id = cfg.get("telegram_chat_id")
     if not token or not chat_id:
-        return False
-    try:
-        requests.post(
-            f"https://api.telegram.org/bot{token}/sendMessage",
-            json={"chat_id": chat_id, "text": msg},
-            timeout=20,
-        ).raise_for_status()
-        return True
-    except Exception as e:
-        log("WARN: telegram send failed:", repr(e))
-        return False
+        return None
+    return f"{TELEGRAM_API_BASE}/bot{token}/sendMessage", {"chat_id": chat_id, "text": msg}, None
 
 
-def send_discord(cfg: Dict, msg: str) -> bool:
+def _discord_request(cfg: Dict, msg: str):
     if not cfg.get("discord_enable"):
-        return False
+        return None
     webhook = cfg.get("discord_webhook_url")
     if not webhook:
-        return False
-    try:
-        requests.post(webhook, json={"content": msg}, timeout=20).raise_for_status()
-        return True
-    except Exception as e:
-        log("WARN: discord send failed:", repr(e))
-        return False
+        return None
+    return webhook, {"content": msg}, None
 
 
-def send_homeassistant_notify(cfg: Dict, msg: str) -> bool:
+def _homeassistant_request(cfg: Dict, msg: str):
     if not cfg.get("ha_notify_enable"):
-        return False
+        return None
 
     service = (cfg.get("ha_notify_service") or "").strip()
     if not service.startswith("notify."):
-        return False
+        return None
 
     token = os.getenv("SUPERVISOR_TOKEN")
     if not token:
-        return False
+        return None
 
     domain, svc = service.split(".", 1)
-    url = f"http://supervisor/core/api/services/{domain}/{svc}"
+    url = f"{SUPERVISOR_API_BASE}/services/{domain}/{svc}"
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json",
     }
-    payload = {"message": msg}
+    return url, {"message": msg}, headers
+
+
+# ---- Web Push ----
+# 구독(브라우저 PushSubscription JSON {"endpoint", "keys": {"p256dh", "auth"}}) 목록은
+# /data/webpush_subscriptions.json에 두고, 파일이 바뀌면 다시 읽는다. 404/410(만료/해지) 구독은 자동으로 지운다.
+# VAPID 키는 webpush_vapid_private_key가 비어 있으면 /data/webpush_vapid.pem을 한 번 만들어 계속 쓰고,
+# 브라우저에서 구독할 때 넣을 공개키(applicationServerKey)는 /data/webpush_vapid_public.txt와 로그에 남긴다.
+# 메시지 하나는 구독자마다 따로 암호화해서 보내야 하므로 스레드 풀(webpush_max_workers)로 동시에 보낸다.
+
+WEBPUSH_SUBS_FILE = os.path.join(DATA_DIR, "webpush_subscriptions.json")
+WEBPUSH_KEY_FILE = os.path.join(DATA_DIR, "webpush_vapid.pem")
+WEBPUSH_PUBLIC_FILE = os.path.join(DATA_DIR, "webpush_vapid_public.txt")
+WEBPUSH_TTL = 6 * 3600        # 기기가 꺼져 있을 때 푸시 서비스가 보관할 시간
+WEBPUSH_JWT_TTL = 12 * 3600   # VAPID 서명(JWT) 유효 시간(푸시 서비스 상한 24시간)
+WEBPUSH_JWT_REFRESH = 3600    # 만료까지 이보다 적게 남으면 새로 서명
+WEBPUSH_TITLE = "핫딜 알림"
+
+
+class WebPushChannel:
+    """
+    Web Push 전송. 서명 재료는 한 번만 만든다.
+      - VAPID 키: 처음 쓸 때 한 번 읽거나 만듦(옵션 키가 바뀌면 다시)
+      - Authorization 헤더(서명한 JWT): 푸시 서비스(origin)별로 만료 전까지 재사용 → 구독자 수와 무관하게 서명은 서비스당 한 번
+    send(): 모든 구독자에게 동시에 보내고 (한 명 이상 성공, 전부 429일 때 기다릴 초)를 돌려준다.
+    일부만 실패하면 성공으로 본다(다시 보내면 이미 받은 구독자에게 중복으로 가므로).
+    """
+
+    def __init__(self, subs_path: str, key_path: str, public_path: str):
+        self.subs_path = subs_path
+        self.key_path = key_path
+        self.public_path = public_path
+        self._lock = threading.Lock()
+        self._subs: List[Dict] = []
+        self._subs_sig = None
+        self._vapid = None
+        self._vapid_sig = None
+        self._auth: Dict[Tuple[str, str], Tuple[float, Dict]] = {}  # (origin, subject) -> (exp, headers)
+        self._warned = set()
+
+    def _warn_once(self, key: str, *args):
+        if key not in self._warned:
+            self._warned.add(key)
+            log("WARN:", *args)
+
+    def subscriptions(self) -> List[Dict]:
+        """구독 목록(파일이 바뀌었을 때만 다시 읽음)."""
+        try:
+            st = os.stat(self.subs_path)
+            sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            sig = None
+        with self._lock:
+            if sig != self._subs_sig:
+                self._subs_sig = sig
+                self._subs = self._read_subs() if sig is not None else []
+                METRICS.set("hotdeal_webpush_subscribers", len(self._subs))
+            return self._subs
+
+    def _read_subs(self) -> List[Dict]:
+        try:
+            with open(self.subs_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            log("WARN: webpush subscriptions load failed:", repr(e))
+            return []
+        if isinstance(data, dict):
+            data = data.get("subscriptions") or []
+        subs = [s for s in data if isinstance(s, dict) and s.get("endpoint") and isinstance(s.get("keys"), dict)]
+        if len(subs) != len(data):
+            log(f"WARN: webpush: ignoring {len(data) - len(subs)} malformed subscription(s)")
+        return subs
+
+    def remove(self, endpoints: set):
+        """만료된 구독을 파일에서 지운다(그 사이 파일이 바뀌었어도 최신 내용 기준)."""
+        with self._lock:
+            subs = self._read_subs() if os.path.exists(self.subs_path) else []
+            keep = [s for s in subs if s.get("endpoint") not in endpoints]
+            if len(keep) == len(subs):
+                return
+            tmp = self.subs_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(keep, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.subs_path)
+            st = os.stat(self.subs_path)
+            self._subs_sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+            self._subs = keep
+        METRICS.set("hotdeal_webpush_subscribers", len(keep))
+        log(f"DEBUG: webpush: removed {len(subs) - len(keep)} expired subscription(s), {len(keep)} left")
+
+    def _vapid_key(self, cfg: Dict):
+        raw = (cfg.get("webpush_vapid_private_key") or "").strip()
+        with self._lock:
+            if self._vapid is not None and self._vapid_sig == raw:
+                return self._vapid
+            from py_vapid import Vapid
+            from py_vapid.utils import b64urlencode
+            from cryptography.hazmat.primitives import serialization
+
+            if raw:
+                vapid = Vapid.from_string(private_key=raw)
+            elif os.path.exists(self.key_path):
+                vapid = Vapid.from_file(self.key_path)
+            else:
+                vapid = Vapid()
+                vapid.generate_keys()
+                os.makedirs(os.path.dirname(self.key_path), exist_ok=True)
+                vapid.save_key(self.key_path)
+                os.chmod(self.key_path, 0o600)
+                log("DEBUG: webpush: generated VAPID key:", self.key_path)
+            public = b64urlencode(
+                vapid.public_key.public_bytes(serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint)
+            )
+            with open(self.public_path, "w", encoding="utf-8") as f:
+                f.write(public + "\n")
+            log("DEBUG: webpush: VAPID public key (applicationServerKey):", public)
+            self._vapid, self._vapid_sig = vapid, raw
+            self._auth.clear()
+            return vapid
+
+    def _auth_headers(self, vapid, origin: str, subject: str) -> Dict:
+        now = time.time()
+        with self._lock:
+            cached = self._auth.get((origin, subject))
+            if cached and cached[0] - now > WEBPUSH_JWT_REFRESH:
+                return cached[1]
+        exp = int(now) + WEBPUSH_JWT_TTL
+        headers = vapid.sign({"aud": origin, "exp": exp, "sub": subject})
+        with self._lock:
+            self._auth[(origin, subject)] = (exp, headers)
+        return headers
+
+    def send(self, cfg: Dict, msg: str) -> Tuple[bool, float | None]:
+        subs = self.subscriptions()
+        subject = (cfg.get("webpush_vapid_subject") or "").strip()
+        if not subs or not subject:
+            return False, None
+        try:
+            from pywebpush import WebPusher, WebPushException
+            vapid = self._vapid_key(cfg)
+        except ImportError as e:
+            self._warn_once("import", "webpush unavailable (pywebpush not installed):", repr(e))
+            return False, None
+        except Exception as e:
+            self._warn_once("vapid", "webpush: VAPID key load failed:", repr(e))
+            return False, None
+
+        try:
+            workers = max(1, int(cfg.get("webpush_max_workers", 8) or 8))
+        except Exception:
+            workers = 8
+        data = json.dumps({"title": WEBPUSH_TITLE, "body": msg}, ensure_ascii=False)
+        sess = get_global_sess()
+
+        def push(sub: Dict) -> Tuple[str, float | None]:
+            p = urlparse(sub["endpoint"])
+            try:
+                headers = dict(self._auth_headers(vapid, f"{p.scheme}://{p.netloc}", subject))
+                res = WebPusher(sub, requests_session=sess).send(
+                    data, headers, ttl=WEBPUSH_TTL, content_encoding="aes128gcm", timeout=20
+                )
+            except WebPushException as e:
+                # 구독 정보 자체가 잘못됨(키 누락/형식 오류) → 다시 보내도 실패하므로 만료와 같이 처리
+                log("WARN: webpush: bad subscription:", p.netloc, repr(e))
+                return "expired", None
+            except (requests.exceptions.SSLError, requests.exceptions.ConnectionError) as e:
+                log("WARN: webpush send failed:", p.netloc, repr(e))
+                recycle_host_pool(sess, sub["endpoint"])
+                return "failure", None
+            except Exception as e:
+                log("WARN: webpush send failed:", p.netloc, repr(e))
+                return "failure", None
+            if res.status_code in (404, 410):
+                return "expired", None
+            if res.status_code == 429:
+                return "rate_limited", _parse_retry_after(res)
+            if res.status_code >= 400:
+                log(f"WARN: webpush send failed: {p.netloc} http={res.status_code}")
+                return "failure", None
+            return "success", None
+
+        t0 = time.monotonic()
+        if workers == 1 or len(subs) == 1:
+            results = [push(s) for s in subs]
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(subs)), thread_name_prefix="webpush") as ex:
+                results = list(ex.map(push, subs))
+        METRICS.observe("hotdeal_notify_seconds", time.monotonic() - t0, channel="webpush")
+
+        counts = Counter(r for r, _ in results)
+        for result, n in counts.items():
+            METRICS.inc("hotdeal_notify_total", n, channel="webpush", result=result)
+        expired = {s["endpoint"] for s, (r, _) in zip(subs, results) if r == "expired"}
+        if expired:
+            self.remove(expired)
+        if counts["success"]:
+            if len(counts) > 1:
+                log("DEBUG: webpush:", dict(counts))
+            return True, None
+        waits = [ra for r, ra in results if r == "rate_limited"]
+        if waits and counts["rate_limited"] == len(results) - len(expired):
+            log(f"WARN: webpush send failed: rate limited, retry_after={max(waits)}")
+            return False, max(waits)
+        return False, None
+
+
+WEBPUSH = WebPushChannel(WEBPUSH_SUBS_FILE, WEBPUSH_KEY_FILE, WEBPUSH_PUBLIC_FILE)
+
+
+def _webpush_request(cfg: Dict, msg: str):
+    # 구독자마다 따로 보내므로 켜짐 여부만 판단(url=None). 실제 전송은 post_notification → WEBPUSH.send
+    if not cfg.get("webpush_enable") or not (cfg.get("webpush_vapid_subject") or "").strip():
+        return None
+    if not WEBPUSH.subscriptions():
+        return None
+    return None, _truncate_msg(msg, CHANNEL_MAX_CHARS["webpush"]), None
+
+
+# 채널 이름 -> (요청 생성 함수, 실패 로그 문구)
+NOTIFY_CHANNELS = {
+    "telegram": (_telegram_request, "telegram send failed"),
+    "discord": (_discord_request, "discord send failed"),
+    "ha": (_homeassistant_request, "ha notify failed"),
+    "webpush": (_webpush_request, "webpush send failed"),
+}
+
+
+def channel_enabled(cfg: Dict, channel: str) -> bool:
+    return NOTIFY_CHANNELS[channel][0](cfg, "") is not None
 
+
+def _parse_retry_after(res) -> float:
+    # Telegram: {"parameters": {"retry_after": 초}}, Discord: {"retry_after": 초} 또는 Retry-After 헤더
     try:
-        requests.post(url, headers=headers, json=payload, timeout=20).raise_for_status()
-        return True
+        body = res.json()
+    except Exception:
+        body = {}
+    if isinstance(body, dict):
+        params = body.get("parameters")
+        if isinstance(params, dict) and params.get("retry_after") is not None:
+            return float(params["retry_after"])
+        if body.get("retry_after") is not None:
+            return float(body["retry_after"])
+    try:
+        return float(res.headers.get("Retry-After", 5))
+    except Exception:
+        return 5.0
+
+
+def post_notification(channel: str, cfg: Dict, msg: str) -> Tuple[bool, float | None]:
+    """
+    채널 하나로 전송. (성공 여부, 429일 때 다시 보낼 때까지 기다릴 초)
+    채널이 꺼져 있거나 설정이 비어 있으면 (False, None).
+    """
+    build, fail_label = NOTIFY_CHANNELS[channel]
+    req = build(cfg, msg)
+    if req is None:
+        return False, None
+    url, payload, headers = req
+    if url is None:
+        # 구독자별로 따로 보내는 채널(webpush)
+        return WEBPUSH.send(cfg, payload)
+    sess = get_global_sess()
+    headers = {"Accept": "application/json", **(headers or {})}
+    t0 = time.monotonic()
+    result = "failure"
+    try:
+        res = sess.post(url, headers=headers, json=payload, timeout=20)
+        if res.status_code == 429:
+            result = "rate_limited"
+            retry_after = _parse_retry_after(res)
+            log(f"WARN: {fail_label}: rate limited, retry_after={retry_after}")
+            return False, retry_after
+        res.raise_for_status()
+        result = "success"
+        return True, None
+    except (requests.exceptions.SSLError, requests.exceptions.ConnectionError) as e:
+        log(f"WARN: {fail_label}:", repr(e))
+        recycle_host_pool(sess, url)
+        return False, None
     except Exception as e:
-        log("WARN: ha notify failed:", repr(e))
-        return False
+        log(f"WARN: {fail_label}:", repr(e))
+        return False, None
+    finally:
+        METRICS.observe("hotdeal_notify_seconds", time.monotonic() - t0, channel=channel)
+        METRICS.inc("hotdeal_notify_total", channel=channel, result=result)
+
+
+def send_telegram(cfg: Dict, msg: str) -> bool:
+    return post_notification("telegram", cfg, msg)[0]
+
+
+def send_discord(cfg: Dict, msg: str) -> bool:
+    return post_notification("discord", cfg, msg)[0]
+
+
+def send_homeassistant_notify(cfg: Dict, msg: str) -> bool:
+    return post_notification("ha", cfg, msg)[0]
+
+
+def send_webpush(cfg: Dict, msg: str) -> bool:
+    return post_notification("webpush", cfg, msg)[0]
+
+
+def publish_ha_sensors(cycle_seconds: float):
+    """주요 지표를 Home Assistant 센서(sensor.hotdeal_alarm_*)로 갱신. 실패해도 무시."""
+    token = os.getenv("SUPERVISOR_TOKEN")
+    if not token:
+        return
+    sensors = {
+        "cycle_seconds": (round(cycle_seconds, 2), {"unit_of_measurement": "s", "friendly_name": "핫딜 알람 사이클 시간"}),
+        "items": (int(METRICS.total("hotdeal_items")), {"friendly_name": "핫딜 알람 수집 글 수"}),
+        "alarms": (int(METRICS.total("hotdeal_alarms_total")), {"state_class": "total_increasing", "friendly_name": "핫딜 알람 알림 수"}),
+        "fetch_bytes": (
+            int(METRICS.total("hotdeal_fetch_bytes_total")),
+            {"unit_of_measurement": "B", "state_class": "total_increasing", "friendly_name": "핫딜 알람 수신 바이트"},
+        ),
+        "outbox_pending": (int(METRICS.total("hotdeal_outbox_pending")), {"friendly_name": "핫딜 알람 대기 알림"}),
+        "state_bytes": (int(METRICS.total("hotdeal_state_bytes")), {"unit_of_measurement": "B", "friendly_name": "핫딜 알람 state 크기"}),
+    }
+    sess = get_global_sess()
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    for name, (value, attrs) in sensors.items():
+        url = f"{SUPERVISOR_API_BASE}/states/sensor.hotdeal_alarm_{name}"
+        try:
+            sess.post(url, headers=headers, json={"state": value, "attributes": attrs}, timeout=10).raise_for_status()
+        except Exception as e:
+            log("WARN: ha sensor update failed:", name, repr(e))
+            return
+
+
+# 다이제스트: 한 사이클의 알림을 채널별로 메시지 길이 제한 안에서 최대한 묶어서 보냄
+# 채널별 메시지 최대 길이(UTF-16 글자 수 기준): Telegram 4096, Discord 2000
+# webpush: 암호화 후 4096바이트 제한 → 한글(UTF-8 3바이트)과 JSON 포장을 감안한 글자 수
+CHANNEL_MAX_CHARS = {"telegram": 4096, "discord": 2000, "ha": 4096, "webpush": 1200}
+DIGEST_SEPARATOR = "\n\n"
+
+
+def _msg_len(text: str) -> int:
+    # 두 플랫폼 모두 UTF-16 단위로 세므로 이모지 등은 2글자
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _truncate_msg(text: str, limit: int) -> str:
+    if _msg_len(text) <= limit:
+        return text
+    out = text[: limit - 1]
+    while _msg_len(out) > limit - 1:
+        out = out[:-1]
+    return out + "…"
+
+
+def pack_digest(entries: List[Tuple[str, str]], limit: int) -> List[Tuple[List[str], str]]:
+    """
+    (키, 메시지) 목록을 순서대로 limit 글자 이하 메시지로 묶는다. 반환: [(포함된 키들, 묶은 메시지)]
+    메시지 하나가 limit보다 길면 잘라서 단독으로 보냄.
+    """
+    batches: List[Tuple[List[str], str]] = []
+    keys: List[str] = []
+    parts: List[str] = []
+    size = 0
+    sep = _msg_len(DIGEST_SEPARATOR)
+    for key, msg in entries:
+        msg = _truncate_msg(msg, limit)
+        n = _msg_len(msg)
+        if parts and size + sep + n > limit:
+            batches.append((keys, DIGEST_SEPARATOR.join(parts)))
+            keys, parts, size = [], [], 0
+        size += (sep if parts else 0) + n
+        keys.append(key)
+        parts.append(msg)
+    if parts:
+        batches.append((keys, DIGEST_SEPARATOR.join(parts)))
+    return batches
+
+
+def send_digest(
+    cfg: Dict, entries: List[Tuple[str, str]], outbox: "Outbox | None" = None, meta: Dict[str, List] | None = None
+) -> set:
+    """
+    켜져 있는 채널마다 pack_digest()로 묶어서 보낸다.
+    반환: 한 채널 이상에서 전송된 묶음에 들어 있던 키 집합.
+    outbox가 있으면 채널별 대기열에 묶음과 그 안의 [키, *meta[키]] 목록을 넣고 빈 집합을 돌려준다
+    (묶음별 결과는 채널 워커가 보낸 뒤 Outbox.take_digest_results()로 알려 줌).
+    """
+    delivered = set()
+    meta = meta or {}
+    for ch in NOTIFY_CHANNELS:
+        if not channel_enabled(cfg, ch):
+            continue
+        batches = pack_digest(entries, CHANNEL_MAX_CHARS.get(ch, 4096))
+        for i, (keys, text) in enumerate(batches):
+            if outbox is not None:
+                items = [[k, *meta.get(k, ())] for k in keys]
+                outbox.enqueue_channel(ch, f"digest:{len(keys)}:{keys[0]}", text, items=items)
+                continue
+            if i:
+                time.sleep(CHANNEL_MIN_INTERVAL.get(ch, 0.0))
+            if post_notification(ch, cfg, text)[0]:
+                delivered.update(keys)
+        log(f"DEBUG: digest[{ch}]: {len(entries)} alarms in {len(batches)} messages")
+    return delivered
+
+
+# 채널별 최소 전송 간격(초): Telegram 채팅당 초당 1건, Discord webhook 2초에 5건
+CHANNEL_MIN_INTERVAL = {"telegram": 1.0, "discord": 0.4, "ha": 0.0, "webpush": 0.0}
+OUTBOX_MAX_PER_CHANNEL = 1000
+OUTBOX_BACKOFF_MAX = 600
+
+
+class Outbox:
+    """
+    채널별 전송 대기열(/data/outbox.json에 저장, 재시작해도 유지).
+    스크랩 루프는 enqueue()만 하고, 채널마다 워커 스레드가 순서대로 꺼내 보낸다.
+    - 성공: 대기열에서 제거 후 채널별 최소 간격만큼 쉼
+    - 429: retry_after 만큼 기다렸다 다시(시도 횟수는 늘리지 않음)
+    - 실패: attempts += 1, 지수 백오프. max_send_fail_retries(>0)에 도달하면 버림
+    같은 채널 안에서는 앞 메시지가 끝나야 다음으로 넘어간다(순서 유지).
+    다이제스트 묶음(items 있음)은 보냈거나 포기했을 때 (items, 성공 여부)를 결과 목록에 남기고,
+    메인 스레드가 take_digest_results()로 가져가 seen/fail_count에 반영한다(결과 목록도 파일에 저장).
+    설정(cfg)을 받기 전에는 워커가 보내지 않고 기다린다(재시작 후 복원한 대기열을 "채널 꺼짐"으로 버리지 않도록).
+    """
+
+    def __init__(self, path: str, cfg: Dict | None = None):
+        self.path = path
+        self.cfg: Dict | None = cfg
+        self._cond = threading.Condition()
+        self._queues: Dict[str, List[Dict]] = {ch: [] for ch in NOTIFY_CHANNELS}
+        self._results: List[Tuple[List, bool]] = []
+        self._seq = 0
+        self._workers: Dict[str, threading.Thread] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            log("WARN: outbox load failed:", repr(e))
+            return
+        if not isinstance(data, dict):
+            return
+        for ch, entries in (data.get("queues") or {}).items():
+            if ch in self._queues and isinstance(entries, list):
+                self._queues[ch] = [e for e in entries if isinstance(e, dict) and "msg" in e]
+        self._results = [(r[0], bool(r[1])) for r in data.get("results") or [] if isinstance(r, list) and len(r) == 2]
+        self._seq = int(data.get("seq", 0) or 0)
+        pending = {ch: len(q) for ch, q in self._queues.items() if q}
+        if pending:
+            log("DEBUG: outbox restored:", pending)
+
+    def _save(self):
+        # self._cond 잡은 상태에서만 호출
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"seq": self._seq, "queues": self._queues, "results": self._results}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def set_config(self, cfg: Dict):
+        with self._cond:
+            self.cfg = cfg
+            self._cond.notify_all()
+
+    def enqueue(self, cfg: Dict, key: str, msg: str) -> int:
+        """켜져 있는 채널마다 대기열에 추가. 반환: 추가된 채널 수"""
+        added = 0
+        with self._cond:
+            for ch in self._queues:
+                if not channel_enabled(cfg, ch):
+                    continue
+                self._append(ch, key, msg)
+                added += 1
+            if added:
+                self._save()
+                self._cond.notify_all()
+        return added
+
+    def enqueue_channel(self, channel: str, key: str, msg: str, items: List | None = None):
+        """채널 하나에만 추가(다이제스트처럼 채널마다 메시지가 다를 때). items는 묶음에 든 글([키, ...])."""
+        with self._cond:
+            self._append(channel, key, msg, items)
+            self._save()
+            self._cond.notify_all()
+
+    def _append(self, channel: str, key: str, msg: str, items: List | None = None):
+        # self._cond 잡은 상태에서만 호출
+        q = self._queues[channel]
+        self._seq += 1
+        entry = {"id": self._seq, "key": key, "msg": msg, "attempts": 0, "next_try": 0, "created": time.time()}
+        if items:
+            entry["items"] = items
+        q.append(entry)
+        if len(q) > OUTBOX_MAX_PER_CHANNEL:
+            dropped = q.pop(0)
+            self._finish(dropped, False)
+            log(f"WARN: outbox[{channel}] full, dropping oldest:", dropped.get("key"))
+
+    def _finish(self, entry: Dict, ok: bool):
+        # self._cond 잡은 상태에서만 호출. 다이제스트 묶음이면 결과를 남김
+        if entry.get("items"):
+            self._results.append((entry["items"], ok))
+
+    def take_digest_results(self) -> Tuple[List[Tuple[List, bool]], set]:
+        """
+        (끝난 다이제스트 묶음 [(items, 성공 여부)], 아직 대기열에 있는 다이제스트 글 키).
+        두 값을 한 번에 가져가야 그 사이에 끝난 묶음의 글을 다시 보내지 않는다.
+        """
+        with self._cond:
+            results, self._results = self._results, []
+            if results:
+                self._save()
+            in_flight = {it[0] for q in self._queues.values() for e in q for it in e.get("items") or ()}
+        return results, in_flight
+
+    def pending(self) -> Dict[str, int]:
+        with self._cond:
+            return {ch: len(q) for ch, q in self._queues.items()}
+
+    def start(self):
+        for ch in self._queues:
+            t = self._workers.get(ch)
+            if t is None or not t.is_alive():
+                t = threading.Thread(target=self._worker, args=(ch,), name=f"outbox-{ch}", daemon=True)
+                self._workers[ch] = t
+                t.start()
+
+    def _worker(self, channel: str):
+        while True:
+            with self._cond:
+                q = self._queues[channel]
+                while True:
+                    now = time.time()
+                    if self.cfg is not None and q and float(q[0].get("next_try", 0)) <= now:
+                        break
+                    wait = (float(q[0].get("next_try", 0)) - now) if q and self.cfg is not None else 30.0
+                    self._cond.wait(timeout=max(0.1, min(30.0, wait)))
+                entry = q[0]
+                cfg = self.cfg
+
+            if not channel_enabled(cfg, channel):
+                with self._cond:
+                    if q and q[0] is entry:
+                        q.pop(0)
+                        self._finish(entry, False)
+                        self._save()
+                log(f"WARN: outbox[{channel}] channel disabled, dropping:", entry.get("key"))
+                continue
+
+            ok, retry_after = post_notification(channel, cfg, entry["msg"])
+
+            with self._cond:
+                if not (q and q[0] is entry):
+                    continue
+                if ok:
+                    q.pop(0)
+                    self._finish(entry, True)
+                elif retry_after is not None:
+                    entry["next_try"] = time.time() + max(0.0, retry_after)
+                else:
+                    entry["attempts"] = int(entry.get("attempts", 0)) + 1
+                    try:
+                        max_fail = int(cfg.get("max_send_fail_retries", 10) or 0)
+                    except Exception:
+                        max_fail = 10
+                    if max_fail > 0 and entry["attempts"] >= max_fail:
+                        q.pop(0)
+                        self._finish(entry, False)
+                        log(f"WARN: outbox[{channel}] giving up after {entry['attempts']} attempts:", entry.get("key"))
+                    else:
+                        entry["next_try"] = time.time() + min(OUTBOX_BACKOFF_MAX, 2 ** entry["attempts"])
+                self._save()
+
+            if ok:
+                time.sleep(CHANNEL_MIN_INTERVAL.get(channel, 0.0))
+
+
+_OUTBOX: Outbox | None = None
+
+
+def get_outbox(cfg: Dict | None = None) -> Outbox:
+    """전역 대기열. cfg를 주면 설정을 넣은 뒤(처음이면 그다음에 워커 시작) 돌려준다."""
+    global _OUTBOX
+    if _OUTBOX is None:
+        _OUTBOX = Outbox(OUTBOX_FILE, cfg)
+        _OUTBOX.start()
+    elif cfg is not None:
+        _OUTBOX.set_config(cfg)
+    return _OUTBOX
+
+
+KW_MAIN = 1
+KW_DIST = 2
+KW_EXCLUDE = 4
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick 자동자. 키워드 목록 전체를 한 번 컴파일해 두고,
+    제목(소문자)을 한 글자씩 한 번만 훑어서 일치한 키워드를 모두 찾는다.
+    각 키워드에는 어느 목록(KW_MAIN/KW_DIST/KW_EXCLUDE)에 속하는지 비트마스크가 붙는다.
+    """
+
+    def __init__(self, keywords: Dict[str, int]):
+        # keywords: 소문자 키워드 -> 목록 비트마스크
+        self.words: List[str] = list(keywords.keys())
+        self.masks: List[int] = [keywords[w] for w in self.words]
+
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for idx, w in enumerate(self.words):
+            node = 0
+            for ch in w:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                node = nxt
+            out[node].append(idx)
+
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def match(self, text: str) -> Tuple[int, List[str]]:
+        """(일치한 목록 비트마스크 OR, 일치한 키워드 목록(컴파일 순서))"""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        node = 0
+        hits = set()
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                hits.update(out[node])
+
+        mask = 0
+        for idx in hits:
+            mask |= self.masks[idx]
+        return mask, [self.words[idx] for idx in sorted(hits)]
+
+
+_KEYWORD_MATCHER_CACHE: Tuple[Tuple, KeywordMatcher | None] = ((), None)
+
+
+def split_keywords(raw) -> List[str]:
+    return [k.strip() for k in (raw or "").split(",") if k.strip()]
+
+
+def get_keyword_matcher(cfg: Dict) -> KeywordMatcher | None:
+    """키워드 설정 문자열이 바뀔 때만 다시 컴파일(사이클/글마다 재사용)."""
+    global _KEYWORD_MATCHER_CACHE
+    raw_main = cfg.get("hotdeal_alarm_keyword") or ""
+    raw_dist = cfg.get("hotdeal_alarm_keyword_dist") or ""
+    raw_exclude = cfg.get("hotdeal_alarm_keyword_exclude") or ""
+    cache_key = (raw_main, raw_dist, raw_exclude)
+    if _KEYWORD_MATCHER_CACHE[0] == cache_key:
+        return _KEYWORD_MATCHER_CACHE[1]
+
+    main_kw = split_keywords(raw_main)
+    # 추가 알림 키워드가 비어 있으면 메인 키워드를 같이 사용
+    dist_kw = split_keywords(raw_dist) or main_kw
+
+    words: Dict[str, int] = {}
+    for kws, flag in ((main_kw, KW_MAIN), (dist_kw, KW_DIST), (split_keywords(raw_exclude), KW_EXCLUDE)):
+        for k in kws:
+            k = k.lower()
+            words[k] = words.get(k, 0) | flag
+
+    matcher = KeywordMatcher(words) if words else None
+    _KEYWORD_MATCHER_CACHE = (cache_key, matcher)
+    return matcher
 
 
 def should_send(cfg: Dict, title: str):
-    keywords = [k.strip() for k in (cfg.get("hotdeal_alarm_keyword") or "").split(",") if k.strip()]
-    send_all = bool(cfg.get("use_hotdeal_alarm"))
+    """
+    (메인 알림 여부, 추가 알림 여부, 일치한 키워드 목록)
+    제외 키워드가 하나라도 들어 있으면 전체 글 알림을 포함해 보내지 않는다.
+    """
+    return _match_send(
+        get_keyword_matcher(cfg),
+        bool(cfg.get("use_hotdeal_alarm")),
+        bool(cfg.get("use_hotdeal_keyword_alarm")),
+        bool(cfg.get("use_hotdeal_keyword_alarm_dist")),
+        title,
+    )
 
-    send_kw = False
-    send_kw_dist = False
-    if cfg.get("use_hotdeal_keyword_alarm") and keywords:
-        send_kw = any(k.lower() in title.lower() for k in keywords)
-    if cfg.get("use_hotdeal_keyword_alarm_dist") and keywords:
-        send_kw_dist = any(k.lower() in title.lower() for k in keywords)
 
-    return send_all or send_kw, send_kw_dist
+def _match_send(matcher: KeywordMatcher | None, send_all: bool, use_kw: bool, use_kw_dist: bool, title: str):
+    # should_send()/CyclePlan.should_send() 공통
+    if matcher is None:
+        return send_all, False, []
 
+    mask, matched = matcher.match(title.lower())
+    if mask & KW_EXCLUDE:
+        return False, False, []
 
-def main():
-    os.makedirs(DATA_DIR, exist_ok=True)
-    log("DEBUG: addon started, entering main loop")
+    return send_all or (use_kw and bool(mask & KW_MAIN)), use_kw_dist and bool(mask & KW_DIST), matched
+
+
+# should_send() 결과를 바꾸는 설정. board_cache 항목에 해시(alarm_sig)를 같이 저장한다
+ALARM_CONFIG_KEYS = (
+    "use_hotdeal_alarm", "use_hotdeal_keyword_alarm", "use_hotdeal_keyword_alarm_dist",
+    "hotdeal_alarm_keyword", "hotdeal_alarm_keyword_dist", "hotdeal_alarm_keyword_exclude",
+)
 
-    while True:
-        cycle_start = time.time()
-        log("DEBUG: cycle start")
 
-        cfg = load_config()
-        state = load_state()
+def alarm_config_sig(cfg: Dict) -> str:
+    """알림 대상 판단 설정의 해시. 바뀌면 변경 없는 게시판의 이전 목록도 다시 판단한다(새 키워드에 맞는 글 알림)."""
+    raw = json.dumps([cfg.get(k) for k in ALARM_CONFIG_KEYS], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
 
-        max_fail = int(cfg.get("max_send_fail_retries", 10) or 0)
-        keep_factor = float(cfg.get("state_keep_factor", 1.5) or 1.5)
-        keep_min = int(cfg.get("state_keep_min", 50) or 50)
 
+# 설정 파일 변경 확인 간격(대기 중). 바뀌면 남은 대기 시간을 건너뛰고 바로 다시 확인
+CONFIG_POLL_SEC = 1.0
+
+
+class CyclePlan:
+    """
+    설정(options.json)에서 미리 계산해 둔 사이클 실행 계획(읽기 전용).
+    설정 파일 내용이 바뀔 때만 새로 만들고, 사이클/글마다는 여기 값을 조회만 한다.
+    cfg는 읽기 전용 사본(기존 cfg를 받는 함수에 그대로 넘김), sig는 설정 파일 내용 해시.
+    """
+
+    __slots__ = (
+        "cfg", "sig", "jobs", "url_prefix", "interval", "max_fail", "keep_factor", "keep_min", "seen_ttl",
+        "template", "matcher", "send_all", "use_kw", "use_kw_dist", "use_outbox", "dedupe_window", "dedupe_similarity",
+        "digest", "backfill_max_alarms", "cycle_budget", "breaker_threshold", "breaker_backoff_max",
+    )
+
+    def __init__(self, cfg: Dict, sig: str = ""):
+        cfg = MappingProxyType(dict(cfg))
+        try:
+            seen_ttl = float(cfg.get("seen_ttl_days", 0) or 0) * 86400
+        except Exception:
+            seen_ttl = 0.0
+        try:
+            dedupe_window = float(cfg.get("dedupe_window_hours", 6) or 0) * 3600
+            dedupe_similarity = float(cfg.get("dedupe_title_similarity", 0.7))
+        except Exception:
+            dedupe_window, dedupe_similarity = 6 * 3600.0, 0.7
+        interval = get_cycle_interval(cfg)
         try:
-            items = scrape_board_items(cfg)
+            # 0이면 주기의 80%
+            cycle_budget = float(cfg.get("cycle_budget_sec", 0) or 0) or interval * 0.8
+        except Exception:
+            cycle_budget = interval * 0.8
+        jobs = tuple(MappingProxyType(job) for job in get_board_jobs(cfg))
+        values = {
+            "cfg": cfg,
+            "sig": sig,
+            "jobs": jobs,
+            "url_prefix": MappingProxyType({job["site"]: get_url_prefix(job["site"]) for job in jobs}),
+            "interval": interval,
+            "max_fail": int(cfg.get("max_send_fail_retries", 10) or 0),
+            "keep_factor": float(cfg.get("state_keep_factor", 1.5) or 1.5),
+            "keep_min": int(cfg.get("state_keep_min", 50) or 50),
+            "seen_ttl": seen_ttl,
+            "template": (cfg.get("alarm_message_template", "{title}\n{url}\n{mall_url}") or "").replace("\\n", "\n"),
+            "matcher": get_keyword_matcher(cfg),
+            "send_all": bool(cfg.get("use_hotdeal_alarm")),
+            "use_kw": bool(cfg.get("use_hotdeal_keyword_alarm")),
+            "use_kw_dist": bool(cfg.get("use_hotdeal_keyword_alarm_dist")),
+            "use_outbox": bool(cfg.get("notify_outbox_enable", True)),
+            "digest": bool(cfg.get("digest_enable")),
+            "backfill_max_alarms": max(0, int(cfg.get("backfill_max_alarms", 10) or 0)),
+            "cycle_budget": cycle_budget,
+            "breaker_threshold": max(1, int(cfg.get("breaker_fail_threshold", 3) or 3)),
+            "breaker_backoff_max": float(cfg.get("breaker_backoff_max_sec", 1800) or 1800),
+            # 0이면 중복 확인 안 함
+            "dedupe_window": dedupe_window if cfg.get("dedupe_enable") else 0.0,
+            "dedupe_similarity": dedupe_similarity,
+        }
+        for k, v in values.items():
+            object.__setattr__(self, k, v)
 
-            keep_keys: List[str] = []
-            for it in items:
-                site = it["site"]
-                board = it["board"]
-                raw_url = it["url"]
-                full_url = raw_url if raw_url.startswith("http") else (get_url_prefix(site) + raw_url)
-                keep_keys.append(f"{site}:{board}:{full_url}")
+    def __setattr__(self, name, value):
+        raise AttributeError("CyclePlan is read-only")
 
-            trim_state_to_firstpage(state, keep_keys, keep_factor=keep_factor, keep_min=keep_min)
+    def item_key(self, site: str, board: str, raw_url: str) -> Tuple[str, str]:
+        """(전체 주소, state 키 site:board:url)"""
+        if raw_url.startswith("http"):
+            full_url = raw_url
+        else:
+            prefix = self.url_prefix.get(site)
+            full_url = (get_url_prefix(site) if prefix is None else prefix) + raw_url
+        return full_url, f"{site}:{board}:{full_url}"
+
+    def should_send(self, title: str):
+        """should_send(cfg, title)과 같은 결과(미리 만든 키워드 매처/설정값 사용)."""
+        return _match_send(self.matcher, self.send_all, self.use_kw, self.use_kw_dist, title)
+
+    def format_message(self, title: str, site: str, board: str, url: str, mall_url: str) -> str:
+        return format_message(self.template, title, site, board, url, mall_url)
+
+
+class ConfigWatcher:
+    """
+    설정 파일의 (mtime, 크기, inode)가 바뀌었을 때만 다시 읽고, 내용 해시까지 바뀌었으면 새 CyclePlan을 만든다.
+    읽는 도중(쓰는 중) JSON이 깨져 있으면 이전 계획을 유지하고, 그 상태의 파일 정보를 기록해서
+    파일이 다시 바뀔 때 읽는다(깨진 파일 때문에 대기를 계속 깨우지 않도록).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.plan: CyclePlan | None = None
+        self._stat = None
+
+    def _stat_sig(self):
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def changed(self) -> bool:
+        try:
+            return self._stat_sig() != self._stat
+        except OSError:
+            return False
+
+    def load(self) -> Tuple[CyclePlan, bool]:
+        """(계획, 새로 만들었는지)"""
+        sig = self._stat_sig()
+        if self.plan is not None and sig == self._stat:
+            return self.plan, False
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        if self.plan is not None and digest == self.plan.sig:
+            self._stat = sig
+            return self.plan, False
+
+        t0 = time.perf_counter()
+        try:
+            cfg = json.loads(raw.decode("utf-8"))
+        except ValueError as e:
+            if self.plan is None:
+                raise
+            log("WARN: config file unreadable, keeping previous plan:", repr(e))
+            self._stat = sig
+            return self.plan, False
+        self.plan = CyclePlan(cfg, digest)
+        self._stat = sig
+        log(f"DEBUG: cycle plan built in {(time.perf_counter() - t0) * 1000:.2f}ms ({len(self.plan.jobs)} boards)")
+        return self.plan, True
+
+    def wait(self, timeout: float) -> bool:
+        """최대 timeout초 대기. 그 사이 설정 파일이 바뀌면 바로 True."""
+        end = time.monotonic() + timeout
+        while True:
+            left = end - time.monotonic()
+            if left <= 0:
+                return False
+            time.sleep(min(CONFIG_POLL_SEC, left))
+            if self.changed():
+                return True
+
+
+# 공백 메우기 대기 목록(state["backfill"]) 최대 길이
+BACKFILL_BACKLOG_MAX = 1000
+
+
+def run_cycle(cfg: Dict, state: Dict, outbox: "Outbox | None" = None, plan: CyclePlan | None = None):
+    """
+    한 사이클: 게시판 수집 → trim/저장 → 상세 페이지(mall_url) → 알림.
+    outbox가 있으면 알림은 대기열에 넣고, 없으면 바로 전송한다.
+    plan이 없으면 cfg로 만든다(메인 루프는 설정이 바뀔 때만 만든 계획을 넘김).
+    """
+    if plan is None:
+        plan = CyclePlan(cfg)
+    cfg = plan.cfg
+    max_fail = plan.max_fail
+    cluster = get_cluster()
+    set_cycle_deadline(plan.cycle_budget)
+    BREAKERS.configure(plan.breaker_threshold, plan.breaker_backoff_max)
+    if not BREAKERS.restored:
+        BREAKERS.restore(state.get("host_health"))
+
+    stage_t0 = time.monotonic()
+    scrape_stats: Dict = {}
+    items = scrape_board_items(cfg, state, scrape_stats, jobs=plan.jobs)
+    # 글마다 주소/키는 한 번만 계산(trim, 상세 페이지, 알림 단계가 같이 사용)
+    for it in items:
+        it["full_url"], it["key"] = plan.item_key(it["site"], it["board"], it["url"])
+
+    # 새로 받은 목록의 알림 대상 글은 알림 단계가 끝날 때까지 fail_count(0회)에 둔다.
+    # board_cache(ETag/본문 해시)는 알림 전에 저장되므로, 사이클이 중간에 예외로 끝나도 다음 사이클에
+    # 304/같은 해시(unchanged)로 건너뛰지 않고 다시 시도한다.
+    # 공백 메우기로 가져온 알림 대상 글은 state["backfill"] 대기 목록(목록 순서상 최근 글 먼저)에 넣고,
+    # 사이클마다 앞에서부터 backfill_max_alarms건(0이면 전부)만 알림 단계로 넘긴다. 나머지는 다음 사이클로 미룸.
+    backlog = state.setdefault("backfill", {})
+    page_items = []
+    for it in items:
+        if it.get("unchanged") or state["seen"].get(it["key"]):
+            page_items.append(it)
+            continue
+        send_main, send_dist, _ = it["send"] = plan.should_send((it["title"] or "").strip())
+        if it.get("backfill"):
+            if send_main or send_dist:
+                backlog.setdefault(it["key"], [it["site"], it["board"], it["title"], it["url"]])
+            continue
+        if send_main or send_dist:
+            state["fail_count"].setdefault(it["key"], 0)
+        page_items.append(it)
+    items = page_items
+    if len(backlog) > BACKFILL_BACKLOG_MAX:
+        # 너무 오래 밀린 경우 가장 오래된 글(뒤쪽)부터 버림
+        for key in list(backlog)[BACKFILL_BACKLOG_MAX:]:
+            del backlog[key]
+        log(f"WARN: backfill backlog over {BACKFILL_BACKLOG_MAX}, dropped the oldest alarms")
+    taken = 0
+    for key, entry in list(backlog.items()):
+        if plan.backfill_max_alarms and taken >= plan.backfill_max_alarms:
+            break
+        site, board, title, url = entry
+        # 이미 처리했거나(본 것) 설정이 바뀌어 더 이상 알림 대상이 아니면 목록에서 뺌. 알림 단계에서 본 것이 될 때까지는 남겨 둠
+        send = plan.should_send((title or "").strip())
+        if state["seen"].get(key) or not (send[0] or send[1]):
+            del backlog[key]
+            continue
+        it = {"site": site, "board": board, "title": title, "url": url, "backfill": True, "send": send}
+        it["full_url"], it["key"] = plan.item_key(site, board, url)
+        items.append(it)
+        taken += 1
+    METRICS.set("hotdeal_backfill_backlog", len(backlog) - taken)
+    if len(backlog) > taken:
+        log(f"DEBUG: backfill: {taken} older alarms this cycle, {len(backlog) - taken} deferred (backfill_max_alarms={plan.backfill_max_alarms})")
+    METRICS.observe("hotdeal_stage_seconds", time.monotonic() - stage_t0, stage="scrape")
+    METRICS.set("hotdeal_items", len(items))
+    stage_t0 = time.monotonic()
+    boards_total = scrape_stats.get("boards", 0)
+    boards_skipped = scrape_stats.get("skipped", 0)
+    boards_not_due = scrape_stats.get("not_due", 0) + scrape_stats.get("deferred", 0)
+    state["host_health"] = BREAKERS.snapshot()
+    log(
+        f"BOARDS unchanged (skipped): {boards_skipped}/{boards_total}, not due: {scrape_stats.get('not_due', 0)}, "
+        f"stream saved: {scrape_stats.get('bytes_saved', 0)}B, backfilled: {scrape_stats.get('backfilled', 0)}, "
+        f"deferred: {scrape_stats.get('deferred', 0)}"
+    )
+    if state["host_health"]:
+        log("DEBUG: breaker state:", {h: v.get("state") for h, v in state["host_health"].items()})
+
+    if boards_total and boards_skipped + boards_not_due == boards_total:
+        # 모든 게시판이 304/동일 본문/확인 시각 전 → 목록이 그대로이므로 trim도 생략
+        save_state(state)
+    else:
+        keep_keys = [it["key"] for it in items]
+        trim_state_to_firstpage(state, keep_keys, keep_factor=plan.keep_factor, keep_min=plan.keep_min, ttl_sec=plan.seen_ttl)
+        save_state(state)
+        log(
+            "DEBUG: state sizes after trim:",
+            {k: len(state.get(k, {})) for k in ("seen", "mall_cache", "fail_count")},
+        )
+
+    METRICS.observe("hotdeal_stage_seconds", time.monotonic() - stage_t0, stage="trim_save")
+
+    log("ITEMS scraped:", len(items))
+    c = Counter((it.get("site"), it.get("board")) for it in items)
+    log("ITEMS by site/board:", dict(c))
+
+    dedupe = None
+    if plan.dedupe_window > 0:
+        dedupe = get_dedupe_index(state.setdefault("dedupe", {}), plan.dedupe_window, plan.dedupe_similarity)
+    elif state.get("dedupe"):
+        # 새 객체로 바꿔 두면 다시 켤 때 get_dedupe_index()가 색인을 새로 만든다
+        state["dedupe"] = {}
+
+    def record_result(key: str, sent_any: bool, t: str, mall_norm: str):
+        if sent_any:
+            seen_mark(state, key)
+            if dedupe is not None:
+                dedupe.add(key, t, mall_norm)
+            if key in state["fail_count"]:
+                del state["fail_count"][key]
+        else:
+            # 실패 횟수 카운트
+            cur = int(state["fail_count"].get(key, 0)) + 1
+            state["fail_count"][key] = cur
+            # (max_fail에 도달하면 seen 처리)
+            if max_fail > 0 and cur >= max_fail:
+                seen_mark(state, key)
+                del state["fail_count"][key]
+        if cluster is not None:
+            cluster.finish(key, done=bool(state["seen"].get(key)))
+
+    # 대기열로 보낸 다이제스트 묶음의 결과 반영. 아직 대기열에 있는 글은 이번 사이클에 다시 넣지 않음
+    in_flight: set = set()
+    if outbox is not None:
+        results, in_flight = outbox.take_digest_results()
+        for batch, ok in results:
+            for key, t, mall_norm in batch:
+                if ok:
+                    record_result(key, True, t, mall_norm)
+                elif not state["seen"].get(key):
+                    # 채널 워커가 max_send_fail_retries번 시도하고 포기한 묶음: 직접 전송에서 한도에 도달한 것과 같게 처리
+                    state["fail_count"][key] = max(max_fail - 1, int(state["fail_count"].get(key, 0)))
+                    record_result(key, False, t, mall_norm)
+        if results:
             save_state(state)
+            log(f"DEBUG: digest results: {sum(len(b) for b, ok in results if ok)} delivered, {sum(len(b) for b, ok in results if not ok)} failed")
+
+    detail_t0 = time.time()
+    detail_n = prefetch_mall_urls(cfg, state, items, plan, dedupe, in_flight)
+    if detail_n:
+        log(f"DEBUG: mall_url prefetched: {detail_n} pages ({time.time() - detail_t0:.1f}s)")
+    METRICS.observe("hotdeal_stage_seconds", time.time() - detail_t0, stage="detail")
+    stage_t0 = time.monotonic()
+
+    # 다이제스트 모드: (키, 메시지, 정규화 제목, 정규화 구매 링크)를 모았다가 사이클 끝에 채널별로 묶어서 전송
+    digest: List[Tuple[str, str, str, str]] | None = [] if plan.digest else None
+    # 아직 보내지 않은 다이제스트 항목끼리의 중복 확인용
+    digest_dedupe = DedupeIndex({}, float("inf"), dedupe.threshold) if digest is not None and dedupe is not None else None
+
+    for it in items:
+        site = it["site"]
+        board = it["board"]
+        title = (it["title"] or "").strip()
+        raw_url = it["url"]
+        full_url = it["full_url"]
+        key = it["key"]
+
+        # 변경 없는 게시판: 이전 사이클에 이미 판단한 글이므로 재전송 대기(fail_count)만 다시 시도
+        if it.get("unchanged") and key not in state["fail_count"]:
+            continue
+
+        if state["seen"].get(key) or key in in_flight:
+            continue
+
+        send_main, send_dist, matched = it.get("send") or plan.should_send(title)
+        wants_detail = bool(send_main or send_dist)
+
+        if wants_detail and cluster is not None and not cluster.claim(key):
+            # 다른 노드가 이미 보냈거나 보내는 중
+            seen_mark(state, key)
+            state["fail_count"].pop(key, None)
+            save_state(state)
+            continue
+
+        # 다른 게시판에서 이미 알린 딜이면 알리지 않고 본 것으로 처리
+        # (제목이 거의 같으면 상세 페이지도 받지 않음, 아니면 상세 페이지의 구매 링크로 한 번 더 확인)
+        t, mall_norm, dup, how = "", "", None, ""
+        if wants_detail and dedupe is not None:
+            t = it["title_norm"] if "title_norm" in it else normalize_title(title)
+            dup, how = dedupe.find_title(t, key), "title"
+            if dup is None and digest_dedupe is not None:
+                dup = digest_dedupe.find_title(t, key)
+
+        mall_url = ""
+        if wants_detail and dup is None:
+            # mall_url은 실패해도 게시물 주소(key) 기준으로 한 번만 시도(빈 값도 저장)
+            if key in state["mall_cache"]:
+                METRICS.inc("hotdeal_mall_cache_total", result="hit")
+                mall_url = state["mall_cache"].get(key, "")
+            else:
+                METRICS.inc("hotdeal_mall_cache_total", result="miss")
+                mall_url = scrape_mall_url(site, raw_url)   # <= 정규식은 그대로 scrape_mall_url() 안에 있음
+                if not mall_url and not host_available(full_url):
+                    # 예산 소진/차단으로 상세 페이지를 못 받음: 다음 사이클에 다시(실패 횟수는 늘리지 않음,
+                    # fail_count에 있어야 변경 없는 게시판에서도 다시 확인함)
+                    METRICS.inc("hotdeal_budget_skips_total", kind="alarm")
+                    state["fail_count"].setdefault(key, 0)
+                    if cluster is not None:
+                        cluster.finish(key, done=False)
+                    continue
+                state["mall_cache"][key] = mall_url         # 빈 값도 저장
+            if dedupe is not None:
+                mall_norm = normalize_mall_url(mall_url)
+                dup, how = dedupe.find_mall(mall_norm, key), "mall"
+                if dup is None and digest_dedupe is not None:
+                    dup = digest_dedupe.find_mall(mall_norm, key)
+
+        if not (send_main or send_dist):
+            continue
+
+        if dup is not None:
+            METRICS.inc("hotdeal_dedupe_total", match=how)
+            log(f"DUP({how}): {site_map.get(site, site)} / {board_map.get(board, board)} | {title} | {full_url} | same as {dup}")
+            seen_mark(state, key)
+            state["fail_count"].pop(key, None)
+            if cluster is not None:
+                cluster.finish(key, done=True)
+            save_state(state)
+            continue
+
+        msg = plan.format_message(title, site, board, full_url, mall_url)
+
+        kinds = [kind for kind, on in (("main", send_main), ("dist", send_dist)) if on]
+        for kind in kinds:
+            METRICS.inc("hotdeal_alarms_total", kind=kind)
             log(
-                "DEBUG: state sizes after trim:",
-                {k: len(state.get(k, {})) for k in ("seen", "mall_cache", "fail_count")},
+                f"ALARM({kind}): {site_map.get(site, site)} / {board_map.get(board, board)} | {title} | {full_url} | mall={bool(mall_url)} | kw={matched}"
             )
 
-            log("ITEMS scraped:", len(items))
-            c = Counter((it.get("site"), it.get("board")) for it in items)
-            log("ITEMS by site/board:", dict(c))
+        if digest is not None:
+            # 다이제스트: 글당 한 번만 넣고(main/dist 둘 다여도) 사이클 끝에 묶어서 보낸 뒤 결과를 반영
+            digest.append((key, msg, t, mall_norm))
+            if digest_dedupe is not None:
+                digest_dedupe.add(key, t, mall_norm)
+            continue
 
-            for it in items:
-                site = it["site"]
-                board = it["board"]
-                title = (it["title"] or "").strip()
-                raw_url = it["url"]
+        # main/dist 각각 한 번씩 보냄
+        sent_any = False
+        for _ in kinds:
+            if outbox is not None:
+                # 대기열에 들어가면 전송/재시도는 채널 워커가 맡음
+                sent_any = (outbox.enqueue(cfg, key, msg) > 0 or sent_any)
+            else:
+                sent_any = (send_telegram(cfg, msg) or sent_any)
+                sent_any = (send_discord(cfg, msg) or sent_any)
+                sent_any = (send_homeassistant_notify(cfg, msg) or sent_any)
+                sent_any = (send_webpush(cfg, msg) or sent_any)
+
+        record_result(key, sent_any, t, mall_norm)
+        save_state(state)
+
+    if digest and outbox is not None:
+        # 대기열: 묶음이 실제로 전송된 뒤(다음 사이클 시작 때) seen/fail_count에 반영
+        send_digest(cfg, [(key, msg) for key, msg, _, _ in digest], outbox, {key: [t, mall_norm] for key, _, t, mall_norm in digest})
+        log(f"DEBUG: digest queued {len(digest)} alarms")
+    elif digest:
+        delivered = send_digest(cfg, [(key, msg) for key, msg, _, _ in digest])
+        for key, _, t, mall_norm in digest:
+            record_result(key, key in delivered, t, mall_norm)
+        save_state(state)
+        log(f"DEBUG: digest delivered {len(delivered)}/{len(digest)} alarms")
+
+    METRICS.observe("hotdeal_stage_seconds", time.monotonic() - stage_t0, stage="notify")
+    health = BREAKERS.snapshot()
+    if health != state["host_health"]:
+        state["host_health"] = health
+        save_state(state)
+    set_cycle_deadline(0)
+    record_state_metrics(state)
+
+
+# ---- 사이클 프로파일링 ----
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+PROFILE_KEEP = 20   # 남길 사이클 수(.prof/.tracemalloc 한 묶음 기준, 오래된 것부터 삭제)
+PROFILE_TOP = 15    # 로그에 남길 함수/할당 위치 수
+
+
+class CycleProfiler:
+    """
+    다음 N사이클의 run_cycle()을 cProfile로(선택: tracemalloc도) 측정한다.
+    환경 변수 PROFILE_CYCLES/PROFILE_TRACEMALLOC이 옵션(profile_cycles/profile_tracemalloc)보다 우선.
+    남은 사이클이 0이면 main()이 run_cycle을 그대로 부르므로 꺼져 있을 때 추가 비용은 없다.
+
+    결과(PROFILE_DIR):
+      cycle-<시각>.prof        pstats/snakeviz로 열기
+      cycle-<시각>.tracemalloc tracemalloc.Snapshot.load()로 열기
+    cProfile은 메인 스레드만 잰다. 수집 스레드(fetch_many) 안의 시간은 결과를 기다린 시간으로 보인다.
+    """
 
-                full_url = raw_url if raw_url.startswith("http") else (get_url_prefix(site) + raw_url)
-                key = f"{site}:{board}:{full_url}"
+    def __init__(self):
+        self.remaining = 0
+        self.tracemalloc = False
+        self._sig = None
 
-                if state["seen"].get(key):
-                    continue
+    def configure(self, cfg: Dict):
+        """설정(또는 환경 변수) 값이 바뀌었을 때만 남은 사이클 수를 다시 정한다."""
+        try:
+            n = max(0, int(os.getenv("PROFILE_CYCLES") or cfg.get("profile_cycles") or 0))
+        except ValueError:
+            n = 0
+        env_mem = os.getenv("PROFILE_TRACEMALLOC")
+        if env_mem:
+            mem = env_mem.strip().lower() in ("1", "true", "yes", "on")
+        else:
+            mem = bool(cfg.get("profile_tracemalloc"))
+        if (n, mem) == self._sig:
+            return
+        self._sig = (n, mem)
+        self.remaining, self.tracemalloc = n, mem
+        if n:
+            log(f"DEBUG: profiling next {n} cycle(s){' with tracemalloc' if mem else ''} ->", PROFILE_DIR)
+
+    def run(self, fn: Callable, *args):
+        import cProfile
+        import tracemalloc
+
+        self.remaining -= 1
+        base = os.path.join(PROFILE_DIR, "cycle-" + datetime.now().strftime("%Y%m%d-%H%M%S-%f")[:-3])
+        mem = self.tracemalloc and not tracemalloc.is_tracing()
+        start = None
+        if mem:
+            tracemalloc.start()
+            start = tracemalloc.take_snapshot()
+        prof = cProfile.Profile()
+        t0 = time.perf_counter()
+        try:
+            return prof.runcall(fn, *args)
+        finally:
+            elapsed = time.perf_counter() - t0
+            snap = peak = None
+            if mem:
+                peak = tracemalloc.get_traced_memory()[1]
+                snap = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+            try:
+                self._report(base, prof, elapsed, start, snap, peak)
+            except OSError as e:
+                log("WARN: profile write failed:", repr(e))
+
+    def _report(self, base: str, prof, elapsed: float, start, snap, peak):
+        import pstats
+        import tracemalloc
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        prof.dump_stats(base + ".prof")
+        rows = sorted(pstats.Stats(prof).stats.items(), key=lambda kv: kv[1][2], reverse=True)[:PROFILE_TOP]
+        log(f"DEBUG: profile {os.path.basename(base)}.prof (cycle {elapsed:.2f}s, {self.remaining} left), top by self time:")
+        for (path, line, name), (_cc, nc, tt, ct, _callers) in rows:
+            where = f"{os.path.basename(path)}:{line}({name})" if line else name
+            log(f"  {tt * 1000:9.1f}ms self {ct * 1000:9.1f}ms cum {nc:8d} calls  {where}")
+
+        if snap is not None:
+            skip = (tracemalloc.Filter(False, tracemalloc.__file__),)
+            snap = snap.filter_traces(skip)
+            snap.dump(base + ".tracemalloc")
+            log(f"DEBUG: allocations {os.path.basename(base)}.tracemalloc (peak {peak / 1e6:.1f}MB), top growth by line:")
+            for st in snap.compare_to(start.filter_traces(skip), "lineno")[:PROFILE_TOP]:
+                fr = st.traceback[0]
+                log(f"  {st.size_diff / 1024:+10.1f}KiB {st.count_diff:+8d} blocks  {os.path.basename(fr.filename)}:{fr.lineno}")
+
+        stems = sorted({os.path.splitext(f)[0] for f in os.listdir(PROFILE_DIR) if f.startswith("cycle-")})
+        for stem in stems[:-PROFILE_KEEP]:
+            for ext in (".prof", ".tracemalloc"):
+                try:
+                    os.remove(os.path.join(PROFILE_DIR, stem + ext))
+                except FileNotFoundError:
+                    pass
 
-                send_main, send_dist = should_send(cfg, title)
-                wants_detail = bool(send_main or send_dist)
 
-                mall_url = ""
-                if wants_detail:
-                    # mall_url은 실패해도 게시물 주소(key) 기준으로 한 번만 시도(빈 값도 저장)
-                    if key in state["mall_cache"]:
-                        mall_url = state["mall_cache"].get(key, "")
-                    else:
-                        mall_url = scrape_mall_url(site, raw_url)   # <= 정규식은 그대로 scrape_mall_url() 안에 있음
-                        state["mall_cache"][key] = mall_url         # 빈 값도 저장
+PROFILER = CycleProfiler()
 
-                if not (send_main or send_dist):
-                    continue
 
-                msg = format_message(
-                    cfg.get("alarm_message_template", "{title}\n{url}\n{mall_url}"),
-                    title,
-                    site,
-                    board,
-                    full_url,
-                    mall_url,
-                )
+def main():
+    os.makedirs(DATA_DIR, exist_ok=True)
+    log("DEBUG: addon started, entering main loop")
 
-                sent_any = False
-
-                if send_main:
-                    log(
-                        f"ALARM(main): {site_map.get(site, site)} / {board_map.get(board, board)} | {title} | {full_url} | mall={bool(mall_url)}"
-                    )
-                    sent_any = (send_telegram(cfg, msg) or sent_any)
-                    sent_any = (send_discord(cfg, msg) or sent_any)
-                    sent_any = (send_homeassistant_notify(cfg, msg) or sent_any)
-
-                if send_dist:
-                    log(
-                        f"ALARM(dist): {site_map.get(site, site)} / {board_map.get(board, board)} | {title} | {full_url} | mall={bool(mall_url)}"
-                    )
-                    sent_any = (send_telegram(cfg, msg) or sent_any)
-                    sent_any = (send_discord(cfg, msg) or sent_any)
-                    sent_any = (send_homeassistant_notify(cfg, msg) or sent_any)
-
-                if sent_any:
-                    state["seen"][key] = time.time()
-                    if key in state["fail_count"]:
-                        del state["fail_count"][key]
-                    save_state(state)
-                else:
-                    # 실패 횟수 카운트
-                    cur = int(state["fail_count"].get(key, 0)) + 1
-                    state["fail_count"][key] = cur
-                    # (max_fail에 도달하면 seen 처리)
-                    if max_fail > 0 and cur >= max_fail:
-                        state["seen"][key] = time.time()
-                        del state["fail_count"][key]
-                    save_state(state)
+    # 고정 주기(fixed-rate): 다음 사이클 시작 시각은 사이클 소요 시간과 무관하게 일정 간격
+    next_cycle = time.monotonic()
+    # 설정은 파일이 바뀔 때만 다시 읽어서 CyclePlan으로 만든다
+    watcher = ConfigWatcher(CONFIG_PATH)
+    # state는 메모리에 두고 바뀔 때마다 저장만 한다(매 사이클 파일을 다시 읽지 않음).
+    # 저장 방식 설정이 바뀌었거나 사이클이 예외로 끝났으면 파일에서 다시 읽는다.
+    state = None
+
+    while True:
+        cycle_start = time.time()
+        log("DEBUG: cycle start")
+
+        t0 = time.perf_counter()
+        plan, plan_changed = watcher.load()
+        cfg = plan.cfg
+        if plan_changed:
+            configure_state_store(cfg)
+            configure_http_pools(cfg)
+            configure_metrics(cfg)
+            configure_cluster(cfg)
+            PROFILER.configure(cfg)
+            if plan.use_outbox:
+                get_outbox(cfg)
+        plan_ms = (time.perf_counter() - t0) * 1000
+        if state is None or plan_changed:
+            state = load_state()
+
+        outbox = get_outbox() if plan.use_outbox else None
 
+        try:
+            if PROFILER.remaining:
+                PROFILER.run(run_cycle, cfg, state, outbox, plan)
+            else:
+                run_cycle(cfg, state, outbox, plan)
+            METRICS.inc("hotdeal_cycles_total", result="ok")
         except Exception as e:
+            METRICS.inc("hotdeal_cycles_total", result="error")
+            state = None
             log("ERROR:", repr(e))
             log(traceback.format_exc())
             if "No file descriptors available" in repr(e):
                 log("FATAL: No file descriptors available, exiting to trigger restart...")
                 sys.exit(1)
 
-        interval = int(cfg.get("interval_min", 1))
-        sleep_s = max(60, interval * 60)
+        tick = plan.interval
+        next_cycle += tick
+        now_mono = time.monotonic()
+        if next_cycle < now_mono:
+            # 사이클이 주기보다 오래 걸렸으면 밀린 주기는 건너뛰고 다음 정시에 맞춤
+            next_cycle += math.ceil((now_mono - next_cycle) / tick) * tick
+        sleep_s = max(0.0, next_cycle - now_mono)
         elapsed = time.time() - cycle_start
-        log(f"DEBUG: cycle end (elapsed={elapsed:.1f}s); sleeping {sleep_s}s")
-        time.sleep(sleep_s)
+        METRICS.observe("hotdeal_cycle_seconds", elapsed)
+        if outbox is not None:
+            pending_all = outbox.pending()
+            for ch, n in pending_all.items():
+                METRICS.set("hotdeal_outbox_pending", n, channel=ch)
+            pending = {ch: n for ch, n in pending_all.items() if n}
+            if pending:
+                log("DEBUG: outbox pending:", pending)
+        if cfg.get("metrics_ha_sensors_enable"):
+            publish_ha_sensors(elapsed)
+        log(
+            f"DEBUG: cycle end (elapsed={elapsed:.1f}s, plan={'rebuilt' if plan_changed else 'reused'} "
+            f"{plan_ms:.2f}ms); sleeping {sleep_s:.1f}s"
+        )
+        if watcher.wait(sleep_s):
+            # 설정이 바뀌면 남은 대기 없이 바로 다시 확인하고, 주기도 지금부터 다시 셈
+            log("DEBUG: config changed, rescanning now")
+            next_cycle = time.monotonic()
 
 
 if __name__ == "__main__":
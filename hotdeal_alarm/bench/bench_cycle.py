@@ -0,0 +1,409 @@
+"""
+오프라인 사이클 벤치마크.
+
+bench/fixtures/의 목록/상세 페이지(뽐뿌는 euc-kr 그대로)를 사이트별 로컬 스텁 서버로 내보내고,
+텔레그램/디스코드/HA(supervisor) 알림도 로컬 스텁 엔드포인트로 받는다. 실제 사이트에는 접속하지 않음.
+
+측정 단계(단계별 ms: mean/p50/p95/min/max):
+  - parse       : parse_board_items() — 모든 게시판 목록 파싱
+  - scrape      : scrape_board_items() — 스텁 서버에서 목록 수집 + 파싱(빈 state)
+  - should_send : 수집된 모든 제목에 대해 should_send()
+  - trim        : trim_state_to_firstpage() — seen/mall_cache에 오래된 키가 쌓인 state
+  - save_state  : save_state() — 새 글 하나 표시 후 저장(--backend)
+  - cycle_cold  : run_cycle() 빈 state에서 시작(새 글 전부 → 상세 페이지 + 알림)
+  - cycle_warm  : run_cycle() 직전 사이클 state 그대로(새 글 없음)
+--scale 1 10 : 목록 페이지 본문을 배수로 복제(글 번호를 바꿔서)해 글 수를 늘림
+
+결과는 JSON(--out, 기본 표준출력). 버전 간 비교:
+  python bench/bench_cycle.py --scale 1 10 --repeat 5 --out new.json
+  python bench/bench_cycle.py --compare old.json new.json
+"""
+import argparse
+import contextlib
+import copy
+import glob
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+
+# main.py는 import 시점에 경로/알림 주소를 읽으므로 먼저 환경을 맞춘다
+DATA_DIR = tempfile.mkdtemp(prefix="hotdeal_bench_")
+os.environ["DATA_DIR"] = DATA_DIR
+os.environ.setdefault("SUPERVISOR_TOKEN", "bench")
+
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "app"))
+
+import main  # noqa: E402
+
+ALL_BOARDS = [
+    ("ppomppu", "ppomppu"),
+    ("ppomppu", "ppomppu4"),
+    ("ppomppu", "ppomppu8"),
+    ("ppomppu", "money"),
+    ("clien", "allsell"),
+    ("clien", "jirum"),
+    ("ruriweb", "1020"),
+    ("ruriweb", "600004"),
+    ("coolenjoy", "jirum"),
+    ("quasarzone", "qb_saleinfo"),
+]
+
+BENCH_KEYWORDS = "SSD,모니터,라면,청소기,RTX,에어팟"
+
+
+def fixture_encoding(site: str) -> str:
+    return "euc-kr" if site == "ppomppu" else "utf-8"
+
+
+def read_fixture(name: str, site: str) -> str:
+    with open(os.path.join(FIXTURE_DIR, name), "rb") as f:
+        return f.read().decode(fixture_encoding(site))
+
+
+def scale_page(text: str, scale: int) -> str:
+    """<body> 안쪽을 scale번 복제. 복제본의 글 번호(= 또는 / 뒤 4자리 이상 숫자)는 겹치지 않게 바꾼다."""
+    if scale <= 1:
+        return text
+    a = text.find(">", text.find("<body")) + 1
+    b = text.rfind("</body>")
+    if a <= 0 or b < a:
+        a, b = 0, len(text)
+    body = text[a:b]
+    parts = [body]
+    for c in range(1, scale):
+        parts.append(re.sub(r"(?<=[=/])(\d{4,})", lambda m: str(int(m.group(1)) + c * 10 ** 7), body))
+    return text[:a] + "".join(parts) + text[b:]
+
+
+class SiteStub:
+    """사이트(호스트) 하나를 흉내 내는 로컬 서버: 목록 URL은 목록 페이지, 나머지는 상세 페이지"""
+
+    def __init__(self, host: str, site: str):
+        self.host = host
+        self.site = site
+        self.lists = {}  # path?query -> bytes
+        self.detail = b""
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                stub.requests += 1
+                body = stub.lists.get(self.path, stub.detail)
+                self.send_response(200)
+                # 뽐뿌는 실제처럼 charset 없이(main.py가 euc-kr로 강제)
+                ctype = "text/html" if stub.site == "ppomppu" else "text/html; charset=utf-8"
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+class NotifyStub:
+    """텔레그램/디스코드/HA supervisor 알림 엔드포인트 스텁(받은 개수만 셈)"""
+
+    def __init__(self):
+        self.counts = {"telegram": 0, "discord": 0, "ha": 0}
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path.startswith("/telegram/"):
+                    channel, status, body = "telegram", 200, b'{"ok":true,"result":{}}'
+                elif self.path.startswith("/discord/"):
+                    channel, status, body = "discord", 204, b""
+                elif self.path.startswith("/supervisor/"):
+                    channel, status, body = "ha", 200, b"[]"
+                else:
+                    channel, status, body = None, 404, b""
+                if channel:
+                    with stub.lock:
+                        stub.counts[channel] += 1
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        with self.lock:
+            for k in self.counts:
+                self.counts[k] = 0
+
+
+def make_config(backend: str, alarm: str) -> dict:
+    cfg = {
+        "state_backend": backend,
+        "notify_outbox_enable": False,
+        "use_hotdeal_alarm": alarm == "all",
+        "use_hotdeal_keyword_alarm": alarm == "keyword",
+        "hotdeal_alarm_keyword": BENCH_KEYWORDS,
+        "alarm_message_template": "`{title}` {url} {mall_url}",
+        "telegram_enable": True,
+        "telegram_bot_token": "bench",
+        "telegram_chat_id": "1",
+        "discord_enable": True,
+        "ha_notify_enable": True,
+        "ha_notify_service": "notify.bench",
+    }
+    for site, board in ALL_BOARDS:
+        cfg[f"use_site_{site}"] = True
+        cfg[f"use_board_{site}_{board}"] = True
+    return cfg
+
+
+def setup_stubs(cfg: dict):
+    """게시판/상세 스텁 서버를 띄우고 main.http_get이 그쪽으로 가도록 주소를 바꾼다."""
+    notify = NotifyStub()
+    main.TELEGRAM_API_BASE = f"{notify.base}/telegram"
+    main.SUPERVISOR_API_BASE = f"{notify.base}/supervisor/core/api"
+    cfg["discord_webhook_url"] = f"{notify.base}/discord/webhook"
+
+    sites = {}
+    for job in main.get_board_jobs(cfg):
+        host = urlparse(job["url"]).netloc
+        if host not in sites:
+            sites[host] = SiteStub(host, job["site"])
+            detail = glob.glob(os.path.join(FIXTURE_DIR, f"{job['site']}_detail*.html"))
+            if detail:
+                with open(sorted(detail)[0], "rb") as f:
+                    sites[host].detail = f.read()
+
+    orig_http_get = main.http_get
+
+    def http_get(url, *args, **kwargs):
+        p = urlparse(url)
+        stub = sites.get(p.netloc)
+        if stub is not None:
+            url = f"http://127.0.0.1:{stub.port}{p.path or '/'}" + (f"?{p.query}" if p.query else "")
+        return orig_http_get(url, *args, **kwargs)
+
+    main.http_get = http_get
+    return sites, notify
+
+
+def load_lists(cfg: dict, sites: dict, scale: int) -> dict:
+    """게시판별 (목록 텍스트) — 스텁 서버에도 같은 내용을 올린다."""
+    texts = {}
+    for job in main.get_board_jobs(cfg):
+        site, board = job["site"], job["board"]
+        text = scale_page(read_fixture(f"{site}_{board}_list.html", site), scale)
+        texts[(site, board)] = text
+        p = urlparse(job["url"])
+        path = (p.path or "/") + (f"?{p.query}" if p.query else "")
+        sites[p.netloc].lists[path] = text.encode(fixture_encoding(site))
+    return texts
+
+
+def reset_data_dir(cfg: dict):
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    main.configure_state_store(cfg)
+
+
+def summarize(samples):
+    ms = sorted(x * 1000 for x in samples)
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(ms[len(ms) // 2], 3),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "min_ms": round(ms[0], 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def timed(fn, repeat: int, setup=None):
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t0 = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples)
+
+
+def item_keys(items):
+    out = []
+    for it in items:
+        url = it["url"] if it["url"].startswith("http") else main.get_url_prefix(it["site"]) + it["url"]
+        out.append(f"{it['site']}:{it['board']}:{url}")
+    return out
+
+
+def run_scale(cfg: dict, sites: dict, notify: NotifyStub, scale: int, repeat: int) -> dict:
+    texts = load_lists(cfg, sites, scale)
+    reset_data_dir(cfg)
+    stages = {}
+
+    stages["parse"] = timed(lambda _: [main.parse_board_items(s, b, t) for (s, b), t in texts.items()], repeat)
+    stages["scrape"] = timed(lambda st: main.scrape_board_items(cfg, st), repeat, setup=main.empty_state)
+
+    items = main.scrape_board_items(cfg, main.empty_state())
+    titles = [it["title"] for it in items]
+    stages["should_send"] = timed(lambda _: [main.should_send(cfg, t) for t in titles], repeat)
+
+    keys = item_keys(items)
+    now = time.time()
+
+    def trim_setup():
+        st = main.empty_state()
+        # 지난 사이클들에서 쌓인 키(현재 첫 페이지에 없는 것) + 현재 키
+        for i in range(len(keys) * 5):
+            st["seen"][f"old:{i}"] = now - 86400 + i
+            st["mall_cache"][f"old:{i}"] = ""
+        for k in keys:
+            st["seen"][k] = now
+        return st
+
+    keep_factor = float(cfg.get("state_keep_factor", 1.5))
+    keep_min = int(cfg.get("state_keep_min", 50))
+    stages["trim"] = timed(lambda st: main.trim_state_to_firstpage(st, keys, keep_factor, keep_min), repeat, setup=trim_setup)
+
+    state = trim_setup()
+    main.trim_state_to_firstpage(state, keys, keep_factor, keep_min)
+    counter = iter(range(10 ** 9))
+
+    def save_once(_):
+        state["seen"][f"bench:{next(counter)}"] = time.time()
+        main.save_state(state)
+
+    stages["save_state"] = timed(save_once, repeat)
+
+    cold, warm = [], []
+    sent = {}
+    for _ in range(repeat):
+        reset_data_dir(cfg)
+        st = main.load_state()
+        notify.reset()
+        t0 = time.perf_counter()
+        main.run_cycle(cfg, st)
+        cold.append(time.perf_counter() - t0)
+        sent = dict(notify.counts)
+        t0 = time.perf_counter()
+        main.run_cycle(cfg, st)
+        warm.append(time.perf_counter() - t0)
+    stages["cycle_cold"] = summarize(cold)
+    stages["cycle_warm"] = summarize(warm)
+
+    return {
+        "scale": scale,
+        "items": len(items),
+        "list_bytes": sum(len(b) for s in sites.values() for b in s.lists.values()),
+        "notifications_per_cold_cycle": sent,
+        "stages": stages,
+    }
+
+
+def addon_version() -> str:
+    try:
+        with open(os.path.join(BENCH_DIR, "..", "config.yaml"), "r", encoding="utf-8") as f:
+            m = re.search(r'^version:\s*"?([^"\n]+)"?', f.read(), re.MULTILINE)
+            return m.group(1) if m else ""
+    except OSError:
+        return ""
+
+
+def compare(old_path: str, new_path: str):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    old_runs = {r["scale"]: r for r in old["runs"]}
+    print(f"{'scale':>5} {'stage':<12} {'old_ms':>10} {'new_ms':>10} {'ratio':>7}")
+    for run in new["runs"]:
+        prev = old_runs.get(run["scale"])
+        if not prev:
+            continue
+        for stage, cur in run["stages"].items():
+            before = prev["stages"].get(stage)
+            if not before:
+                continue
+            ratio = cur["mean_ms"] / before["mean_ms"] if before["mean_ms"] else float("nan")
+            print(f"{run['scale']:>5} {stage:<12} {before['mean_ms']:>10.2f} {cur['mean_ms']:>10.2f} {ratio:>7.2f}")
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 10], help="목록 글 수 배수")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--backend", choices=["json", "journal"], default="json")
+    ap.add_argument("--alarm", choices=["keyword", "all"], default="keyword", help="키워드 알림만/모든 글 알림")
+    ap.add_argument("--out", help="결과 JSON 파일 경로(기본: 표준출력)")
+    ap.add_argument("--verbose", action="store_true", help="main.py 로그 출력")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="두 결과 파일의 단계별 평균 비교")
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    cfg = make_config(args.backend, args.alarm)
+    sites, notify = setup_stubs(cfg)
+
+    runs = []
+    try:
+        quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+        with quiet:
+            for scale in args.scale:
+                runs.append(run_scale(copy.deepcopy(cfg), sites, notify, scale, args.repeat))
+    finally:
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    result = {
+        "meta": {
+            "version": addon_version(),
+            "python": platform.python_version(),
+            "backend": args.backend,
+            "alarm": args.alarm,
+            "repeat": args.repeat,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "runs": runs,
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main_cli()
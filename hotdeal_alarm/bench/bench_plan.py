@@ -0,0 +1,120 @@
+"""
+설정 처리 벤치마크: 매 사이클 options.json을 다시 읽고 글마다 cfg에서 값을 꺼내던 방식(legacy)
+vs 파일이 바뀔 때만 만드는 CyclePlan(plan).
+
+측정 단계(ms: mean/p50/p95/min/max):
+  - startup_legacy : load_config() + 키워드 매처 첫 컴파일
+  - startup_plan   : ConfigWatcher.load() 첫 호출(설정 읽기 + CyclePlan 생성)
+  - cycle_legacy   : load_config() + get_board_jobs() + 글마다 키 계산/should_send 2회(상세+알림)/format_message
+  - cycle_plan     : ConfigWatcher.load()(파일 그대로 → stat만) + 글마다 item_key/should_send 1회/format_message
+글 수는 bench/fixtures 목록을 --scale 배수로 늘려서 파싱한 것. 네트워크 없음.
+
+사용법:
+  python bench/bench_plan.py --scale 1 10 --repeat 50
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import bench_cycle  # noqa: E402
+from bench_cycle import main  # noqa: E402
+
+EXTRA_KEYWORDS = ",".join(f"키워드{i}" for i in range(200))
+
+
+def load_items(cfg: dict, scale: int):
+    items = []
+    for site, board in bench_cycle.ALL_BOARDS:
+        text = bench_cycle.scale_page(bench_cycle.read_fixture(f"{site}_{board}_list.html", site), scale)
+        items.extend(main.parse_board_items(site, board, text))
+    return items
+
+
+def legacy_cycle(items):
+    cfg = main.load_config()
+    main.get_board_jobs(cfg)
+    out = 0
+    for it in items:
+        site, board, raw_url = it["site"], it["board"], it["url"]
+        full_url = raw_url if raw_url.startswith("http") else (main.get_url_prefix(site) + raw_url)
+        key = f"{site}:{board}:{full_url}"
+        title = (it["title"] or "").strip()
+        main.should_send(cfg, title)  # prefetch_mall_urls
+        send_main, send_dist, _ = main.should_send(cfg, title)  # 알림 루프
+        if send_main or send_dist:
+            out += len(main.format_message(cfg.get("alarm_message_template", ""), title, site, board, full_url, key))
+    return out
+
+
+def plan_cycle(watcher, items):
+    plan, _ = watcher.load()
+    out = 0
+    for it in items:
+        full_url, key = plan.item_key(it["site"], it["board"], it["url"])
+        title = (it["title"] or "").strip()
+        send_main, send_dist, _ = plan.should_send(title)
+        if send_main or send_dist:
+            out += len(plan.format_message(title, it["site"], it["board"], full_url, key))
+    return out
+
+
+def reset_matcher():
+    main._KEYWORD_MATCHER_CACHE = (None, None)
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 10])
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    cfg = bench_cycle.make_config("json", "keyword")
+    cfg["hotdeal_alarm_keyword"] = bench_cycle.BENCH_KEYWORDS + "," + EXTRA_KEYWORDS
+    path = os.path.join(bench_cycle.DATA_DIR, "options.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cfg, f, ensure_ascii=False)
+    main.CONFIG_PATH = path
+
+    runs = []
+    try:
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                startup_legacy = bench_cycle.timed(
+                    lambda _: main.get_keyword_matcher(main.load_config()), args.repeat, setup=reset_matcher
+                )
+                startup_plan = bench_cycle.timed(
+                    lambda w: w.load(), args.repeat, setup=lambda: (reset_matcher(), main.ConfigWatcher(path))[1]
+                )
+                watcher = main.ConfigWatcher(path)
+                watcher.load()
+                for scale in args.scale:
+                    items = load_items(cfg, scale)
+                    assert legacy_cycle(items) == plan_cycle(watcher, items)
+                    runs.append(
+                        {
+                            "scale": scale,
+                            "items": len(items),
+                            "stages": {
+                                "startup_legacy": startup_legacy,
+                                "startup_plan": startup_plan,
+                                "cycle_legacy": bench_cycle.timed(lambda _: legacy_cycle(items), args.repeat),
+                                "cycle_plan": bench_cycle.timed(lambda _: plan_cycle(watcher, items), args.repeat),
+                            },
+                        }
+                    )
+            finally:
+                sys.stdout = stdout
+    finally:
+        shutil.rmtree(bench_cycle.DATA_DIR, ignore_errors=True)
+
+    print(json.dumps({"meta": {"version": bench_cycle.addon_version(), "repeat": args.repeat}, "runs": runs}, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,132 @@
+"""
+seen 저장 방식 벤치마크: json(state.json에 주소 문자열 키, indent=2) vs binary(seen.bin에 64비트 해시).
+
+키 N개(뽐뿌 글 주소 형식)로 seen을 만들어 저장한 뒤 측정한다.
+  - file_bytes : 저장된 파일 크기(json은 seen만 든 state.json, binary는 seen.bin)
+  - load_ms    : load_state()로 다시 읽는 시간(mean/p50/p95/min/max)
+  - memory_mb  : 읽은 seen 객체가 차지하는 메모리(tracemalloc, 키/값 객체 포함)
+  - lookup_ns  : 키 하나 확인(seen.get(key)) 평균 시간. 절반은 있는 키, 절반은 없는 키
+  - migrate_ms : json → binary 첫 전환(문자열 키 해시 + seen.bin 쓰기 + state.json 다시 쓰기)
+
+사용법:
+  python bench/bench_seen.py --keys 10000 100000 1000000 --repeat 3
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = tempfile.mkdtemp(prefix="hotdeal_seen_")
+os.environ["DATA_DIR"] = DATA_DIR
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "app"))
+
+import main  # noqa: E402
+
+LOOKUPS = 20000
+
+
+def make_key(i: int) -> str:
+    return f"ppomppu:ppomppu:https://www.ppomppu.co.kr/zboard/view.php?id=ppomppu&no={i}"
+
+
+def use_backend(seen_backend: str):
+    main._STATE_STORE = None
+    main.configure_state_store({"state_backend": "json", "seen_backend": seen_backend})
+
+
+def write_json_state(n: int):
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+    os.makedirs(DATA_DIR)
+    st = main.empty_state()
+    now = time.time()
+    for i in range(n):
+        st["seen"][make_key(i)] = now - n + i
+    main.JsonStateStore(main.STATE_FILE).save(st)
+
+
+def file_bytes() -> int:
+    return sum(os.path.getsize(p) for p in (main.STATE_FILE, main.SEEN_FILE) if os.path.exists(p))
+
+
+def summarize(samples):
+    ms = sorted(x * 1000 for x in samples)
+    return {
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(ms[len(ms) // 2], 3),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "min_ms": round(ms[0], 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def measure(n: int, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        state = main.load_state()
+        times.append(time.perf_counter() - t0)
+        del state
+
+    tracemalloc.start()
+    state = main.load_state()
+    seen_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+
+    seen = state["seen"]
+    probes = [make_key(i) for i in range(0, 2 * n, max(1, 2 * n // LOOKUPS))]
+    t0 = time.perf_counter()
+    hits = sum(1 for k in probes if seen.get(k))
+    lookup_ns = (time.perf_counter() - t0) / len(probes) * 1e9
+    assert len(seen) == n and abs(hits - len(probes) / 2) <= 1
+
+    return {
+        "file_bytes": file_bytes(),
+        "load_ms": summarize(times),
+        "memory_mb": round(seen_mb, 1),
+        "lookup_ns": round(lookup_ns),
+    }
+
+
+def run(n: int, repeat: int) -> dict:
+    out = {"keys": n}
+
+    use_backend("json")
+    write_json_state(n)
+    out["json"] = measure(n, repeat)
+
+    use_backend("binary")
+    t0 = time.perf_counter()
+    main.load_state()
+    out["migrate_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    out["binary"] = measure(n, repeat)
+    return out
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--keys", type=int, nargs="+", default=[10000, 100000, 1000000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    results = []
+    try:
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                for n in args.keys:
+                    results.append(run(n, args.repeat))
+            finally:
+                sys.stdout = stdout
+    finally:
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,235 @@
+"""
+시작 시간 벤치마크: 프로세스 시작 → 첫 사이클 끝까지.
+
+main.py를 실제처럼 새 프로세스(python)로 띄우고 로그 줄이 나오는 시각을 잰다.
+게시판/알림은 bench_cycle의 스텁 서버(이 프로세스)로 보내므로 실제 사이트에는 접속하지 않음.
+자식 프로세스는 requests 요청의 호스트만 스텁 포트로 바꾸고 main을 run.sh처럼(python -m main) 그대로 실행한다
+(자식에서는 bench_cycle/http.server를 import하지 않아서 main.py의 import 비용이 그대로 잡힘).
+
+측정 단계(ms: mean/p50/p95/min/max):
+  - startup     : 프로세스 시작 → "addon started" 로그(인터프리터 시작 + import main)
+  - first_cycle : 프로세스 시작 → 첫 "cycle end" 로그(빈 state에서 새 글 전부 알림)
+변형:
+  - no_cloud : 퀘이사존(cloudscraper) 끔
+  - all      : 모든 게시판(퀘이사존 포함 → 첫 요청 때 cloudscraper 로드)
+
+사용법:
+  python bench/bench_startup.py --repeat 5 --out new.json
+  python bench/bench_startup.py --repeat 5 --entry script        # python main.py로 실행했을 때
+  python bench/bench_startup.py --repeat 5 --baseline old.json --fail-ratio 1.2   # 느려졌으면 종료 코드 1
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(BENCH_DIR, "..", "app")
+
+STARTED_MARK = "DEBUG: addon started"
+CYCLE_END_MARK = "DEBUG: cycle end"
+CHILD_TIMEOUT = 120
+
+
+def child(entry: str):
+    # 요청 단계(requests.Session.request)에서 호스트만 스텁 포트로 바꾸고, main은 run.sh와 같은 방식으로 실행
+    import runpy
+    from urllib.parse import urlparse
+
+    import requests
+
+    ports = json.loads(os.environ["BENCH_HOST_PORTS"])
+    orig_request = requests.Session.request
+
+    def request(self, method, url, *args, **kwargs):
+        p = urlparse(url)
+        port = ports.get(p.netloc)
+        if port:
+            url = f"http://127.0.0.1:{port}{p.path or '/'}" + (f"?{p.query}" if p.query else "")
+        return orig_request(self, method, url, *args, **kwargs)
+
+    requests.Session.request = request
+    sys.path.insert(0, APP_DIR)
+    if entry == "script":
+        runpy.run_path(os.path.join(APP_DIR, "main.py"), run_name="__main__")  # python main.py: 매번 소스 컴파일
+    else:
+        runpy.run_module("main", run_name="__main__", alter_sys=True)  # python -m main: __pycache__ 사용
+
+
+def run_once(env: dict, entry: str) -> dict:
+    import subprocess
+
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--child", entry],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    marks = {}
+    tail = []
+    try:
+        for line in proc.stdout:
+            now = time.perf_counter()
+            tail = (tail + [line.rstrip()])[-20:]
+            if STARTED_MARK in line:
+                marks.setdefault("startup", now - t0)
+            elif CYCLE_END_MARK in line:
+                marks["first_cycle"] = now - t0
+                break
+            if now - t0 > CHILD_TIMEOUT:
+                break
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+    if "first_cycle" not in marks:
+        raise RuntimeError("child did not finish a cycle:\n" + "\n".join(tail))
+    return marks
+
+
+def run_variant(name: str, cfg: dict, sites: dict, notify, repeat: int, entry: str) -> dict:
+    import shutil
+    import tempfile
+    from urllib.parse import urlparse
+
+    import bench_cycle
+
+    ports = {host: stub.port for host, stub in sites.items()}
+    samples = {"startup": [], "first_cycle": []}
+    sent = {}
+    for _ in range(repeat):
+        data_dir = tempfile.mkdtemp(prefix="hotdeal_startup_")
+        try:
+            path = os.path.join(data_dir, "options.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(cfg, f, ensure_ascii=False)
+            env = dict(os.environ)
+            env.update(
+                {
+                    "DATA_DIR": data_dir,
+                    "CONFIG_PATH": path,
+                    "TELEGRAM_API_BASE": f"{notify.base}/telegram",
+                    "SUPERVISOR_API_BASE": f"{notify.base}/supervisor/core/api",
+                    "SUPERVISOR_TOKEN": "bench",
+                    "BENCH_HOST_PORTS": json.dumps(ports),
+                    "PYTHONUNBUFFERED": "1",
+                }
+            )
+            notify.reset()
+            for k, v in run_once(env, entry).items():
+                samples[k].append(v)
+            sent = dict(notify.counts)
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    boards = [b for b in bench_cycle.ALL_BOARDS if cfg.get(f"use_board_{b[0]}_{b[1]}")]
+    hosts = sorted({urlparse(j["url"]).netloc for j in bench_cycle.main.get_board_jobs(cfg)})
+    return {
+        "variant": name,
+        "entry": entry,
+        "boards": len(boards),
+        "hosts": hosts,
+        "notifications_per_first_cycle": sent,
+        "stages": {k: bench_cycle.summarize(v) for k, v in samples.items()},
+    }
+
+
+def compare(old: dict, new: dict, fail_ratio: float | None) -> bool:
+    ok = True
+    old_runs = {r["variant"]: r for r in old["runs"]}
+    print(f"{'variant':<9} {'stage':<12} {'old_ms':>10} {'new_ms':>10} {'ratio':>7}")
+    for run in new["runs"]:
+        prev = old_runs.get(run["variant"])
+        if not prev:
+            continue
+        for stage, cur in run["stages"].items():
+            before = prev["stages"].get(stage)
+            if not before or not before["mean_ms"]:
+                continue
+            ratio = cur["mean_ms"] / before["mean_ms"]
+            flag = ""
+            if fail_ratio and ratio > fail_ratio:
+                ok = False
+                flag = "  REGRESSION"
+            print(f"{run['variant']:<9} {stage:<12} {before['mean_ms']:>10.2f} {cur['mean_ms']:>10.2f} {ratio:>7.2f}{flag}")
+    return ok
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--variant", choices=["no_cloud", "all"], nargs="+", default=["no_cloud", "all"])
+    ap.add_argument("--out", help="결과 JSON 파일 경로(기본: 표준출력)")
+    ap.add_argument("--baseline", help="이전 결과 JSON. 주면 단계별 평균을 비교해서 출력")
+    ap.add_argument("--fail-ratio", type=float, help="--baseline 대비 이 배수보다 느린 단계가 있으면 종료 코드 1")
+    ap.add_argument(
+        "--entry", choices=["module", "script"], default="module",
+        help="module: run.sh처럼 python -m main / script: python main.py(바이트코드 캐시 없음)",
+    )
+    ap.add_argument("--child", choices=["module", "script"], help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    import copy
+    import platform
+    import shutil
+
+    import bench_cycle
+
+    if args.entry == "module":
+        # 이미지 빌드(Dockerfile)처럼 미리 바이트코드를 만들어 둔다(PYTHONDONTWRITEBYTECODE여도 읽기는 함)
+        import compileall
+
+        compileall.compile_file(os.path.join(APP_DIR, "main.py"), quiet=1)
+
+    base_cfg = bench_cycle.make_config("json", "keyword")
+    sites, notify = bench_cycle.setup_stubs(base_cfg)
+    bench_cycle.load_lists(base_cfg, sites, 1)
+
+    runs = []
+    try:
+        for name in args.variant:
+            cfg = copy.deepcopy(base_cfg)
+            if name == "no_cloud":
+                cfg["use_site_quasarzone"] = False
+                cfg["use_board_quasarzone_qb_saleinfo"] = False
+            runs.append(run_variant(name, cfg, sites, notify, args.repeat, args.entry))
+    finally:
+        shutil.rmtree(bench_cycle.DATA_DIR, ignore_errors=True)
+
+    result = {
+        "meta": {
+            "version": bench_cycle.addon_version(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "runs": runs,
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            ok = compare(json.load(f), result, args.fail_ratio)
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main_cli()
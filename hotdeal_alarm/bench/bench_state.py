@@ -0,0 +1,125 @@
+"""
+state 저장소 벤치마크: json(전체 재작성) vs journal(변경분 append).
+
+한 사이클을 다음처럼 흉내 낸다.
+  - 게시판 캐시 일부 갱신 → trim → save
+  - 알림 A건마다 seen/mall_cache 갱신 → save
+
+측정값(JSON으로 출력):
+  - bytes_written: 사이클당 write() 바이트 수(/proc/self/io의 wchar 기준, 없으면 null)
+  - write_amplification: bytes_written / 실제로 바뀐 항목의 JSON 크기
+  - cycle_ms: 사이클당 저장(save_state) 포함 소요 시간
+
+사용법:
+  python bench/bench_state.py --seen 50 2000 20000 --cycles 30 --alarms 15 --out state.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import main  # noqa: E402
+
+
+def read_wchar():
+    try:
+        with open("/proc/self/io", "r") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def make_state(n_seen: int) -> dict:
+    now = time.time()
+    st = main.empty_state()
+    for i in range(n_seen):
+        st["seen"][f"ppomppu:ppomppu:https://www.ppomppu.co.kr/zboard/view.php?id=ppomppu&no={i}"] = now - n_seen + i
+    for i in range(100):
+        st["mall_cache"][f"clien:jirum:https://www.clien.net/service/board/jirum/{i}"] = f"https://example.com/item/{i}"
+    for b in range(11):
+        st["board_cache"][f"site:{b}"] = {
+            "etag": "",
+            "last_modified": "",
+            "hash": "0" * 40,
+            "items": [{"title": f"상품 {b}-{i}", "url": f"/read/{i}"} for i in range(20)],
+        }
+    return st
+
+
+def run(backend: str, n_seen: int, cycles: int, alarms: int) -> dict:
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "state.json")
+        if backend == "journal":
+            store = main.JournalStateStore(path, os.path.join(d, "state.journal"))
+        else:
+            store = main.JsonStateStore(path)
+
+        main.JsonStateStore(path).save(make_state(n_seen))
+        state = store.load()
+
+        seq = n_seen
+        changed_bytes = 0
+        total_ms = 0.0
+        w0 = read_wchar()
+
+        for c in range(cycles):
+            t0 = time.perf_counter()
+
+            bc = state["board_cache"][f"site:{c % 11}"]
+            bc["hash"] = f"{c:040d}"
+            changed_bytes += len(json.dumps(bc, ensure_ascii=False))
+            store.save(state)
+
+            for _ in range(alarms):
+                key = f"ppomppu:ppomppu:https://www.ppomppu.co.kr/zboard/view.php?id=ppomppu&no={seq}"
+                seq += 1
+                state["seen"][key] = time.time()
+                state["mall_cache"][key] = "https://example.com/new"
+                changed_bytes += len(key) * 2 + 40
+                store.save(state)
+
+            total_ms += (time.perf_counter() - t0) * 1000
+
+        w1 = read_wchar()
+        written = (w1 - w0) if (w0 is not None and w1 is not None) else None
+
+    return {
+        "backend": backend,
+        "seen": n_seen,
+        "cycles": cycles,
+        "alarms_per_cycle": alarms,
+        "bytes_written_per_cycle": (written / cycles) if written is not None else None,
+        "write_amplification": (written / changed_bytes) if written is not None else None,
+        "cycle_ms": total_ms / cycles,
+    }
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seen", type=int, nargs="+", default=[50, 2000, 20000])
+    ap.add_argument("--cycles", type=int, default=30)
+    ap.add_argument("--alarms", type=int, default=15)
+    ap.add_argument("--out", help="결과 JSON 파일 경로(기본: 표준출력)")
+    args = ap.parse_args()
+
+    results = []
+    for n in args.seen:
+        for backend in ("json", "journal"):
+            results.append(run(backend, n, args.cycles, args.alarms))
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main_cli()
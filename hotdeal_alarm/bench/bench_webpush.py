@@ -0,0 +1,157 @@
+"""
+Web Push 전송 벤치마크/점검. 실제 푸시 서비스에는 접속하지 않음(로컬 스텁 푸시 서비스).
+
+스텁은 요청마다 --latency-ms만큼 지연 후 201을 돌려주고, 구독 일부는 410/404(만료)로 응답한다.
+구독자 수 N별로 알림 하나를 모든 구독자에게 보내는 시간(send_ms: mean/p50/p95/min/max)을
+webpush_max_workers 값마다 잰다. 함께 확인하는 것:
+  - 만료 구독이 첫 전송 뒤 webpush_subscriptions.json에서 지워졌는지
+  - 구독자가 받은 본문을 각자의 키로 복호화하면 보낸 메시지({"title", "body"})가 나오는지
+  - VAPID 서명(Authorization 헤더)이 구독자마다가 아니라 한 번만 만들어졌는지
+
+사용법:
+  python bench/bench_webpush.py --subs 10 50 200 --workers 1 8 --repeat 5
+"""
+import argparse
+import base64
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = tempfile.mkdtemp(prefix="hotdeal_webpush_")
+os.environ["DATA_DIR"] = DATA_DIR
+sys.path.insert(0, BENCH_DIR)
+
+import bench_cycle  # noqa: E402
+from bench_cycle import main  # noqa: E402
+
+import http_ece  # noqa: E402  (pywebpush 의존성)
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec  # noqa: E402
+
+EXPIRED_EVERY = 10  # 구독 10개 중 1개는 만료(410/404)
+
+
+def b64url(b: bytes) -> str:
+    return base64.urlsafe_b64encode(b).decode().rstrip("=")
+
+
+class PushStub:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.bodies = {}  # 구독 번호 -> 마지막으로 받은 본문
+        self.auth_headers = set()
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                time.sleep(stub.latency)
+                n = int(self.path.rsplit("/", 1)[-1])
+                with stub.lock:
+                    stub.bodies[n] = body
+                    stub.auth_headers.add(self.headers.get("Authorization"))
+                status = 201
+                if self.path.startswith("/gone/"):
+                    status = 410 if n % 2 else 404
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+def make_subscriptions(stub: PushStub, n: int):
+    subs, keys = [], {}
+    for i in range(n):
+        priv = ec.generate_private_key(ec.SECP256R1())
+        auth = os.urandom(16)
+        pub = priv.public_key().public_bytes(serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint)
+        kind = "gone" if i % EXPIRED_EVERY == EXPIRED_EVERY - 1 else "push"
+        subs.append({"endpoint": f"{stub.base}/{kind}/{i}", "keys": {"p256dh": b64url(pub), "auth": b64url(auth)}})
+        keys[i] = (priv, auth)
+    return subs, keys
+
+
+def run(stub: PushStub, n: int, workers: int, repeat: int) -> dict:
+    subs, keys = make_subscriptions(stub, n)
+    with open(main.WEBPUSH_SUBS_FILE, "w", encoding="utf-8") as f:
+        json.dump(subs, f)
+    cfg = {"webpush_enable": True, "webpush_vapid_subject": "mailto:bench@example.com", "webpush_max_workers": workers}
+    msg = f"`[쿠팡] 벤치 상품 {n}` https://example.com/{n}"
+
+    stub.bodies.clear()
+    stub.auth_headers.clear()
+    samples = []
+    for r in range(repeat + 1):
+        t0 = time.perf_counter()
+        ok = main.send_webpush(cfg, msg)
+        if r:
+            samples.append(time.perf_counter() - t0)  # 첫 전송(만료 구독 정리 포함)은 측정에서 뺌
+        assert ok
+
+    with open(main.WEBPUSH_SUBS_FILE, "r", encoding="utf-8") as f:
+        left = json.load(f)
+    alive = [i for i in range(n) if i % EXPIRED_EVERY != EXPIRED_EVERY - 1]
+    decrypted = 0
+    for i in alive:
+        priv, auth = keys[i]
+        payload = json.loads(http_ece.decrypt(stub.bodies[i], private_key=priv, auth_secret=auth, version="aes128gcm"))
+        decrypted += payload == {"title": main.WEBPUSH_TITLE, "body": msg}
+    return {
+        "subscribers": n,
+        "workers": workers,
+        "send_ms": bench_cycle.summarize(samples),
+        "expired_removed": n - len(left),
+        "expired_ok": len(left) == len(alive),
+        "decrypted_ok": decrypted == len(alive),
+        "vapid_signatures": len(stub.auth_headers),
+    }
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--subs", type=int, nargs="+", default=[10, 50, 200])
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--latency-ms", type=float, default=30.0, help="스텁 푸시 서비스 응답 지연")
+    args = ap.parse_args()
+
+    stub = PushStub(args.latency_ms / 1000)
+    runs = []
+    ok = True
+    try:
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                for n in args.subs:
+                    for w in args.workers:
+                        r = run(stub, n, w, args.repeat)
+                        ok &= r["expired_ok"] and r["decrypted_ok"] and r["vapid_signatures"] == 1
+                        runs.append(r)
+            finally:
+                sys.stdout = stdout
+    finally:
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    meta = {"version": bench_cycle.addon_version(), "repeat": args.repeat, "latency_ms": args.latency_ms}
+    print(json.dumps({"meta": meta, "runs": runs}, ensure_ascii=False, indent=2))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main_cli()
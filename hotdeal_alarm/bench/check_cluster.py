@@ -0,0 +1,176 @@
+"""
+클러스터 모드(cluster.db 공유) 다중 프로세스 점검. 실제 사이트/알림에는 접속하지 않음(bench_cycle의 스텁 사용).
+
+1) claims 경쟁: N개 프로세스가 같은 키 K개를 섞인 순서로 동시에 claim → 키마다 정확히 한 프로세스만 성공해야 함
+   (보내다 죽은 노드가 남긴 오래된 pending 키도 한 프로세스만 다시 차지)
+2) 사이클: N개 인스턴스가 같은 게시판 설정으로 run_cycle을 반복(인스턴스마다 DATA_DIR/스텁 서버가 따로)
+   - 알림 수 합계 == 단일 인스턴스 알림 수(중복/누락 없음)
+   - 첫 사이클에 게시판이 나뉘어야 하고, 첫 사이클 뒤 멈춘 노드(w0)의 게시판은 lease 만료 후 다른 노드가 이어받아야 함
+
+사용법:
+  python bench/check_cluster.py
+  python bench/check_cluster.py --nodes 4 --keys 5000 --lease 3
+"""
+import argparse
+import contextlib
+import multiprocessing as mp
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import bench_cycle  # noqa: E402  (DATA_DIR를 프로세스마다 임시 디렉터리로 맞춤)
+from bench_cycle import main  # noqa: E402
+
+STALE_KEYS = 50
+
+
+def claim_worker(db_path: str, node: str, keys, lease: float, barrier, out):
+    c = main.ClusterCoordinator(db_path, node, lease)
+    order = list(keys)
+    random.Random(node).shuffle(order)
+    barrier.wait()
+    won = []
+    for k in order:
+        if c.claim(k):
+            won.append(k)
+            c.finish(k, done=True)
+    c.close()
+    out.put((node, won))
+
+
+def check_claims(cluster_dir: str, nodes: int, n_keys: int, lease: float) -> bool:
+    db_path = os.path.join(cluster_dir, "claims.db")
+    keys = [f"ppomppu:ppomppu:https://www.ppomppu.co.kr/zboard/view.php?id=ppomppu&no={i}" for i in range(n_keys)]
+
+    # 보내다 죽은 노드: lease보다 오래된 pending
+    main.ClusterCoordinator(db_path, "dead", lease).close()
+    db = sqlite3.connect(db_path)
+    db.executemany(
+        "INSERT INTO claims (key, node, state, ts) VALUES (?, 'dead', 'pending', ?)",
+        [(k, time.time() - lease * 2) for k in keys[:STALE_KEYS]],
+    )
+    db.commit()
+    db.close()
+
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(nodes)
+    out = ctx.Queue()
+    procs = [ctx.Process(target=claim_worker, args=(db_path, f"w{i}", keys, lease, barrier, out)) for i in range(nodes)]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    results = dict(out.get() for _ in procs)
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - t0
+
+    won_total = sum(len(v) for v in results.values())
+    union = set().union(*results.values())
+    ok = won_total == len(keys) and union == set(keys)
+    print(
+        f"claims: {nodes} procs x {len(keys)} keys in {elapsed:.2f}s, "
+        f"won per node={ {n: len(v) for n, v in sorted(results.items())} }, duplicates={won_total - len(union)}, "
+        f"missing={len(keys) - len(union)} -> {'OK' if ok else 'FAIL'}"
+    )
+    return ok
+
+
+def cycle_worker(cluster_dir: str, node: str, lease: float, cycles: int, barrier, out):
+    cfg = bench_cycle.make_config("json", "keyword")
+    cfg.update({"cluster_enable": True, "cluster_dir": cluster_dir, "cluster_node_id": node, "cluster_lease_sec": lease})
+    sites, notify = bench_cycle.setup_stubs(cfg)
+    bench_cycle.load_lists(cfg, sites, 1)
+    owned = []
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        bench_cycle.reset_data_dir(cfg)
+        cluster = main.configure_cluster(cfg)
+        state = main.load_state()
+        cluster.assign([])  # heartbeat만 남겨서 첫 사이클에 모든 노드가 보이게
+        barrier.wait()
+        for c in range(cycles):
+            main.run_cycle(cfg, state)
+            owned.append(sorted(b for (b,) in cluster.db.execute("SELECT board FROM leases WHERE node = ?", (node,))))
+            if node == "w0":
+                break  # 첫 사이클 뒤 멈춘 노드 흉내(lease 갱신 없음)
+            time.sleep(lease / 3)
+    shutil.rmtree(bench_cycle.DATA_DIR, ignore_errors=True)
+    out.put((node, dict(notify.counts), owned))
+
+
+def reference_counts() -> dict:
+    cfg = bench_cycle.make_config("json", "keyword")
+    sites, notify = bench_cycle.setup_stubs(cfg)
+    bench_cycle.load_lists(cfg, sites, 1)
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        bench_cycle.reset_data_dir(cfg)
+        main.run_cycle(cfg, main.load_state())
+    return dict(notify.counts)
+
+
+def check_cycles(cluster_dir: str, nodes: int, lease: float) -> bool:
+    ref = reference_counts()
+    all_boards = {f"{s}:{b}" for s, b in bench_cycle.ALL_BOARDS}
+    cycles = 6  # lease/3 간격 → 마지막 사이클은 w0 lease 만료 뒤
+
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(nodes)
+    out = ctx.Queue()
+    procs = [ctx.Process(target=cycle_worker, args=(cluster_dir, f"w{i}", lease, cycles, barrier, out)) for i in range(nodes)]
+    for p in procs:
+        p.start()
+    results = {}
+    for _ in procs:
+        node, counts, owned = out.get()
+        results[node] = (counts, owned)
+    for p in procs:
+        p.join()
+
+    ok = True
+    total = {ch: sum(r[0][ch] for r in results.values()) for ch in ref}
+    sent_ok = total == ref
+    ok &= sent_ok
+    print(f"notifications: single={ref} cluster_total={total} -> {'OK' if sent_ok else 'FAIL'}")
+
+    first = {n: r[1][0] for n, r in results.items()}
+    flat = [b for bs in first.values() for b in bs]
+    split_ok = len(flat) == len(set(flat)) == len(all_boards) and all(first.values())
+    ok &= split_ok
+    print(f"first cycle split: { {n: len(bs) for n, bs in sorted(first.items())} } -> {'OK' if split_ok else 'FAIL'}")
+
+    last = {n: r[1][-1] for n, r in results.items() if n != "w0"}
+    flat = [b for bs in last.values() for b in bs]
+    takeover_ok = set(flat) == all_boards and len(flat) == len(set(flat))
+    ok &= takeover_ok
+    print(
+        f"after w0 stopped: { {n: len(bs) for n, bs in sorted(last.items())} } "
+        f"(w0 had {sorted(first['w0'])}) -> {'OK' if takeover_ok else 'FAIL'}"
+    )
+    return ok
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--nodes", type=int, default=3)
+    ap.add_argument("--keys", type=int, default=2000)
+    ap.add_argument("--lease", type=float, default=3.0, help="lease 시간(초). 점검용으로 짧게")
+    args = ap.parse_args()
+
+    cluster_dir = tempfile.mkdtemp(prefix="hotdeal_cluster_")
+    try:
+        ok = check_claims(cluster_dir, args.nodes, args.keys, args.lease)
+        ok &= check_cycles(cluster_dir, max(2, args.nodes), args.lease)
+    finally:
+        shutil.rmtree(cluster_dir, ignore_errors=True)
+        shutil.rmtree(bench_cycle.DATA_DIR, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main_cli()
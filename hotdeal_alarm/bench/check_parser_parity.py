@@ -0,0 +1,285 @@
+"""
+목록/상세 파서 결과 비교: main.py의 파서 vs 예전 정규식.
+
+예전 정규식(백트래킹 많음)을 그대로 남겨두고, 사이트별로 무작위 페이지를 만들어
+두 쪽 결과(제목/URL, 구매 링크)가 같은지 확인한다.
+스트리밍(final=False로 조각마다 이어서 파싱)한 결과도 한 번에 파싱한 결과와 같은지 본다.
+bench/fixtures/ 아래 페이지(<site>_<board>_list.html, <site>_detail*.html, 뽐뿌는 euc-kr)도 비교한다.
+
+사용법:
+  python bench/check_parser_parity.py --pages 300 --seed 1
+종료 코드: 불일치가 있으면 1
+"""
+import argparse
+import glob
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import main  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+LEGACY_LIST = {
+    ("ppomppu", None): re.compile(
+        r'title[\"\'] href=\"(?P<url>view\.php.+?)\"\s*>.+>(?P<title>.+)</span></a>', re.MULTILINE
+    ),
+    ("clien", "allsell"): re.compile(
+        r'class=\"list_subject\" href=\"(?P<url>.+?)\" .+\s+.+\s+.+?data-role=\"list-title-text\"\stitle=\"(?P<title>.+?)\"',
+        re.MULTILINE,
+    ),
+    ("clien", None): re.compile(
+        r'href=\"(?P<url>/service/board/jirum/\d+)[^\"]*\"[^>]*>[^<]*<span[^>]*class=\"subject_fixed\"[^>]*>(?P<title>[^<]+)</span>',
+        re.MULTILINE,
+    ),
+    ("ruriweb", None): re.compile(
+        r'href=\"(?P<url>/market/board/\d+/read/\d+)[^\"]*\"[^>]*>(?P<title>[^<]+)</a>', re.MULTILINE
+    ),
+    ("coolenjoy", None): re.compile(
+        r'<td class=\"td_subject\">\s+<a href=\"(?P<url>.+)\">\s+(?:<font color=.+?>)?(?P<title>.+?)(?:</font>)?\s+<span class=\"sound_only\"',
+        re.MULTILINE,
+    ),
+    ("quasarzone", None): re.compile(
+        r'<p class=\"tit\">\s+<a href=\"(?P<url>.+)\"\s+class=.+>\s+.+\s+(?:<span class=\"ellipsis-with-reply-cnt\">)?(?P<title>.+?)(?:</span>)',
+        re.MULTILINE,
+    ),
+}
+
+LEGACY_MALL = {
+    "ppomppu": r'class=\"[^\"]*topTitle-link[^\"]*\".*?href=\"(?P<mall_url>https?://[^\"]+)\"',
+    "clien": r'구매링크.+?>(?P<mall_url>[^<]+)<',
+    "ruriweb": r'원본출처.+?(?P<mall_url>https?://[^\s\"<]+)',
+    "coolenjoy": r'alt=\"관련링크\">\s+(?P<mall_url>[^<]+)<',
+    "quasarzone": r'<th>\s*링크.+?</th>\s*<td>\s*<a[^>]*>(?P<mall_url>https?://[^<\s]+)</a>',
+}
+
+BOARDS = [
+    ("ppomppu", "ppomppu"),
+    ("clien", "allsell"),
+    ("clien", "jirum"),
+    ("ruriweb", "1020"),
+    ("coolenjoy", "jirum"),
+    ("quasarzone", "qb_saleinfo"),
+]
+
+FIXTURE_BOARDS = BOARDS + [
+    ("ppomppu", "ppomppu4"),
+    ("ppomppu", "ppomppu8"),
+    ("ppomppu", "money"),
+    ("ruriweb", "600004"),
+]
+
+WORDS = ["[11번가]", "삼성", "SSD", "1TB", "무료배송", "(3,900원)", "특가", "<b>", "\"따옴표\"", "&amp;", "'", ">"]
+
+
+def title(rnd):
+    return " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 6)))
+
+
+def ws(rnd, newline=False):
+    s = rnd.choice(["", " ", "\t", "  "])
+    if newline:
+        s += "\n" * rnd.randint(1, 2) + rnd.choice(["", "    ", "\t\t", "   \n  "])
+    return s
+
+
+def noise(rnd):
+    return rnd.choice(["", "<div>광고</div>\n", "\n", "<span>-</span>\n", "x" * rnd.randint(0, 300) + "\n"])
+
+
+def make_row(rnd, site, board, i):
+    t = title(rnd)
+    if site == "ppomppu":
+        q = rnd.choice(["\"", "'"])
+        extra = rnd.choice(["", "&page=1", "\" data-x=\"1", "&a=\"b"])
+        return (
+            f'<a class="baseList-title" title{q} href="view.php?id=ppomppu&no={i}{extra}"{ws(rnd)}>'
+            f'<span class="x">{rnd.choice(["", "<img>"])}<span>{t}</span></a>{rnd.choice(["", " <em>3</em></span></a>"])}\n'
+        )
+    if site == "clien" and board == "allsell":
+        return (
+            f'<a class="list_subject" href="/service/board/allsell/{i}?od=T31" data-role="x">\n'
+            f'{ws(rnd)}<span class="category">판매</span>{ws(rnd, rnd.random() < 0.3)}\n'
+            f'{ws(rnd)}<span class="subject_fixed" data-role="list-title-text"{rnd.choice([" ", chr(10)])}title="{t}">{t}</span>\n'
+        )
+    if site == "clien":
+        return (
+            f'<a class="list_subject" href="/service/board/jirum/{i}?od=T31&category=0" data-role="x">'
+            f'{rnd.choice(["", "  "])}<span class="subject_fixed" data-role="list-title-text" title="{t}">{t}</span></a>\n'
+        )
+    if site == "ruriweb":
+        return f'<a class="deco" href="/market/board/1020/read/{i}?page=1">{t}</a>{rnd.choice(["", "<span>[3]</span>"])}\n'
+    if site == "coolenjoy":
+        font = rnd.choice(["", '<font color="red">'])
+        return (
+            f'<td class="td_subject">{ws(rnd, True)}<a href="https://coolenjoy.net/bbs/jirum/{i}">{ws(rnd, True)}'
+            f'{font}{t}{"</font>" if font else ""}{ws(rnd, True)}<span class="sound_only">댓글</span>\n'
+        )
+    if site == "quasarzone":
+        label = rnd.choice(["", '<span class="label">진행중</span>'])
+        reply = rnd.choice(["", '<span class="ellipsis-with-reply-cnt">'])
+        return (
+            f'<p class="tit">{ws(rnd, True)}<a href="/bbs/qb_saleinfo/views/{i}"{ws(rnd, True)}class="subject-link">\n'
+            f'{ws(rnd)}{label}\n{ws(rnd)}{reply}{t}</span>\n'
+        )
+    return ""
+
+
+def make_list_page(rnd, site, board, n):
+    parts = ["<html><body>\n"]
+    for i in range(n):
+        parts.append(noise(rnd))
+        if rnd.random() < 0.1:
+            # 깨진 행(중간이 빠지거나 줄이 바뀜)
+            row = make_row(rnd, site, board, 900000 + i)
+            cut = rnd.randint(0, len(row))
+            parts.append(row[:cut] + rnd.choice(["\n", "", "</a>"]) + "\n")
+        else:
+            parts.append(make_row(rnd, site, board, 1000000 - i))
+    parts.append("</body></html>\n")
+    return "".join(parts)
+
+
+def make_detail_page(rnd, site):
+    url = f"https://shop.example.com/item?{rnd.randint(1, 99999)}&amp;ref=a"
+    body = noise(rnd) + noise(rnd)
+    if site == "ppomppu":
+        li = rnd.choice(["", '<li class="other">x</li>\n'])
+        cls = rnd.choice(["topTitle-link", "a topTitle-link b", "topTitle"])
+        href = rnd.choice([f'href="{url}"', 'href="/local"', f'\n<a href="{url}">'])
+        return f"{body}{li}<li class=\"{cls}\">{noise(rnd)}<a {href}>링크</a></li>\n{noise(rnd)}"
+    if site == "clien":
+        return f'{body}<span>구매링크</span>{noise(rnd)}<a href="{url}">{rnd.choice([url, ""])}</a>\n'
+    if site == "ruriweb":
+        return f'{body}<div>원본출처{rnd.choice(["", " : ", chr(10)])}<a href="{url}">{url}</a></div>\n'
+    if site == "coolenjoy":
+        return (
+            f'{body}<img alt="관련링크">{rnd.choice(["", " ", chr(10) + "  "])}{url}</a>\n'
+            f'<img alt="관련링크">\n  {url}2</a>\n'
+        )
+    if site == "quasarzone":
+        return (
+            f"{body}<th>{rnd.choice(['', ' ', chr(10)])}링크{rnd.choice(['', ' 주소', '<br>'])}</th>{ws(rnd, True)}"
+            f'<td>{ws(rnd)}<a href="{url}" target="_blank">{rnd.choice([url, "링크", url + " x"])}</a></td>\n'
+        )
+    return body
+
+
+def legacy_list(site, board, text):
+    pattern = LEGACY_LIST.get((site, board)) or LEGACY_LIST.get((site, None))
+    out = [main.board_item(site, board, m) for m in pattern.finditer(text)]
+    return out[1:] if site == "ppomppu" else out
+
+
+def new_list(site, board, text):
+    return main.parse_board_items(site, board, text)
+
+
+def streamed_list(site, board, text, rnd):
+    parser = main.board_parser(site, board)
+    out = []
+    buf = ""
+    pos = 0
+    i = 0
+    while i < len(text):
+        step = rnd.randint(1, 4096)
+        buf += text[i:i + step]
+        i += step
+        for m in parser.finditer(buf, pos, final=False):
+            out.append(main.board_item(site, board, m))
+            pos = m.end()
+    for m in parser.finditer(buf, pos, final=True):
+        out.append(main.board_item(site, board, m))
+    return out[1:] if site == "ppomppu" else out
+
+
+def legacy_mall(site, text):
+    m = re.search(LEGACY_MALL[site], text, re.MULTILINE | re.DOTALL)
+    return m.group("mall_url") if m else ""
+
+
+def check_list(site, board, text, rnd, label, errors):
+    old = legacy_list(site, board, text)
+    new = new_list(site, board, text)
+    streamed = streamed_list(site, board, text, rnd)
+    if old != new:
+        errors.append(f"{label}: list mismatch {site}/{board} old={len(old)} new={len(new)}")
+    elif old != streamed:
+        errors.append(f"{label}: stream mismatch {site}/{board} old={len(old)} streamed={len(streamed)}")
+    return len(old)
+
+
+def check_mall(site, text, label, errors):
+    old = legacy_mall(site, text)
+    new = main._MALL_PARSERS[site].search(text)
+    if old != new:
+        errors.append(f"{label}: mall mismatch {site} old={old!r} new={new!r}")
+
+
+def worst_case(site, board, n):
+    """예전 정규식이 오래 걸리는 입력: 앵커만 많고 끝 부분이 없는 긴 줄"""
+    if site == "ppomppu":
+        return ('title" href="view.php?' + '"' * 50 + " " * 50) * n
+    if site == "coolenjoy":
+        return '<td class="td_subject">\n<a href="x">\n' * n
+    if site == "quasarzone":
+        return '<p class="tit">\n<a href="x" class=y>\n' * n
+    if site == "clien" and board == "allsell":
+        return ('class="list_subject" href="x" ' + "a " * 40 + "\n") * n
+    return ""
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=200, help="사이트별 무작위 페이지 수")
+    ap.add_argument("--rows", type=int, default=30)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    errors = []
+    rows = 0
+
+    for site, board in BOARDS:
+        for p in range(args.pages):
+            text = make_list_page(rnd, site, board, args.rows)
+            rows += check_list(site, board, text, rnd, f"random#{p}", errors)
+        for p in range(args.pages):
+            check_mall(site, make_detail_page(rnd, site), f"random#{p}", errors)
+
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        name = os.path.basename(path)[:-len(".html")]
+        site = name.split("_", 1)[0]
+        with open(path, "rb") as f:
+            text = f.read().decode("euc-kr" if site == "ppomppu" else "utf-8")
+        for site, board in FIXTURE_BOARDS:
+            if name == f"{site}_{board}_list":
+                rows += check_list(site, board, text, rnd, name, errors)
+        site = name.split("_", 1)[0]
+        if "_detail" in name and site in LEGACY_MALL:
+            check_mall(site, text, name, errors)
+
+    for site, board in BOARDS:
+        text = worst_case(site, board, 400)
+        if not text:
+            continue
+        pattern = LEGACY_LIST.get((site, board)) or LEGACY_LIST.get((site, None))
+        t0 = time.perf_counter()
+        list(pattern.finditer(text))
+        t1 = time.perf_counter()
+        list(main.board_parser(site, board).finditer(text))
+        t2 = time.perf_counter()
+        print(f"worst-case {site}/{board}: legacy {1000 * (t1 - t0):.1f}ms, parser {1000 * (t2 - t1):.1f}ms")
+
+    for e in errors[:20]:
+        print(e)
+    print(f"rows={rows} errors={len(errors)}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
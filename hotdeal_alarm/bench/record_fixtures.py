@@ -0,0 +1,80 @@
+"""
+bench/fixtures/ 갱신: 실제 사이트에서 게시판 목록 첫 페이지와 사이트별 상세 페이지 하나를 받아 그대로 저장한다.
+(응답 바이트를 그대로 저장하므로 뽐뿌는 euc-kr 그대로 남음)
+
+저장 파일:
+  <site>_<board>_list.html  — 게시판 목록
+  <site>_detail.html        — 목록 첫 글의 상세 페이지(구매 링크 추출용)
+
+사용법(네트워크 필요):
+  python bench/record_fixtures.py
+  python bench/record_fixtures.py --site ppomppu clien
+"""
+import argparse
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "app"))
+
+import main  # noqa: E402
+
+ALL_BOARDS = [
+    ("ppomppu", "ppomppu"),
+    ("ppomppu", "ppomppu4"),
+    ("ppomppu", "ppomppu8"),
+    ("ppomppu", "money"),
+    ("clien", "allsell"),
+    ("clien", "jirum"),
+    ("ruriweb", "1020"),
+    ("ruriweb", "600004"),
+    ("coolenjoy", "jirum"),
+    ("quasarzone", "qb_saleinfo"),
+]
+
+
+def save(name: str, body: bytes):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with open(os.path.join(FIXTURE_DIR, name), "wb") as f:
+        f.write(body)
+    print(f"saved {name} ({len(body)} bytes)")
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--site", nargs="+", help="이 사이트만(기본: 전체)")
+    args = ap.parse_args()
+
+    cfg = {}
+    for site, board in ALL_BOARDS:
+        if not args.site or site in args.site:
+            cfg[f"use_site_{site}"] = True
+            cfg[f"use_board_{site}_{board}"] = True
+
+    detail_done = set()
+    for job in main.get_board_jobs(cfg):
+        site, board = job["site"], job["board"]
+        res = main.http_get(job["url"], use_cloudscraper=job["cloud"])
+        if res is None:
+            print(f"FAILED {site}/{board}: {job['url']}")
+            continue
+        save(f"{site}_{board}_list.html", res.content)
+
+        if site in detail_done:
+            continue
+        items = main.parse_board_items(site, board, main.decode_response(job["url"], res))
+        if not items:
+            print(f"no items parsed for {site}/{board}, detail page not recorded")
+            continue
+        url = items[0]["url"]
+        full = url if url.startswith("http") else main.get_url_prefix(site) + url
+        detail = main.http_get(full, use_cloudscraper=job["cloud"])
+        if detail is not None:
+            save(f"{site}_detail.html", detail.content)
+            detail_done.add(site)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -2,5 +2,7 @@
 set -e
 
 export CONFIG_PATH="/data/options.json"
-exec /opt/venv/bin/python /app/main.py
+# python -m: 이미지 빌드 때 만든 __pycache__를 사용(python main.py는 시작할 때마다 main.py를 새로 컴파일)
+cd /app
+exec /opt/venv/bin/python -m main
 